@@ -89,7 +89,7 @@ def main():
 
 
     with benchmark('Running simulation'):
-        result = bundle.get_simulation().run(do_spawn=False)
+        result = bundle.get_simulation().run(do_spawn=False, progress_dirname=bundle.progress_dirname)
         result.set_simulation_time(t_start, time.time())
 
     #LogMgr.info("Simulation Ran OK. Post Processing:")
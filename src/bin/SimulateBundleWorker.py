@@ -0,0 +1,136 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+# A long-lived simulation worker, started by NEURONSimulationWorkerPool.
+#
+# The worker imports morphforge and NEURON once, then reads bundle filenames
+# (pickled) from stdin. Each bundle is simulated in a forked child, so that
+# NEURON starts each simulation in a clean state, but without paying for the
+# imports again. Mod-file DLLs loaded by a child are also loaded into the
+# worker afterwards, so later children inherit them. The result of each
+# bundle is pickled back to the pool on the file-descriptor given as the
+# first argument.
+
+# Import the AGG backend, since it loads fast:
+import matplotlib
+matplotlib.use('Agg')
+
+import sys
+import os
+import time
+import cPickle
+import traceback
+
+from morphforge.core import mfrandom
+from morphforge.simulation.base.simulationmetadatabundle import SimMetaDataBundle
+from morphforge.simulation.neuron.core.neuronsimulation import NEURONSimulation
+
+try:
+    import neuron
+except ImportError:
+    neuron = None
+
+
+def run_bundle(bundle_filename, dll_fd):
+    t_start = time.time()
+    bundle = SimMetaDataBundle.load_from_file(bundle_filename)
+
+    # Load the random number seed
+    if bundle.random_seed is not None:
+        mfrandom.MFRandom.seed(bundle.random_seed)
+
+    result = bundle.get_simulation().run(do_spawn=False, progress_dirname=bundle.progress_dirname)
+    result.set_simulation_time(t_start, time.time())
+    bundle.do_postprocessing_actions()
+
+    # Tell the worker which mod-files were loaded:
+    dll_file = os.fdopen(dll_fd, 'wb')
+    dll_file.write('\n'.join(sorted(NEURONSimulation._loaded_mod_dlls)))
+    dll_file.close()
+
+
+def run_bundle_in_child(bundle_filename):
+    (dll_r, dll_w) = os.pipe()
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    pid = os.fork()
+    if pid == 0:
+        os.close(dll_r)
+        try:
+            run_bundle(bundle_filename, dll_w)
+        except:
+            traceback.print_exc()
+            print 'Simulation Failled'
+            sys.stdout.flush()
+            os._exit(0)
+        sys.stdout.flush()
+        os._exit(1)
+
+    os.close(dll_w)
+    dll_file = os.fdopen(dll_r, 'rb')
+    dlls = [dll for dll in dll_file.read().split('\n') if dll]
+    dll_file.close()
+    (_pid, status) = os.waitpid(pid, 0)
+    succeeded = os.WIFEXITED(status) and os.WEXITSTATUS(status) == 1
+
+    # (Failing to preload a DLL only makes the next simulation slower):
+    if succeeded:
+        try:
+            for dll in dlls:
+                NEURONSimulation._load_mod_dll(dll)
+        except:
+            traceback.print_exc()
+    return succeeded
+
+
+def main():
+    result_file = os.fdopen(int(sys.argv[1]), 'wb')
+    while True:
+        try:
+            bundle_filename = cPickle.load(sys.stdin)
+        except EOFError:
+            break
+        if bundle_filename is None:
+            break
+
+        try:
+            response = (run_bundle_in_child(bundle_filename), None)
+        except Exception, e:
+            traceback.print_exc()
+            response = (False, str(e))
+
+        cPickle.dump(response, result_file, cPickle.HIGHEST_PROTOCOL)
+        result_file.flush()
+
+
+main()
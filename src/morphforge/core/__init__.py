@@ -41,6 +41,7 @@ from mgrs import LocMgr, LogMgr, SettingsMgr, RCMgr
 from misc import merge_dictionaries, check_cstyle_varname
 from misc import is_iterable, FileIO
 from misc import SeqUtils, StrUtils
+from misc import TemplateCache
 from misc import ParameterSweepValues
 
 from objectnumberer import ObjectLabeller
@@ -58,6 +59,7 @@ __all__ = [
     'FileIO',
     'SeqUtils',
     'StrUtils',
+    'TemplateCache',
     'check_cstyle_varname',
     'is_iterable',
     'ObjectLabeller',
@@ -60,6 +60,21 @@ class MFRandom(object):
 
         return cls._seed
 
+    @classmethod
+    def get_state(cls):
+        """ Returns the state of the random number generators, which can be
+        restored with 'set_state()'"""
+
+        return (cls._seed, random.getstate(), numpy.random.get_state())
+
+    @classmethod
+    def set_state(cls, state):
+        """ Restores a state returned by 'get_state()'"""
+
+        (MFRandom._seed, random_state, numpy_state) = state
+        random.setstate(random_state)
+        numpy.random.set_state(numpy_state)
+
     @classmethod
     def _reseed(cls):
         random.seed(cls._seed)
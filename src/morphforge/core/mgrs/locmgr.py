@@ -58,8 +58,12 @@ class LocMgr(object):
         if dir_location and not os.path.exists(dir_location):
             from logmgr import LogMgr
             LogMgr.info('Creating FS Location - ' + dir_location)
-            if not os.path.exists(dir_location):
+            try:
                 os.makedirs(dir_location)
+            except OSError:
+                # (Another process may have just created it):
+                if not os.path.isdir(dir_location):
+                    raise
         return cls.validate_exists(dir_location)
 
     @classmethod
@@ -83,7 +87,7 @@ class LocMgr(object):
     def get_temporary_filename(cls, suffix='', filedirectory=None):
 
 
-        rnd_string = "%f%d%s" % (time.time(), random.randint(0, 32000), socket.gethostname())
+        rnd_string = "%f%d%s%d" % (time.time(), random.randint(0, 32000), socket.gethostname(), os.getpid())
         from morphforge.core.misc import StrUtils
         filename = 'tmp_%s%s' % (StrUtils.get_hash_md5(rnd_string), suffix)
 
@@ -150,6 +154,11 @@ class LocMgr(object):
         loc = cls.get_path_from_rcfile("tmp_simulationpicklesdir", Join(cls.get_tmp_path(), "simulationresults"))
         return cls.ensure_dir_exists(loc)
 
+    @classmethod
+    def get_morphology_cache_dir(cls):
+        loc = cls.get_path_from_rcfile("tmp_morphologycachedir", Join(cls.get_tmp_path(), "morphologycache"))
+        return cls.ensure_dir_exists(loc)
+
     @classmethod
     def get_ply_parsetab_path(cls, subdir):
         dir_name = os.path.join(cls.get_tmp_path(), "parsetabs/")
@@ -39,6 +39,34 @@ class SettingsMgr(object):
 
     _clearTempAllAt_start = True
 
+    # Cache imported morphologies in LocMgr.get_morphology_cache_dir():
+    _morphology_cache_enabled = True
+    _morphology_cache_max_bytes = 512 * 1024 * 1024
+
+    # Run spawned simulations in long-lived worker processes, rather than
+    # starting a new interpreter for each one. (None means one worker per
+    # cpu):
+    _simulation_worker_pool_enabled = True
+    _simulation_worker_pool_size = None
+
+    # Results of spawned simulations, keyed on the simulation fingerprint:
+    _simulation_result_cache_max_bytes = 2 * 1024 * 1024 * 1024
+
+    # Build NEURON simulations directly through 'neuron.h', rather than by
+    # writing and loading a HOC file. (Simulations containing objects
+    # without a direct builder fall back to HOC). The HOC file can still be
+    # written out alongside, for debugging:
+    _neuron_direct_instantiation_enabled = True
+    _neuron_hoc_export_enabled = False
+
+    # How often, (in seconds of wall-clock time), a simulation reports its
+    # progress and flushes its recorded traces when it is being monitored:
+    _simulation_progress_interval = 1.0
+
+    # The number of points processed at a time by the methods of chunked,
+    # (memory-mapped), traces:
+    _trace_chunk_size = 1000000
+
     @classmethod
     def is_logging(cls):
         return cls._logging
@@ -51,4 +79,41 @@ class SettingsMgr(object):
     def simulator_is_verbose(cls):
         return False
 
+    @classmethod
+    def is_morphology_cache_enabled(cls):
+        return cls._morphology_cache_enabled
+
+    @classmethod
+    def get_morphology_cache_max_bytes(cls):
+        return cls._morphology_cache_max_bytes
+
+    @classmethod
+    def is_simulation_worker_pool_enabled(cls):
+        return cls._simulation_worker_pool_enabled
+
+    @classmethod
+    def get_simulation_worker_pool_size(cls):
+        if cls._simulation_worker_pool_size is None:
+            import multiprocessing
+            return multiprocessing.cpu_count()
+        return cls._simulation_worker_pool_size
+
+    @classmethod
+    def get_simulation_result_cache_max_bytes(cls):
+        return cls._simulation_result_cache_max_bytes
+
+    @classmethod
+    def is_neuron_direct_instantiation_enabled(cls):
+        return cls._neuron_direct_instantiation_enabled
 
+    @classmethod
+    def is_neuron_hoc_export_enabled(cls):
+        return cls._neuron_hoc_export_enabled
+
+    @classmethod
+    def get_simulation_progress_interval(cls):
+        return cls._simulation_progress_interval
+
+    @classmethod
+    def get_trace_chunk_size(cls):
+        return cls._trace_chunk_size
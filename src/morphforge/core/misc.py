@@ -150,6 +150,32 @@ class FileIO(object):
         return StrUtils.get_hash_md5(FileIO.read_from_file(filename))
 
 
+class TemplateCache(object):
+
+    """ Cheetah templates, compiled once per process.
+
+    Constructing a ``Cheetah.Template.Template`` from a string compiles the
+    template to python each time. The HOC/MOD builders render the same few
+    templates many times over, so we compile each template string once, and
+    reuse the generated class.
+    """
+
+    _compiled = {}
+
+    @classmethod
+    def get_template_class(cls, tmpl_str):
+        tmpl_class = cls._compiled.get(tmpl_str, None)
+        if tmpl_class is None:
+            from Cheetah.Template import Template
+            tmpl_class = Template.compile(source=tmpl_str)
+            cls._compiled[tmpl_str] = tmpl_class
+        return tmpl_class
+
+    @classmethod
+    def render(cls, tmpl_str, namespaces):
+        return cls.get_template_class(tmpl_str)(namespaces=namespaces).respond()
+
+
 class SeqUtils(object):
 
     """ A collection of utility functions for working with sequences"""
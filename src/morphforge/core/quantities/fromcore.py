@@ -88,6 +88,9 @@ def _unit(s):
 # Lets cache the units:
 _cached_units = {}
 def unit(s):
+    # (Quantities are returned as they are, and can not be hashed):
+    if isinstance(s, pq.quantity.Quantity):
+        return s
     if not s in _cached_units:
         _cached_units[s] = _unit(s)
     return _cached_units[s]
@@ -100,16 +100,11 @@ class MorphArrayComparison(object):
         import scipy.spatial
         kd_tree = scipy.spatial.KDTree(m2._vertices[:, 0:3])
 
-        id_map = {}
-        max_dist = 0
-        for (vi, v) in enumerate(m1._vertices[:, 0:3]):
-            (dist, nearest_neighbour) = kd_tree.query(v)
+        # Query all the vertices in a single call:
+        (dists, nearest_neighbours) = kd_tree.query(m1._vertices[:, 0:3])
 
-            if vi in id_map:
-                return None
-
-            id_map[vi] = nearest_neighbour
-            max_dist = max(max_dist, dist)
+        id_map = dict(enumerate(nearest_neighbours.tolist()))
+        max_dist = (np.max(dists) if len(dists) else 0)
 
         return (id_map, max_dist)
 
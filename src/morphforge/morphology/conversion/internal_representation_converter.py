@@ -31,7 +31,6 @@
 
 from morphforge.morphology.core import Section
 import collections
-from morphforge.morphology.visitor.visitorbaseclasses import SectionIndexerDF
 from morphforge.morphology.core.array import MorphologyArray
 from morphforge.morphology.conversion import AutoRegionToIntMapTable
 from morphforge.morphology.core import Region
@@ -54,7 +53,7 @@ class MorphologyConverter(object):
         vertices = [None] * (len(tree) + 1)
         connectivity = []
         section_types = []
-        section_index = SectionIndexerDF(morph=tree, offset=1).dict
+        section_index = dict((section, index + 1) for (section, index) in tree.get_section_indexer().iteritems())
         section_index[tree.get_dummy_section()] = 0
 
         for seg in tree._every_section():
@@ -78,11 +77,15 @@ class MorphologyConverter(object):
         return MorphologyArray(vertices=vertices,
                             connectivity=connectivity,
                             dummy_vertex_index=0,
-                            section_types=section_types)
+                            section_types=section_types,
+                            region_number_to_name_bidict=region_number_to_name_bidict)
 
 
     @classmethod
-    def array_to_tree(cls, array, region_number_to_name_bidict=None):
+    def array_to_tree(cls, array, region_number_to_name_bidict=None, vertex_idtags=None):
+        """Converts a MorphologyArray into a MorphologyTree. 'vertex_idtags'
+        can optionally map vertex indices to the idtags of the sections
+        created for them."""
 
         if region_number_to_name_bidict is None:
             if array.region_number_to_name_bidict is not None:
@@ -96,8 +99,18 @@ class MorphologyConverter(object):
 
         index_to_section_map = {}
 
+        # Use the adjacency index of the array, rather than searching the
+        # connectivity for every vertex. Converting to lists up front makes
+        # the loop below work with python ints:
+        (indptr, neighbours, edges) = array._get_adjacency()
+        indptr = indptr.tolist()
+        neighbours = neighbours.tolist()
+        edges = edges.tolist()
+        vertices = array._vertices.tolist()
+        section_types = array._section_types.tolist()
+
         # Create the root section:
-        (x, y, z, r) = array._vertices[dummy_vertex_index]
+        (x, y, z, r) = vertices[dummy_vertex_index]
         dummy_section = Section(region=None, x=x, y=y, z=z, r=r)
 
         index_to_section_map[dummy_vertex_index] = dummy_section
@@ -108,9 +121,8 @@ class MorphologyConverter(object):
             index = indices_to_visit.pop()
             section = index_to_section_map[index]
 
-            connections_to_index = array.connections_to_index(index)
-
-            for conn in connections_to_index:
+            for offset in xrange(indptr[index], indptr[index + 1]):
+                conn = neighbours[offset]
 
                 # Have we made this connection already?:
                 if conn in index_to_section_map:
@@ -118,11 +130,11 @@ class MorphologyConverter(object):
 
                 # No? Lets make a connection:
                 else:
-                    (x, y, z, r) = array._vertices[conn]
-                    index_of_connection = array.index_of_connection(index, conn)
+                    (x, y, z, r) = vertices[conn]
+                    index_of_connection = edges[offset]
 
                     # Create the region, if it doesn't already exist:
-                    rgn_int =  array._section_types[index_of_connection]
+                    rgn_int =  section_types[index_of_connection]
 
 
                     rgn_name = region_number_to_name_bidict.int_to_region_name(_int=rgn_int)
@@ -134,7 +146,8 @@ class MorphologyConverter(object):
                             name_to_region_map[rgn_name] = Region(rgn_name)
                         rgn = name_to_region_map[rgn_name]
 
-                    newsection =  section.create_distal_section(region=rgn, x=x, y=y, z=z, r=r)
+                    idtag = (vertex_idtags.get(conn, None) if vertex_idtags else None)
+                    newsection =  section.create_distal_section(region=rgn, x=x, y=y, z=z, r=r, idtag=idtag)
                     index_to_section_map[conn] = newsection
                     indices_to_visit.append(conn)
 
@@ -60,15 +60,18 @@ class MorphologyArray(MorphologyBase):
         super(MorphologyArray, self).__init__(region_number_to_name_bidict=region_number_to_name_bidict, name=name, metadata=metadata)
         
         # Save the data in the correct formats:
-        self._connectivity = np.array(connectivity).reshape(-1, 2)
+        self._connectivity = np.array(connectivity, dtype=int).reshape(-1, 2)
         N = self._connectivity.shape[0]
         self._vertices = np.array(vertices).reshape(-1, 4)
         M = self._vertices.shape[0]
 
-        self._section_types = (np.array(section_types) if section_types else np.zeros(len(connectivity)))
+        self._section_types = (np.array(section_types) if section_types is not None else np.zeros(N))
 
         self._dummy_vertex_index = dummy_vertex_index
 
+        # Built lazily by _get_adjacency():
+        self._adjacency = None
+
         # Some Error Checking:
 
         assert N == M - 1, 'N != M-1 (N:%d, M:%d)' % (N, M)
@@ -80,11 +83,49 @@ class MorphologyArray(MorphologyBase):
         # If we store the data in arrays, then we no longer store which
         # is our dummy vertex, which we will need for generating trees
 
+    def __getstate__(self):
+        # The adjacency index is derived data, so we don't pickle it. This
+        # keeps pickles (and so md5sums of simulations) independent of
+        # whether it has been built yet:
+        state = self.__dict__.copy()
+        state['_adjacency'] = None
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault('_adjacency', None)
+        self.__dict__.update(state)
+
+    def _get_adjacency(self):
+        """Returns a compressed-sparse-row index of the connectivity.
+
+        The result is a tuple ``(indptr, neighbours, edges)``, such that for
+        vertex ``v``, ``neighbours[indptr[v]:indptr[v+1]]`` are the vertices
+        connected to ``v`` and ``edges[indptr[v]:indptr[v+1]]`` are the
+        indices into ``_connectivity`` of the corresponding connections.
+        The neighbours are in the same order as returned by
+        ``connections_to_index()``. The index is built on first use.
+        """
+
+        if self._adjacency is None:
+            n_vertices = self._vertices.shape[0]
+            n_connections = self._connectivity.shape[0]
+            (i_s, j_s) = (self._connectivity[:, 0], self._connectivity[:, 1])
+
+            # Every connection is entered twice, once for each end. A stable
+            # sort keeps 'j == v' entries before 'i == v' entries:
+            src = np.concatenate((j_s, i_s))
+            dst = np.concatenate((i_s, j_s))
+            edge = np.concatenate((np.arange(n_connections), np.arange(n_connections)))
+            order = np.argsort(src, kind='mergesort')
+
+            indptr = np.zeros(n_vertices + 1, dtype=int)
+            indptr[1:] = np.cumsum(np.bincount(src, minlength=n_vertices))
+            self._adjacency = (indptr, dst[order], edge[order])
+        return self._adjacency
+
     def get_leaf_vertices_indices(self):
-        vertex_connections = np.zeros(len(self._vertices))
-        for (i, j) in self._connectivity:
-            vertex_connections[i] = vertex_connections[i] + 1
-            vertex_connections[j] = vertex_connections[j] + 1
+        (indptr, _neighbours, _edges) = self._get_adjacency()
+        vertex_connections = np.diff(indptr)
         leaf_vertices = np.where(vertex_connections == 1)[0]
         return leaf_vertices
 
@@ -105,14 +146,13 @@ class MorphologyArray(MorphologyBase):
         return self._connectivity.size / 2
 
     def connections_to_index(self, pid):
-        return [i for (i, j) in self._connectivity if j == pid] + [j for (i, j) in self._connectivity if i == pid]
+        (indptr, neighbours, _edges) = self._get_adjacency()
+        return neighbours[indptr[pid]:indptr[pid + 1]].tolist()
 
     def index_of_connection(self, _id, pid):
-        for (index, (i, j)) in enumerate(self._connectivity):
-            if i == _id and j == pid:
-                return index
-            if i == pid and j == _id:
-                return index
-        assert False, ' Connection not found'
-
+        (indptr, neighbours, edges) = self._get_adjacency()
+        (start, end) = (indptr[_id], indptr[_id + 1])
+        matches = np.nonzero(neighbours[start:end] == pid)[0]
+        assert len(matches) > 0, ' Connection not found'
+        return edges[start + matches[0]]
 
@@ -41,11 +41,15 @@ class MorphologyBase(object):
     def to_array(self):
         raise NotImplementedError()
 
+    # The prefix of the names given to morphologies created without one,
+    # (which are numbered from a per-process counter):
+    _generated_name_prefix = 'UnamedMorphologyBase'
+
     def __init__(self, region_number_to_name_bidict=None, name=None,
                  metadata=None):
         self.region_number_to_name_bidict = region_number_to_name_bidict
 
-        self._name = name or ObjectLabeller.get_next_unamed_object_name(MorphologyBase)
+        self._name = name or ObjectLabeller.get_next_unamed_object_name(MorphologyBase, prefix=MorphologyBase._generated_name_prefix)
         check_cstyle_varname(self._name)
 
         self.metadata = (metadata if metadata else {})
@@ -54,6 +58,9 @@ class MorphologyBase(object):
     @property
     def name(self):
         return self._name
+
+    def has_generated_name(self):
+        return self._name.startswith(MorphologyBase._generated_name_prefix)
     #name = property(lambda self: self._name, None)
 
 
@@ -0,0 +1,175 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+"""Whole-tree measurements of morphologies.
+
+:py:class:`SectionMetrics` computes the path-lengths, depths, branch orders
+and subtree sizes of every section in a tree in a single pass over numpy
+arrays. Sums along the path to the root are calculated by pointer-jumping,
+which also gives the table of ancestors used to find the lowest common
+ancestor of two sections in O(log N).
+
+The arrays are indexed by the position of the section in its tree's
+geometry store (``section._index``), in which the dummy section is always
+at index 0 and parents always come before their children.
+
+.. code-block:: python
+
+    metrics = morph.get_metrics()
+    metrics.get_distal_path_length(section)
+    metrics.get_lowest_common_ancestor(section1, section2)
+
+"""
+
+import numpy as np
+
+
+class SectionMetrics(object):
+
+    def __init__(self, store):
+        xyzr = store.xyzr
+        parents = store.parent_indices.copy()
+        n_sections = len(parents)
+
+        self.version = store.version
+
+        # Indices of the parent of each section (-1 for the dummy):
+        self.parents = parents
+        has_parent = (parents != -1)
+        parents_or_self = np.where(has_parent, parents, np.arange(n_sections))
+
+        # Section lengths, (the dummy section has no length):
+        deltas = xyzr[:, 0:3] - xyzr[parents_or_self, 0:3]
+        self.lengths = np.sqrt(np.sum(deltas ** 2, axis=1))
+        self.diameters = xyzr[:, 3] + xyzr[parents_or_self, 3]
+
+        # The ancestor table: self._ancestors[k][i] is the 2^k-th ancestor
+        # of section i (or -1 if it doesn't exist):
+        self._ancestors = [parents]
+        while np.any(self._ancestors[-1] != -1):
+            anc = self._ancestors[-1]
+            self._ancestors.append(np.where(anc != -1, anc[np.maximum(anc, 0)], -1))
+
+        self.n_children = np.bincount(parents[has_parent], minlength=n_sections)
+        is_root = has_parent & (parents_or_self == 0)
+        is_after_branch = has_parent & ~is_root & (self.n_children[parents_or_self] > 1)
+
+        # Path-based measures:
+        self.distal_path_lengths = self.accumulate_to_root(self.lengths)
+        self.proximal_path_lengths = self.distal_path_lengths - self.lengths
+        self.depths = self.accumulate_to_root(has_parent.astype(int))
+        self.branch_orders = self.accumulate_to_root(is_after_branch.astype(int))
+
+        # Subtree measures, (parents always come before their children, so
+        # a single reverse pass is enough):
+        subtree_sizes = np.ones(n_sections, dtype=int).tolist()
+        subtree_lengths = self.lengths.tolist()
+        parent_list = parents.tolist()
+        for i in xrange(n_sections - 1, 0, -1):
+            subtree_sizes[parent_list[i]] += subtree_sizes[i]
+            subtree_lengths[parent_list[i]] += subtree_lengths[i]
+        self.subtree_sizes = np.array(subtree_sizes)
+        self.subtree_lengths = np.array(subtree_lengths)
+
+        # Plain lists are faster for the scalar lookups in the LCA queries:
+        self._ancestor_lists = [anc.tolist() for anc in self._ancestors]
+        self._depth_list = self.depths.tolist()
+        self._distal_path_length_list = self.distal_path_lengths.tolist()
+        self._length_list = self.lengths.tolist()
+
+    def accumulate_to_root(self, values):
+        """Returns, for each section, the sum of 'values' over the section
+        and all its ancestors."""
+
+        totals = np.array(values, copy=True)
+        for anc in self._ancestors:
+            has_anc = (anc != -1)
+            if not np.any(has_anc):
+                break
+            totals = totals + np.where(has_anc, totals[np.maximum(anc, 0)], 0)
+        return totals
+
+    def get_electrotonic_distances(self, rm, ra):
+        """Returns the electrotonic distance (in length constants) from the
+        dummy section to the distal end of each section.
+
+        `rm` is the specific membrane resistance in ohm.cm2 and `ra` is the
+        axial resistance in ohm.cm. Morphology coordinates are taken to be
+        in um, and each section uses the mean of its end diameters.
+        """
+
+        # lambda = sqrt(rm.d / (4.ra)), with d converted from um to cm, and
+        # lambda converted back into um:
+        diameters = np.maximum(self.diameters, 1e-12)
+        length_constants = np.sqrt(rm * (diameters * 1e-4) / (4.0 * ra)) * 1e4
+        return self.accumulate_to_root(self.lengths / length_constants)
+
+    # Single section queries:
+    def get_distal_path_length(self, section):
+        return self._distal_path_length_list[section._index]
+
+    def get_proximal_path_length(self, section):
+        return self._distal_path_length_list[section._index] - self._length_list[section._index]
+
+    def get_path_length_to(self, section, sectionpos):
+        """The path length from the dummy section to a point on a section"""
+        index = section._index
+        return self._distal_path_length_list[index] - (1.0 - sectionpos) * self._length_list[index]
+
+    def get_lowest_common_ancestor_index(self, index1, index2):
+        """Returns the index of the deepest section that is an ancestor of
+        (or the same as) both sections. This is the dummy section (index 0)
+        if the sections are below different root sections."""
+
+        ancestors = self._ancestor_lists
+        depths = self._depth_list
+        if depths[index1] < depths[index2]:
+            (index1, index2) = (index2, index1)
+
+        # Move index1 up to the same depth as index2:
+        diff = depths[index1] - depths[index2]
+        level = 0
+        while diff:
+            if diff & 1:
+                index1 = ancestors[level][index1]
+            diff >>= 1
+            level += 1
+
+        if index1 == index2:
+            return index1
+
+        # Move both up, as long as they don't meet:
+        for level in reversed(xrange(len(ancestors))):
+            if ancestors[level][index1] != ancestors[level][index2]:
+                index1 = ancestors[level][index1]
+                index2 = ancestors[level][index2]
+        return ancestors[0][index1]
@@ -144,32 +144,147 @@ from morphforge.core import SeqUtils
 from morphforge.core import check_cstyle_varname
 
 from morphforge.morphology.core.base import MorphologyBase
-from morphforge.morphology.visitor import SectionListerDF
 from morphologyconsistency import MorphologyConsistencyMgr
+from morphometrics import SectionMetrics
+
+
+class _SectionGeometryStore(object):
+    """Contiguous storage for all the Sections connected to the same dummy
+    section.
+
+    The distal (x, y, z, r) of every section, the index of its parent and
+    the index of its region are held in arrays, which grow as sections are
+    added. Section objects just store their index into these arrays. This
+    keeps the memory per section small, and allows whole-morphology
+    calculations to be vectorised (see ``MorphologyTree.lengths()``).
+
+    The version is incremented whenever a Section is added to the tree,
+    which allows MorphologyTree to tell when its cached orderings of the
+    sections are out of date.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._n = 0
+        self._xyzr = numpy.empty((16, 4))
+        self._parent_indices = numpy.empty(16, dtype=int)
+        self._region_ids = numpy.empty(16, dtype=int)
+        self._regions = []
+        self._region_to_id = {}
+        self._metrics = None
+
+    def __len__(self):
+        return self._n
+
+    def __getstate__(self):
+        # Only pickle the used part of the arrays, so that the pickle (and
+        # so md5sums of simulations) do not depend on spare capacity:
+        state = self.__dict__.copy()
+        state['_xyzr'] = self.xyzr.copy()
+        state['_parent_indices'] = self.parent_indices.copy()
+        state['_region_ids'] = self.region_ids.copy()
+
+        # The ordering of a dictionary keyed on Regions is not stable, so
+        # it is rebuilt on unpickling:
+        del state['_region_to_id']
+        state['_metrics'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._region_to_id = dict([(region, index) for (index, region) in enumerate(self._regions)])
+
+    def _fingerprint_state(self):
+        # (See SimulationFingerprint; the version is left out, since it
+        # depends on how the tree was built):
+        return (self.xyzr, self.parent_indices, self.region_ids, [region.name for region in self._regions])
+
+    def _grow(self):
+        capacity = max(16, 2 * self._xyzr.shape[0])
+
+        xyzr = numpy.empty((capacity, 4))
+        xyzr[:self._n] = self._xyzr[:self._n]
+        parent_indices = numpy.empty(capacity, dtype=int)
+        parent_indices[:self._n] = self._parent_indices[:self._n]
+        region_ids = numpy.empty(capacity, dtype=int)
+        region_ids[:self._n] = self._region_ids[:self._n]
+
+        (self._xyzr, self._parent_indices, self._region_ids) = (xyzr, parent_indices, region_ids)
+
+    def add_section(self, x, y, z, r, parent_index, region):
+        """Stores the geometry of a new section and returns its index"""
+
+        if self._n == self._xyzr.shape[0]:
+            self._grow()
+
+        if region is None:
+            region_id = -1
+        else:
+            if not region in self._region_to_id:
+                self._region_to_id[region] = len(self._regions)
+                self._regions.append(region)
+            region_id = self._region_to_id[region]
+
+        index = self._n
+        self._xyzr[index] = (float(x), float(y), float(z), float(r))
+        self._parent_indices[index] = parent_index
+        self._region_ids[index] = region_id
+        self._n += 1
+        return index
+
+    @property
+    def xyzr(self):
+        """The distal (x, y, z, r) of each section"""
+        return self._xyzr[:self._n]
+
+    @property
+    def parent_indices(self):
+        """The index of the parent of each section (-1 for the dummy section)"""
+        return self._parent_indices[:self._n]
+
+    @property
+    def region_ids(self):
+        """The index of the region of each section (-1 for no region)"""
+        return self._region_ids[:self._n]
+
+    def get_region(self, region_id):
+        return (self._regions[region_id] if region_id != -1 else None)
+
+    def get_metrics(self):
+        """Returns the SectionMetrics for the stored sections, recalculating
+        them if sections have been added since they were last built."""
+
+        if self._metrics is None or self._metrics.version != self.version:
+            self._metrics = SectionMetrics(self)
+        return self._metrics
 
 
 class Section(object):
 
+    # Sections only hold their topology, the geometry is stored
+    # in a _SectionGeometryStore shared with the rest of the tree:
+    __slots__ = ('_store', '_index', '_parent', '_children', '_region', '_id_tag', '__weakref__')
+
     @property
     def d_x(self):
         "Distal x coordinate"
-        return self._d_pos[0]
+        return self._store._xyzr[self._index, 0]
 
 
     @property
     def d_y(self):
         "Distal y coordinate"
-        return self._d_pos[1]
+        return self._store._xyzr[self._index, 1]
 
     @property
     def d_z(self):
         "Distal z coordinate"
-        return self._d_pos[2]
+        return self._store._xyzr[self._index, 2]
 
     @property
     def d_r(self):
         "Distal r coordinate"
-        return self._d_r
+        return self._store._xyzr[self._index, 3]
 
 
     @property
@@ -214,8 +329,10 @@ class Section(object):
     def __init__(self, x, y, z, r, region, parent=None, idtag=None):
         """ Creation of the section.  """
 
-        self._d_pos = numpy.array((float(x), float(y), float(z)))
-        self._d_r = float(r)
+        self._store = (parent._store if parent is not None else _SectionGeometryStore())
+        self._index = self._store.add_section(x=x, y=y, z=z, r=r,
+                parent_index=(parent._index if parent is not None else -1),
+                region=region)
 
         self._parent = parent
         self._children = []
@@ -228,6 +345,25 @@ class Section(object):
         if not self.is_dummy_section():
             if not self in self.parent.children:
                 self.parent.children.append(self)
+                self._store.version += 1
+
+    # __slots__ classes need to be explicit about their pickled state:
+    def __getstate__(self):
+        return dict([(attr, getattr(self, attr)) for attr in Section.__slots__ if attr != '__weakref__'])
+
+    def __setstate__(self, state):
+        for (attr, value) in state.iteritems():
+            setattr(self, attr, value)
+
+    def _fingerprint_state(self):
+        # The geometry and topology are in the store, so we don't need to
+        # walk the parent and children:
+        return (self._store, self._index, self._id_tag)
+
+    def _fingerprint_sort_key(self):
+        # (The store is shared by every Section of the morphology, so it
+        # is only hashed once when ordering dictionaries keyed on them):
+        return (self._store, self._index)
 
     # Adding new sections:
     def create_distal_section(self, x, y, z, r, region, idtag=None):
@@ -261,13 +397,13 @@ class Section(object):
     def get_distal_npa3(self):
         """Returns the 3 coordinates of the distal end of the section.  """
 
-        return self._d_pos
+        return self._store._xyzr[self._index, 0:3].copy()
 
     def get_distal_npa4(self):
         """Returns the 3 coordinates and the radius of the distal end of the
             section.  """
 
-        return numpy.array((self.d_x, self.d_y, self.d_z, self.d_r))
+        return self._store._xyzr[self._index].copy()
 
     def get_proximal_npa3(self):
         """ Returns the 3 coordinates of the proximal end of the section.  """
@@ -279,7 +415,7 @@ class Section(object):
         """Returns the 3 coordinates and the radius of the proximal end of the section.  """
 
         assert not self.is_dummy_section()
-        return numpy.array((self.p_x, self.p_y, self.p_z, self.p_r))
+        return self.parent.get_distal_npa4()
 
     def __repr__(self):
         if self.is_dummy_section():
@@ -303,9 +439,20 @@ class Section(object):
 
         return self.get_distal_npa4() - self.get_proximal_npa4()
 
+    def _get_distal_and_proximal_xyzr(self):
+        xyzr = self._store._xyzr
+        return (xyzr[self._index].tolist(), xyzr[self._parent._index].tolist())
+
+    @classmethod
+    def _length_from_xyzr(cls, d_xyzr, p_xyzr):
+        return math.sqrt((d_xyzr[0] - p_xyzr[0]) ** 2 +
+                         (d_xyzr[1] - p_xyzr[1]) ** 2 +
+                         (d_xyzr[2] - p_xyzr[2]) ** 2)
+
     def get_length(self):
         assert not self.is_dummy_section(), "Getting Length of dummy section!"
-        return numpy.linalg.norm(self.get_proximal_to_distal_vector_npa3())
+        (d_xyzr, p_xyzr) = self._get_distal_and_proximal_xyzr()
+        return Section._length_from_xyzr(d_xyzr, p_xyzr)
 
     def get_area(self, include_end_if_terminal=False):
         """ Returns the area of the section.  """
@@ -316,9 +463,10 @@ class Section(object):
         # We need to consider this; since there are 2 ends that might be
         # open
 
-        R = self.d_r
-        r = self.p_r
-        length = self.get_length()
+        (d_xyzr, p_xyzr) = self._get_distal_and_proximal_xyzr()
+        R = d_xyzr[3]
+        r = p_xyzr[3]
+        length = Section._length_from_xyzr(d_xyzr, p_xyzr)
         lateral_area = math.pi * (R + r) * math.sqrt((R - r) ** 2 + length ** 2)
 
         if include_end_if_terminal and (self.is_leaf()  or self.is_a_root_section()):
@@ -335,9 +483,10 @@ class Section(object):
         """Returns the volume of the section."""
         assert not self.is_dummy_section(), 'Getting volume of dummy section!'
 
-        R = self.d_r
-        r = self.p_r
-        length = self.get_length()
+        (d_xyzr, p_xyzr) = self._get_distal_and_proximal_xyzr()
+        R = d_xyzr[3]
+        r = p_xyzr[3]
+        length = Section._length_from_xyzr(d_xyzr, p_xyzr)
         return 1.0 / 3.0 * math.pi * length * (R * R + R * r + r * r)
 
     area = property(get_area)
@@ -372,6 +521,9 @@ class Region(object):
         self.sections = []
         self.morph = None
 
+    def _fingerprint_state(self):
+        return self.name
+
     def __iter__(self):
         return iter(self.sections)
 
@@ -428,6 +580,38 @@ class MorphLocation(object):
         return self.section.get_proximal_npa3() + local_vector
 
 
+class _SectionCache(object):
+    """The depth-first ordering of the sections in a tree, along with lookup
+    tables built from it. These are built in a single pass, and are only
+    valid for the version of the tree that they were built from.
+    """
+
+    def __init__(self, dummysection):
+        self.version = dummysection._store.version
+
+        self.sections = []
+        self.section_to_index = {}
+        self.idtag_to_sections = {}
+        self.region_to_sections = {}
+
+        # Iterative depth-first traversal, (children are pushed in reverse
+        # so they are visited in order), to avoid the recursion limit on
+        # long unbranched morphologies:
+        to_visit = list(reversed(dummysection.children))
+        while to_visit:
+            section = to_visit.pop()
+            self.section_to_index[section] = len(self.sections)
+            self.sections.append(section)
+            if section.idtag:
+                self.idtag_to_sections.setdefault(section.idtag, []).append(section)
+            if section.region is not None:
+                self.region_to_sections.setdefault(section.region, []).append(section)
+            to_visit.extend(reversed(section.children))
+
+        # Where each section's geometry is in the _SectionGeometryStore:
+        self.store_indices = numpy.array([section._index for section in self.sections], dtype=int)
+
+
 class MorphologyTree(MorphologyBase):
 
     def to_tree(self):
@@ -440,8 +624,8 @@ class MorphologyTree(MorphologyBase):
     def __init__(self, name=None, dummysection=None, metadata=None, region_number_to_name_bidict=None):
         super(MorphologyTree, self).__init__(region_number_to_name_bidict=region_number_to_name_bidict, name=name, metadata=metadata)
 
-        self._regions = None
         self._dummysection = None
+        self._section_cache = None
 
         if dummysection:
             self.set_dummy_section(dummysection)
@@ -482,6 +666,34 @@ class MorphologyTree(MorphologyBase):
 
         assert self.ensure_consistency(), 'Morphology is not consistent'
 
+    def __getstate__(self):
+        # The section cache can always be rebuilt, so we don't pickle it:
+        state = self.__dict__.copy()
+        state['_section_cache'] = None
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault('_section_cache', None)
+        self.__dict__.update(state)
+
+    def _fingerprint_state(self):
+        # The name is left out: it is often generated from a global counter,
+        # and does not change the results of a simulation:
+        state = self.__getstate__()
+        del state['_name']
+        state['_idtags'] = [section.idtag for section in self]
+        return state
+
+    def _get_section_cache(self):
+        """Returns the _SectionCache for the tree, rebuilding it if sections
+        have been added since it was last built."""
+
+        cache = self._section_cache
+        if cache is None or cache.version != self._dummysection._store.version:
+            cache = _SectionCache(self._dummysection)
+            self._section_cache = cache
+        return cache
+
     def _every_section(self):
         """Includes dummy section"""
 
@@ -493,18 +705,21 @@ class MorphologyTree(MorphologyBase):
         """ Iteration over each of the sections."""
 
         #assert self.ensure_consistency(), 'Morphology is not consistent'
-
-        # TODO: replace this with a iterator method on one of the sections in the tree. I
-        # need to think about this. it might be the dummysection. This will be cleaner.
-        return iter(SectionListerDF(self)())
+        return iter(self._get_section_cache().sections)
 
     def __len__(self):
         """Returns the numbers of sections in the morphology """
 
         #assert self.ensure_consistency()
+        return len(self._get_section_cache().sections)
+
+    def get_section_indexer(self):
+        """Returns a dictionary mapping each section to its depth-first index.
 
-        # TODO: as per iter
-        return len(SectionListerDF(self)())
+        This is equivalent to ``SectionIndexerDF(morph)()``, but is cached on
+        the tree, so it should not be modified.
+        """
+        return self._get_section_cache().section_to_index
 
     def get_dummy_section(self):
         #assert self.ensure_consistency(), "MorphologyTree not consistent"
@@ -524,13 +739,9 @@ class MorphologyTree(MorphologyBase):
 
         #assert self.ensure_consistency()
 
-        if self._regions is None:
-            all_regions = [section.region for section in self]
-            self._regions = list(set(all_regions))
-            self._regions.sort(key=lambda r: r.name)
-            if self._regions.__contains__(None):
-                self._regions.remove(None)
-        return self._regions
+        regions = list(self._get_section_cache().region_to_sections.keys())
+        regions.sort(key=lambda r: r.name)
+        return regions
 
     @property
     def regions(self):
@@ -549,11 +760,20 @@ class MorphologyTree(MorphologyBase):
     def get_section(self, idtag):
         """ Returns a Section object with a given id"""
         #assert self.ensure_consistency()
-        return SeqUtils.filter_expect_single(self, lambda s: s.idtag == idtag)
+        sections = self._get_section_cache().idtag_to_sections.get(idtag, [])
+        if len(sections) == 0:
+            raise ValueError('Unable to find any occurances')
+        if len(sections) > 1:
+            raise ValueError('Found too many occurances')
+        return sections[0]
 
     def get_idtags(self):
         return [section.idtag for section in self if section.idtag]
 
+    def get_sections_in_region(self, region):
+        """Returns the sections in a region, in depth-first order"""
+        return list(self._get_section_cache().region_to_sections.get(region, []))
+
     def ensure_consistency(self, requiretreeset=True):
         """
         This method is used to check the consistency of the tree. In production code, all calls to this should be optimised out using
@@ -568,9 +788,53 @@ class MorphologyTree(MorphologyBase):
         #MorphologyConsistencyMgr.check_morphology(self)
         return True
 
+    def get_metrics(self):
+        """Returns the :py:class:`~.morphometrics.SectionMetrics` for the
+        tree, such as the path-length of each section from the dummy
+        section. These are cached until sections are added to the tree."""
+        return self._dummysection._store.get_metrics()
+
+    # Vectorised geometry over all sections, in the order of iteration:
+    def _get_distal_and_proximal_xyzr(self):
+        store = self._dummysection._store
+        store_indices = self._get_section_cache().store_indices
+        xyzr = store.xyzr
+        return (xyzr[store_indices], xyzr[store.parent_indices[store_indices]])
+
+    def lengths(self):
+        """Returns an array of the length of each section"""
+        (distal, proximal) = self._get_distal_and_proximal_xyzr()
+        return numpy.sqrt(numpy.sum((distal[:, 0:3] - proximal[:, 0:3]) ** 2, axis=1))
+
+    def areas(self, include_end_if_terminal=False):
+        """Returns an array of the area of each section.
+        (See Section.get_area())"""
+        (distal, proximal) = self._get_distal_and_proximal_xyzr()
+        (R, r) = (distal[:, 3], proximal[:, 3])
+        lengths = numpy.sqrt(numpy.sum((distal[:, 0:3] - proximal[:, 0:3]) ** 2, axis=1))
+        areas = math.pi * (R + r) * numpy.sqrt((R - r) ** 2 + lengths ** 2)
+
+        if include_end_if_terminal:
+            store = self._dummysection._store
+            store_indices = self._get_section_cache().store_indices
+            n_children = numpy.bincount(store.parent_indices[store_indices], minlength=len(store))
+            is_leaf = (n_children[store_indices] == 0)
+            is_root = (store.parent_indices[store_indices] == self._dummysection._index)
+            areas = areas + numpy.where(is_leaf, math.pi * R * R, 0.0)
+            if n_children[self._dummysection._index] == 1:
+                areas = areas + numpy.where(is_root, math.pi * r * r, 0.0)
+        return areas
+
+    def volumes(self):
+        """Returns an array of the volume of each section"""
+        (distal, proximal) = self._get_distal_and_proximal_xyzr()
+        (R, r) = (distal[:, 3], proximal[:, 3])
+        lengths = numpy.sqrt(numpy.sum((distal[:, 0:3] - proximal[:, 0:3]) ** 2, axis=1))
+        return 1.0 / 3.0 * math.pi * lengths * (R * R + R * r + r * r)
+
     @property
     def surface_area(self):
-        return sum(s.surface_area for s in self)
+        return float(numpy.sum(self.areas()))
 
 
 class MorphPath(object):
@@ -590,14 +854,9 @@ class MorphPath(object):
 
     def __init__(self, morphloc1, morphloc2):
 
-        # Check they are on the same morphology!
-        _section1 = morphloc1.section
-        _section2 = morphloc2.section
-        while not _section1.is_dummy_section():
-            _section1 = _section1.parent
-        while not _section2.is_dummy_section():
-            _section2 = _section2.parent
-        assert _section1 is _section2
+        # Check they are on the same morphology! (Sections in the same
+        # tree share the same geometry store):
+        assert morphloc1.section._store is morphloc2.section._store
 
         # Remap dummy sections to being proximal on the
         # first child section, to reduce special case handling:
@@ -606,49 +865,32 @@ class MorphPath(object):
         if morphloc2.section.is_dummy_section():
             morphloc2 = MorphLocation(morphloc2.section.children[0], 0.0)
 
-
-
-
         self.morphloc1 = morphloc1
         self.morphloc2 = morphloc2
 
-        # TO SET:
-        self.morphloc1_dir = None
-        self.morphloc2_dir = None
-        self._connecting_sections = set()
+        # The metrics hold the path-lengths from the dummy section and
+        # the ancestor tables for finding the lowest common ancestor:
+        self._metrics = morphloc1.section._store.get_metrics()
+        index1 = morphloc1.section._index
+        index2 = morphloc2.section._index
+        self._lca_index = self._metrics.get_lowest_common_ancestor_index(index1, index2)
 
         if morphloc1.section == morphloc2.section:
-
             # Points in the same section:
-            #self._connecting_sections = []
             if morphloc1.sectionpos < morphloc2.sectionpos:
                 self.morphloc1_dir, self.morphloc2_dir = self.DirDistal, self.DirProximal
             else:
                 self.morphloc1_dir, self.morphloc2_dir = self.DirProximal, self.DirDistal
 
-        else:
+        # Is one a direct parent of the other?
+        elif self._lca_index == index1:
+            self.morphloc1_dir, self.morphloc2_dir = self.DirDistal, self.DirProximal
+        elif self._lca_index == index2:
+            self.morphloc1_dir, self.morphloc2_dir = self.DirProximal, self.DirDistal
 
-            s1_sects = MorphPath.get_sections_to_root(morphloc1.section)
-            s2_sects = MorphPath.get_sections_to_root(morphloc2.section)
-
-            # Is one a direct parent of the other?
-            if morphloc1.section in s2_sects:
-                self._connecting_sections = set.symmetric_difference(s1_sects, s2_sects)
-                self.morphloc1_dir, self.morphloc2_dir =  self.DirDistal, self.DirProximal
-            elif morphloc2.section in s1_sects:
-                self._connecting_sections = set.symmetric_difference(s1_sects, s2_sects)
-                self.morphloc1_dir, self.morphloc2_dir =  self.DirProximal, self.DirDistal
-
-            else:
-                assert False
-
-            # Remove the original sections,  from the list of
-            # connecting sections:
-            self._connecting_sections.discard(morphloc1.section)
-            self._connecting_sections.discard(morphloc2.section)
-
-        assert not self.morphloc1.section in self._connecting_sections
-        assert not self.morphloc2.section in self._connecting_sections
+        # Otherwise, the path goes proximally from both ends:
+        else:
+            self.morphloc1_dir, self.morphloc2_dir = self.DirProximal, self.DirProximal
 
     def get_length(self):
 
@@ -656,20 +898,16 @@ class MorphPath(object):
         if self.morphloc1.section == self.morphloc2.section:
             return self.morphloc1.section.get_length() * np.fabs(self.morphloc1.sectionpos - self.morphloc2.sectionpos)
 
-
-        def s_len(loc, _dir):
-            if _dir == MorphPath.DirDistal:
-                return (1.0 - loc.sectionpos) * loc.section.get_length()
-            elif _dir == MorphPath.DirProximal:
-                return loc.sectionpos * loc.section.get_length()
-            else:
-                assert False
-
-        s1_length = s_len(self.morphloc1, self.morphloc1_dir)
-        s2_length = s_len(self.morphloc2, self.morphloc2_dir)
-        connecting_section_lengths = [_section.get_length() for _section in self._connecting_sections]
-        length = s1_length + s2_length + sum(connecting_section_lengths)
-        return length
+        # Otherwise, the path goes from each location back to the distal
+        # end of their lowest common ancestor, (or the dummy section):
+        metrics = self._metrics
+        dist1 = metrics.get_path_length_to(self.morphloc1.section, self.morphloc1.sectionpos)
+        dist2 = metrics.get_path_length_to(self.morphloc2.section, self.morphloc2.sectionpos)
+        if self._lca_index == self.morphloc1.section._index:
+            return dist2 - dist1
+        if self._lca_index == self.morphloc2.section._index:
+            return dist1 - dist2
+        return dist1 + dist2 - 2.0 * metrics.distal_path_lengths[self._lca_index]
 
 
     # def isSectionInPath(self, section):
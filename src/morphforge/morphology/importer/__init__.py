@@ -30,6 +30,7 @@
 # ----------------------------------------------------------------------
 
 from morphologyimporter import MorphologyImporter
+from morphologycache import MorphologyCache
 
 # Use this to dynamically register the particular loaders:
 import import_array_swc
@@ -32,76 +32,159 @@
 import numpy as np
 from morphforge.morphology.core import MorphologyArray
 from morphforge.morphology.importer.morphologyimporter import MorphologyImporter
-from StringIO import StringIO
 from morphforge.morphology.errors import MorphologyImportError
 from morphforge.morphology.core import MorphologyTree
 
 
 class NewSWCLoader(object):
 
+    # The number of bytes read from the source at a time:
+    default_chunk_size = 4 * 1024 * 1024
+
+    # Columns in an SWC file:
+    (col_id, col_type, col_x, col_y, col_z, col_r, col_pid) = range(7)
+
     @classmethod
-    def load_swc_single(cls, src, name=None):
+    def _parse_swc_text(cls, text):
+        """Converts a block of complete SWC lines into an (N, 7) array"""
 
-        dtype = {'names':   ('id', 'type', 'x', 'y', 'z', 'r', 'pid'),
-                 'formats': ('int32', 'int32', 'f4', 'f4', 'f4', 'f4', 'int32') }
+        lines = [line.split('#', 1)[0] for line in text.splitlines()]
+        lines = [line for line in lines if line.strip()]
+        if not lines:
+            return np.zeros((0, 7))
 
-        swc_data_raw = np.loadtxt(src, dtype=dtype)
+        for line in lines:
+            if len(line.split()) != 7:
+                raise MorphologyImportError('Unexpected number of columns in SWC line: %s' % line.strip())
 
-        if len(np.nonzero(swc_data_raw['pid'] == -1)) != 1:
-            assert False, "Unexpected number of id'errstr of -1 in file"
+        # np.fromstring() silently stops at the first token it can not
+        # parse, so check that we got every value back:
+        values = np.fromstring('\n'.join(lines), sep=' ')
+        if values.size != 7 * len(lines):
+            raise MorphologyImportError('Unable to parse SWC data (invalid value found)')
+        return values.reshape(-1, 7)
 
-        # We might not nessesarily have continuous indices in the
-        # SWC file, so lets convert them:
-        index_to_id = swc_data_raw['id']
-        id_to_index_dict = dict([(_id, index) for (index, _id) in enumerate(index_to_id)])
-        if len(id_to_index_dict) != len(index_to_id):
-            errstr =  "Internal Error Loading SWC: Index and ID map are different lengths."
-            errstr += " [ID:%swc_data_raw, Index:%swc_data_raw]" % (len(index_to_id), len(id_to_index_dict))
-            raise MorphologyImportError(errstr)
+    @classmethod
+    def iter_swc_rows(cls, src, chunk_size=None):
+        """Yields the rows of an SWC file as (N, 7) arrays, parsing
+        `chunk_size` bytes at a time, so that memory usage does not depend
+        on the size of the file."""
+
+        chunk_size = chunk_size or cls.default_chunk_size
+        leftover = ''
+        while True:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                break
+
+            # Only parse up to the last complete line:
+            text = leftover + chunk
+            last_newline = text.rfind('\n')
+            if last_newline == -1:
+                leftover = text
+                continue
+            (text, leftover) = (text[:last_newline + 1], text[last_newline + 1:])
+
+            rows = cls._parse_swc_text(text)
+            if len(rows):
+                yield rows
+
+        if leftover.strip():
+            rows = cls._parse_swc_text(leftover)
+            if len(rows):
+                yield rows
 
-        # Vertices are easy:
-        vertices = swc_data_raw[['x', 'y', 'z', 'r']]
-        vertices = np.vstack([swc_data_raw['x'], swc_data_raw['y'], swc_data_raw['z'], swc_data_raw['r']]).T
+    @classmethod
+    def _rows_to_morphology(cls, swc_data, name=None):
+        """Builds a MorphologyArray from an (N, 7) array of SWC rows"""
 
-        # Connections need to translate id_to_index:
-        connection_indices = [(id_to_index_dict[ID], id_to_index_dict[parent_id]) for ID, parent_id in swc_data_raw[['id', 'pid']] if parent_id != -1]
+        ids = swc_data[:, cls.col_id].astype(int)
+        pids = swc_data[:, cls.col_pid].astype(int)
 
-        # Types are specified per connection:
-        section_types = [swctype for ID, swctype, parent_id in swc_data_raw[['id', 'type', 'pid']] if parent_id != -1]
+        root_indices = np.nonzero(pids == -1)[0]
+        if len(root_indices) != 1:
+            raise MorphologyImportError("Unexpected number of id's of -1 in file (%d)" % len(root_indices))
 
-        return MorphologyArray(vertices=vertices, connectivity=connection_indices, section_types=section_types, dummy_vertex_index=0, name=name)
+        # We might not nessesarily have continuous indices in the
+        # SWC file, so lets convert them, by searching in the sorted ids:
+        order = np.argsort(ids, kind='mergesort')
+        sorted_ids = ids[order]
+        if np.any(sorted_ids[1:] == sorted_ids[:-1]):
+            raise MorphologyImportError('Internal Error Loading SWC: Duplicate IDs found.')
+
+        has_parent = (pids != -1)
+        parent_ids = pids[has_parent]
+        positions = np.searchsorted(sorted_ids, parent_ids)
+        positions_clipped = np.minimum(positions, len(sorted_ids) - 1)
+        if np.any(sorted_ids[positions_clipped] != parent_ids):
+            raise MorphologyImportError('Internal Error Loading SWC: Parent ID not found.')
+
+        # Connections are (index, parent_index):
+        connection_indices = np.column_stack((np.nonzero(has_parent)[0], order[positions_clipped]))
 
+        # Types are specified per connection:
+        section_types = swc_data[has_parent, cls.col_type].astype(int)
 
-    @classmethod
-    def load_swc_set(cls, src):
-        """Naive implementation, that doesn't take account of interleaving of nodes"""
+        vertices = swc_data[:, cls.col_x:cls.col_r + 1]
 
-        lines = [line.strip() for line in src.readlines()]
-        lines = [line for line in lines if line and line[0] != '#']
+        return MorphologyArray(vertices=vertices, connectivity=connection_indices, section_types=section_types, dummy_vertex_index=root_indices[0], name=name)
 
-        # Break into sections where we get a new parent:
-        splits = [[]]
-        for line in lines:
+    @classmethod
+    def load_swc_single(cls, src, name=None):
 
-            if int(line.split()[-1]) == -1:
-                splits.append([])
-            splits[-1].append(line)
+        if isinstance(src, basestring):
+            with open(src) as fobj:
+                return cls.load_swc_single(fobj, name=name)
 
-        splits = splits[1:]
+        rows = list(cls.iter_swc_rows(src))
+        swc_data = (np.vstack(rows) if rows else np.zeros((0, 7)))
+        return cls._rows_to_morphology(swc_data, name=name)
 
-        data_blocks = ['\n'.join(blk) for blk in splits]
-        file_objs = [StringIO(blk) for blk in data_blocks]
+    @classmethod
+    def iter_swc_set(cls, src, chunk_size=None):
+        """Yields a MorphologyArray for each cell in a multi-cell SWC file.
+        A new cell is started at each line with a parent ID of -1, and any
+        lines before the first root are ignored. Only the cell currently
+        being read is held in memory."""
+
+        if isinstance(src, basestring):
+            with open(src) as fobj:
+                for morph in cls.iter_swc_set(fobj, chunk_size=chunk_size):
+                    yield morph
+            return
+
+        current_blocks = []
+        seen_root = False
+        for rows in cls.iter_swc_rows(src, chunk_size=chunk_size):
+            root_indices = np.nonzero(rows[:, cls.col_pid] == -1)[0]
+            start = 0
+            for root_index in root_indices:
+                if seen_root:
+                    current_blocks.append(rows[start:root_index])
+                    yield cls._rows_to_morphology(np.vstack(current_blocks))
+                current_blocks = []
+                seen_root = True
+                start = root_index
+
+            # Rows before the first root do not belong to any cell:
+            if seen_root:
+                current_blocks.append(rows[start:])
+
+        if sum([len(blk) for blk in current_blocks]):
+            yield cls._rows_to_morphology(np.vstack(current_blocks))
 
-        morphs = [cls.load_swc_single(src=fobj) for fobj in file_objs]
-        return morphs
+    @classmethod
+    def load_swc_set(cls, src):
+        """Naive implementation, that doesn't take account of interleaving of nodes"""
+        return list(cls.iter_swc_set(src))
 
 
 # To Array:
-MorphologyImporter.register('fromSWC', NewSWCLoader.load_swc_single, as_type=MorphologyArray)
+MorphologyImporter.register('fromSWC', NewSWCLoader.load_swc_single, as_type=MorphologyArray, use_cache=True)
 
 # To Tree:
 
 def _load_swc_single_tree(*args, **kwargs):
     return NewSWCLoader.load_swc_single(*args, **kwargs).to_tree()
-MorphologyImporter.register('fromSWC', _load_swc_single_tree,  as_type=MorphologyTree)
+MorphologyImporter.register('fromSWC', _load_swc_single_tree,  as_type=MorphologyTree, use_cache=True)
 
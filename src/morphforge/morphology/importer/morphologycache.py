@@ -0,0 +1,349 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+"""A persistent, on-disk cache of imported morphologies.
+
+Importers registered with ``use_cache=True`` are wrapped, so that the first
+time a file is loaded, the resulting morphology is saved as a set of
+``.npy`` files (the vertices, connectivity and section types of its
+:py:class:`~morphforge.morphology.core.MorphologyArray`) along with a small
+json file holding the name and region-name mapping of the morphology.
+Later imports of a file with the same contents, through the same importer
+and with the same options, load these arrays instead of parsing the file,
+and return a morphology equal to the one that was first loaded. (Names
+that were generated automatically are not stored, so the loaded
+morphology gets a new one).
+
+Entries are stored in ``LocMgr.get_morphology_cache_dir()``, and the least
+recently used entries are removed when the cache grows larger than
+``SettingsMgr.get_morphology_cache_max_bytes()``. Use
+:py:meth:`MorphologyCache.invalidate` to remove the entries for a particular
+file, or :py:meth:`MorphologyCache.clear` to empty the cache.
+
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import cPickle
+import numpy as np
+
+from morphforge.core.mgrs import LocMgr, LogMgr, SettingsMgr
+from morphforge.morphology.core import MorphologyArray, MorphologyTree
+from morphforge.morphology.core import Section, Region
+from morphforge.morphology.conversion.region_to_int_bimap import RegionToIntMapBiMap
+from morphforge.morphology.conversion.region_to_int_bimap import AutoRegionToIntMapTable
+
+# The cache reads the internals of MorphologyArray:
+# pylint: disable=W0212
+
+
+class MorphologyCache(object):
+
+    _hash_chunk_size = 1024 * 1024
+    _metadata_filename = 'metadata.json'
+    _morph_metadata_filename = 'morph_metadata.pkl'
+    _array_names = ('vertices', 'connectivity', 'section_types')
+
+    # An estimate of the size of the cache, so that we only need to scan
+    # the cache directory when it might be over its limit. (None means
+    # that it has not been measured yet):
+    _estimated_size = None
+
+    # Hashing:
+    @classmethod
+    def get_src_hash(cls, src):
+        """Returns the md5 of the contents of `src`, which can be a filename
+        or a seekable file-object. Returns None for other objects, which
+        are not cached."""
+
+        if isinstance(src, basestring):
+            with open(src, 'rb') as fobj:
+                return cls.get_src_hash(fobj)
+
+        if not (hasattr(src, 'read') and hasattr(src, 'seek') and hasattr(src, 'tell')):
+            return None
+
+        position = src.tell()
+        md5 = hashlib.md5()
+        while True:
+            chunk = src.read(cls._hash_chunk_size)
+            if not chunk:
+                break
+            md5.update(chunk)
+        src.seek(position)
+        return md5.hexdigest()
+
+    @classmethod
+    def _get_options_hash(cls, method_name, as_type, args, kwargs):
+        options = (method_name, as_type.__name__, args, sorted(kwargs.items()))
+        return hashlib.md5(repr(options)).hexdigest()
+
+    @classmethod
+    def _get_entry_dir(cls, key):
+        return os.path.join(LocMgr.get_morphology_cache_dir(), key)
+
+    # Storing and loading entries:
+    @classmethod
+    def _save(cls, key, morph):
+        """Stores `morph` under `key`, and returns the number of bytes
+        written."""
+
+        entry_dir = cls._get_entry_dir(key)
+        if os.path.exists(entry_dir):
+            return 0
+
+        # Trees are stored as the array produced by tree_to_array(), in
+        # which the sections are in depth-first order, so the order can be
+        # restored exactly on loading:
+        if isinstance(morph, MorphologyTree):
+            tree_bidict = morph.region_number_to_name_bidict
+            array = morph.to_array(region_number_to_name_bidict=AutoRegionToIntMapTable())
+            vertex_idtags = dict([(index + 1, section.idtag) for (section, index) in morph.get_section_indexer().iteritems() if section.idtag])
+        else:
+            (tree_bidict, array, vertex_idtags) = (None, morph, {})
+
+        # Write to a temporary directory, then rename it into place, so that
+        # other processes never see partially written entries:
+        tmp_dir = LocMgr.get_temporary_filename(suffix='_' + key, filedirectory=LocMgr.get_morphology_cache_dir())
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, 'vertices.npy'), np.asarray(array._vertices, dtype=float))
+        np.save(os.path.join(tmp_dir, 'connectivity.npy'), np.asarray(array._connectivity, dtype=int))
+        np.save(os.path.join(tmp_dir, 'section_types.npy'), np.asarray(array._section_types))
+
+        bidict = array.region_number_to_name_bidict
+        metadata = {
+            # (Generated names come from a per-process counter, so are
+            # not stored; the loaded morphology gets a new one):
+            'name': (None if morph.has_generated_name() else morph.name),
+            'as_type': morph.__class__.__name__,
+            'dummy_vertex_index': (int(array._dummy_vertex_index) if array._dummy_vertex_index is not None else None),
+            'region_number_to_name': (sorted(bidict.int2regionname.items()) if bidict is not None else None),
+            'vertex_idtags': sorted(vertex_idtags.items()),
+            }
+        with open(os.path.join(tmp_dir, cls._metadata_filename), 'w') as fobj:
+            json.dump(metadata, fobj)
+
+        # The metadata of the morphology (and the region mapping of a
+        # tree) can hold arbitrary objects:
+        with open(os.path.join(tmp_dir, cls._morph_metadata_filename), 'wb') as fobj:
+            cPickle.dump((morph.metadata, tree_bidict), fobj, cPickle.HIGHEST_PROTOCOL)
+
+        size = sum([os.path.getsize(os.path.join(tmp_dir, f)) for f in os.listdir(tmp_dir)])
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Another process got there first:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return 0
+        return size
+
+    @classmethod
+    def _load(cls, key):
+        entry_dir = cls._get_entry_dir(key)
+        metadata_filename = os.path.join(entry_dir, cls._metadata_filename)
+        if not os.path.exists(metadata_filename):
+            return None
+
+        try:
+            with open(metadata_filename) as fobj:
+                metadata = json.load(fobj)
+            with open(os.path.join(entry_dir, cls._morph_metadata_filename), 'rb') as fobj:
+                (morph_metadata, tree_bidict) = cPickle.load(fobj)
+            (vertices, connectivity, section_types) = [
+                    np.load(os.path.join(entry_dir, '%s.npy' % array_name), mmap_mode='c')
+                    for array_name in cls._array_names]
+        except (IOError, ValueError, EOFError, cPickle.UnpicklingError):
+            LogMgr.warning('Unable to read morphology cache entry: %s' % key)
+            return None
+
+        # Mark the entry as recently used:
+        os.utime(metadata_filename, None)
+
+        bidict = None
+        if metadata['region_number_to_name'] is not None:
+            bidict = RegionToIntMapBiMap()
+            for (_int, region_name) in metadata['region_number_to_name']:
+                bidict.add_mapping((str(region_name) if region_name is not None else None), int(_int))
+
+        name = (str(metadata['name']) if metadata['name'] is not None else None)
+        if metadata['as_type'] == MorphologyTree.__name__:
+            vertex_idtags = dict([(int(index), str(idtag)) for (index, idtag) in metadata['vertex_idtags']])
+            return cls._build_tree(vertices=vertices,
+                                   connectivity=connectivity,
+                                   section_types=section_types,
+                                   bidict=bidict,
+                                   vertex_idtags=vertex_idtags,
+                                   name=name,
+                                   metadata=morph_metadata,
+                                   tree_bidict=tree_bidict)
+
+        return MorphologyArray(vertices=vertices,
+                               connectivity=connectivity,
+                               section_types=section_types,
+                               dummy_vertex_index=metadata['dummy_vertex_index'],
+                               region_number_to_name_bidict=bidict,
+                               name=name,
+                               metadata=morph_metadata)
+
+    @classmethod
+    def _build_tree(cls, vertices, connectivity, section_types, bidict, vertex_idtags, name, metadata, tree_bidict):
+        """Rebuilds a tree saved by _save(). Vertex 0 is the dummy section,
+        and vertex 'i' is the section with depth-first index 'i-1', so
+        creating the sections in vertex order gives every section's
+        children in their original order."""
+
+        n_vertices = len(vertices)
+        parent_indices = np.zeros(n_vertices, dtype=int)
+        parent_indices[connectivity[:, 0]] = connectivity[:, 1]
+        vertex_types = np.zeros(n_vertices, dtype=int)
+        vertex_types[connectivity[:, 0]] = section_types
+
+        vertices = vertices.tolist()
+        regions = {}
+        (x, y, z, r) = vertices[0]
+        sections = [Section(region=None, x=x, y=y, z=z, r=r)]
+        for index in xrange(1, n_vertices):
+            region_name = bidict.int_to_region_name(_int=int(vertex_types[index]))
+            if region_name is not None and not region_name in regions:
+                regions[region_name] = Region(region_name)
+            (x, y, z, r) = vertices[index]
+            parent = sections[parent_indices[index]]
+            sections.append(parent.create_distal_section(region=regions.get(region_name, None), x=x, y=y, z=z, r=r, idtag=vertex_idtags.get(index, None)))
+
+        return MorphologyTree(name=name, dummysection=sections[0], metadata=metadata,
+                              region_number_to_name_bidict=tree_bidict)
+
+    # Eviction:
+    @classmethod
+    def _get_entries(cls):
+        """Returns a list of (last-used-time, size, entry_dir)"""
+
+        cache_dir = LocMgr.get_morphology_cache_dir()
+        entries = []
+        for key in os.listdir(cache_dir):
+            entry_dir = os.path.join(cache_dir, key)
+            metadata_filename = os.path.join(entry_dir, cls._metadata_filename)
+            if not os.path.exists(metadata_filename):
+                continue
+            try:
+                size = sum([os.path.getsize(os.path.join(entry_dir, f)) for f in os.listdir(entry_dir)])
+                entries.append((os.path.getmtime(metadata_filename), size, entry_dir))
+            except OSError:
+                # Removed by another process:
+                continue
+        return entries
+
+    @classmethod
+    def evict(cls, max_bytes=None):
+        """Removes the least-recently used entries until the cache is no
+        larger than `max_bytes`."""
+
+        if max_bytes is None:
+            max_bytes = SettingsMgr.get_morphology_cache_max_bytes()
+
+        entries = sorted(cls._get_entries())
+        total_size = sum([size for (_mtime, size, _entry_dir) in entries])
+        for (_mtime, size, entry_dir) in entries:
+            if total_size <= max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+        cls._estimated_size = total_size
+
+    @classmethod
+    def _on_entry_added(cls, size):
+        """Updates the size estimate after an entry has been written, and
+        only scans the cache directory when it might be over its limit.
+        (Other processes may also be adding entries, so the estimate is
+        measured properly the first time it is needed.)"""
+
+        if cls._estimated_size is None:
+            cls._estimated_size = sum([entry_size for (_mtime, entry_size, _entry_dir) in cls._get_entries()])
+        else:
+            cls._estimated_size += size
+
+        if cls._estimated_size > SettingsMgr.get_morphology_cache_max_bytes():
+            cls.evict()
+
+    @classmethod
+    def invalidate(cls, src):
+        """Removes all cached entries for the contents of `src`"""
+
+        src_hash = cls.get_src_hash(src)
+        cache_dir = LocMgr.get_morphology_cache_dir()
+        for key in os.listdir(cache_dir):
+            if key.startswith(src_hash + '_'):
+                shutil.rmtree(os.path.join(cache_dir, key), ignore_errors=True)
+
+    @classmethod
+    def clear(cls):
+        """Removes all entries from the cache"""
+        cls.evict(max_bytes=0)
+
+    # Wrapping importers:
+    @classmethod
+    def wrap_import_functor(cls, method_name, import_functor, as_type, src_arg='src'):
+        """Returns an import functor that loads from the cache if possible.
+        The source is expected as the first positional argument, or the
+        keyword-argument `src_arg`."""
+
+        def cached_import_functor(*args, **kwargs):
+            if not SettingsMgr.is_morphology_cache_enabled():
+                return import_functor(*args, **kwargs)
+
+            if args:
+                (src, other_args) = (args[0], args[1:])
+                other_kwargs = kwargs
+            else:
+                src = kwargs[src_arg]
+                other_args = ()
+                other_kwargs = dict([(k, v) for (k, v) in kwargs.iteritems() if k != src_arg])
+
+            src_hash = cls.get_src_hash(src)
+            if src_hash is None:
+                return import_functor(*args, **kwargs)
+
+            key = '%s_%s' % (src_hash, cls._get_options_hash(method_name, as_type, other_args, other_kwargs))
+
+            # Cache hit?
+            morph = cls._load(key)
+            if morph is not None:
+                return morph
+
+            # Cache miss: parse the file, and store the result:
+            morph = import_functor(*args, **kwargs)
+            cls._on_entry_added(cls._save(key, morph))
+            return morph
+
+        return cached_import_functor
@@ -37,7 +37,13 @@ class MorphologyImporter(object):
     method_name_prefix = 'from'
 
     @classmethod
-    def register(cls, method_name, import_functor, as_type, allow_override=False):
+    def register(cls, method_name, import_functor, as_type, allow_override=False, use_cache=False, cache_src_arg='src'):
+        """Adds 'method_name' as a static method on 'as_type'.
+
+        If 'use_cache' is set, the results are stored in the MorphologyCache,
+        keyed on the contents of the source file (which is either the first
+        positional argument or the keyword argument 'cache_src_arg').
+        """
 
         if not isinstance(method_name, basestring):
             raise MorphologyFrameworkRegistrationError('method_name must be a string')
@@ -50,6 +56,10 @@ class MorphologyImporter(object):
             err += '(Perhaps use the "allow_override" parameter on this function-call?)'
             raise MorphologyFrameworkRegistrationError(err)
 
+        if use_cache:
+            from morphforge.morphology.importer.morphologycache import MorphologyCache
+            import_functor = MorphologyCache.wrap_import_functor(method_name, import_functor, as_type=as_type, src_arg=cache_src_arg)
+
         setattr(as_type, method_name, staticmethod(import_functor))
 
 
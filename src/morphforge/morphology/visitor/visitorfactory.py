@@ -33,6 +33,9 @@ import numpy as np
 from morphforge.morphology.visitor.visitorbaseclasses import DictBuilderSectionVisitorHomo
 from morphforge.morphology.visitor import SectionVisitorDF
 
+# The path-lengths are looked up in the metrics of each section's tree:
+# pylint: disable=W0212
+
 
 class SectionVistorFactory(object):
 
@@ -80,13 +83,7 @@ class SectionVistorFactory(object):
         def dict_section_proximal_dist_from_soma(s):
             if s.is_dummy_section():
                 assert False
-
-            if s.is_a_root_section():
-                return 0.0
-            else:
-                dist1 = dict_section_proximal_dist_from_soma(s.parent)
-                dist2 = s.parent.get_length()
-                return dist1 + dist2
+            return s._store.get_metrics().get_proximal_path_length(s)
 
         return DictBuilderSectionVisitorHomo(functor=dict_section_proximal_dist_from_soma, morph=morph)
 
@@ -94,10 +91,7 @@ class SectionVistorFactory(object):
     def dict_section_distal_dist_from_soma(cls, morph=None):
 
         def dict_section_distal_dist_from_soma(s):
-            if s.is_a_root_section():
-                return s.get_length()
-            else:
-                return dict_section_distal_dist_from_soma(s.parent) + s.get_length()
+            return s._store.get_metrics().get_distal_path_length(s)
 
         return DictBuilderSectionVisitorHomo(functor=dict_section_distal_dist_from_soma,
                 morph=morph)
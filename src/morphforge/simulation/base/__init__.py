@@ -33,6 +33,8 @@ from core.cell import Cell
 from core.celllocation import CellLocation
 from core.simulation import Simulation
 from core.simulationenvironment import SimulationEnvironment
+from core.simulationbatch import SimulationBatch, SimulationBatchTask
+from core.recordable import RecordSampling
 from stimulation import CurrentClamp, VoltageClamp
 from stimulation import CurrentClampStepChange, VoltageClampStepChange
 from result import SimulationResult
@@ -67,6 +69,9 @@ __all__ = [
     'Cell',
     'CellLocation',
     'SimulationEnvironment',
+    'SimulationBatch',
+    'SimulationBatchTask',
+    'RecordSampling',
     'AbstCellSegmenter',
     'CellSegmenter_MaxCompartmentLength',
     'CellBiophysics',
@@ -66,6 +66,11 @@ class CellBiophysics(object):
         self.appliedmechanisms = []
         self.appliedpassives = []
 
+        # The rules above, resolved for each section. These are filled in
+        # as sections are queried, and cleared when a rule is added:
+        self._resolved_mtas = {}
+        self._resolved_passives = {}
+
         # Add default passive configuration:
         self.add_passive(
                 passiveproperty=PassiveProperty.AxialResistance,
@@ -76,6 +81,21 @@ class CellBiophysics(object):
                 targetter=PassiveTargetterEverywhereDefault(),
                 value=PassiveProperty.defaults[PassiveProperty.SpecificCapacitance])
 
+    def __getstate__(self):
+        # The resolution caches are rebuilt on demand:
+        state = self.__dict__.copy()
+        del state['_resolved_mtas']
+        del state['_resolved_passives']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._clear_resolution_caches()
+
+    def _clear_resolution_caches(self):
+        self._resolved_mtas = {}
+        self._resolved_passives = {}
+
     # Active Mechanisms:
     # ####################
     def add_mechanism(self, mechanism, targetter, applicator):
@@ -84,8 +104,16 @@ class CellBiophysics(object):
 
         mta = _MechanismTargetApplicator(mechanism=mechanism, targetter=targetter, applicator=applicator)
         self.appliedmechanisms.append(mta)
+        self._clear_resolution_caches()
 
     def get_resolved_mtas_for_section(self, section):
+        resolved_mechs = self._resolved_mtas.get(section, None)
+        if resolved_mechs is None:
+            resolved_mechs = self._resolve_mtas_for_section(section)
+            self._resolved_mtas[section] = resolved_mechs
+        return resolved_mechs
+
+    def _resolve_mtas_for_section(self, section):
 
         # TODO: Some basic error checking here: we should ensure that if we specialise a region/section, then we also
         # cover the Everywhere. This should help us catch errors in ehich the user creates 2 mechanisms of the same thing, and 
@@ -93,7 +121,7 @@ class CellBiophysics(object):
 
         # All the mechanisms targetting a certain region:
         mtas_targetting_section = [mta for mta in self.appliedmechanisms if mta.targetter.does_target_section(section)]
-        mechs_targetting_section = set([ mta.mechanism for mta in self.appliedmechanisms])
+        mechs_targetting_section = set([ mta.mechanism for mta in mtas_targetting_section])
 
         resolved_mechs = []
         for mech in mechs_targetting_section:
@@ -164,8 +192,16 @@ class CellBiophysics(object):
     def add_passive(self, passiveproperty, targetter, value):
         pta = _PassiveTargetApplicator(passiveproperty=passiveproperty, targetter=targetter, value=value)
         self.appliedpassives.append(pta)
+        self._clear_resolution_caches()
 
     def get_passives_for_section(self, section):
+        passivemechs = self._resolved_passives.get(section, None)
+        if passivemechs is None:
+            passivemechs = self._resolve_passives_for_section(section)
+            self._resolved_passives[section] = passivemechs
+        return passivemechs
+
+    def _resolve_passives_for_section(self, section):
 
         sectionptas = [pta for pta in self.appliedpassives
                        if pta.targetter.does_target_section(section)]
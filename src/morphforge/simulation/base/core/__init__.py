@@ -33,4 +33,5 @@ from cell import Cell
 from celllocation import CellLocation
 from simulation import Simulation
 from simulationenvironment import SimulationEnvironment
-from recordable import Recordable
+from simulationbatch import SimulationBatch, SimulationBatchTask
+from recordable import Recordable, RecordSampling
@@ -31,16 +31,86 @@
 
 import itertools
 
+import numpy as np
+
+from morphforge.core.quantities import unit
 from morphforge.simulation.base.base_classes import NamedSimulationObject
 
 
+class RecordSampling(object):
+
+    """ How a recordable is sampled, (by default, at every solver step).
+
+     * interval: record every 'interval', (rather than every step).
+     * window: (start, stop) - only record in this window, (every
+       'interval', or every 'dt' of the simulation).
+     * envelope: record every step, but only keep the minimum and
+       maximum samples in each 'interval'. (This is done as the traces
+       are read back, so the peaks of spikes are not lost).
+
+    The first two are done by the simulator, so the samples are never
+    stored.
+    """
+
+    def __init__(self, interval=None, window=None, envelope=False):
+        self.interval = (unit(interval) if interval is not None else None)
+        self.window = (tuple([unit(t) for t in window]) if window is not None else None)
+        self.envelope = envelope
+
+        if self.envelope and self.interval is None:
+            raise ValueError('Envelope recording needs an interval')
+
+    def get_simulator_interval(self):
+        # The interval the simulator records at, (None for every step):
+        if self.envelope:
+            return None
+        return self.interval
+
+    def is_every_step(self):
+        return self.window is None and self.get_simulator_interval() is None
+
+    def get_record_times(self, dt):
+        # The times (in ms) to record at, when recording in a window:
+        if self.window is None:
+            return None
+        interval = self.get_simulator_interval() or dt
+        (start, stop) = [float(t.rescale('ms').magnitude) for t in self.window]
+        step = float(interval.rescale('ms').magnitude)
+        return np.arange(start, stop + step / 2.0, step)
+
+    def get_n_samples(self, tstop, dt):
+        # The number of samples that the simulator will record, (None if it
+        # records every step):
+        record_times = self.get_record_times(dt)
+        if record_times is not None:
+            return len(record_times)
+        interval = self.get_simulator_interval()
+        if interval is not None:
+            return int(float(tstop.rescale('ms').magnitude) / float(interval.rescale('ms').magnitude)) + 2
+        return None
+
+    def get_envelope_indices(self, time_array, data_array):
+        # The indices of the minimum and maximum samples in each interval,
+        # (in time order). Sorting by interval then by value, the first and
+        # last sample of each interval are its minimum and maximum:
+        interval = float(self.interval.rescale('ms').magnitude)
+        bins = np.floor((time_array - time_array[0]) / interval).astype(int)
+        order = np.lexsort((data_array, bins))
+        sorted_bins = bins[order]
+        new_bin = sorted_bins[1:] != sorted_bins[:-1]
+        is_first = np.r_[True, new_bin]
+        is_last = np.r_[new_bin, True]
+        return np.unique(np.r_[order[is_first], order[is_last]])
+
+
 class Recordable(NamedSimulationObject):
 
-    def __init__(self, description=None, user_tags=None, **kwargs):
+    def __init__(self, description=None, user_tags=None, sampling=None, **kwargs):
         super(Recordable, self).__init__(**kwargs)
 
         self.user_tags = (user_tags if user_tags else [])
         self._description = description
+        self.sampling = sampling
 
     def get_tags(self):
         return list(itertools.chain(self.get_std_tags(),
@@ -31,6 +31,7 @@
 
 from morphforge.core import LocMgr, SettingsMgr
 from morphforge.core.misc import SeqUtils
+from morphforge.simulation.base.core.recordable import RecordSampling
 
 import itertools
 
@@ -196,11 +197,26 @@ class Simulation(object):
     def run(self, **kwargs):
         raise NotImplementedError()
 
+    def _fingerprint_state(self):
+        # The result and hoc-filename are outputs, so should not change
+        # the fingerprint. (See SimulationFingerprint):
+        state = self.__dict__.copy()
+        state.pop('result', None)
+        state.pop('hocfilename', None)
+        return state
+
     #def add_recordable(self, recordable):
     #    raise NotImplementedError()
 
     # Syntactic Sugar for making more readable scripts:
-    def record(self, recordable_src=None, **kwargs):
+    def record(self, recordable_src=None, sample_interval=None, record_window=None, envelope=False, **kwargs):
+        """ Record from 'recordable_src'.
+
+        By default, the value is recorded at every step of the solver.
+        'sample_interval' and 'record_window' reduce this (see
+        RecordSampling); if 'envelope' is set, the minimum and maximum of
+        each 'sample_interval' are kept instead.
+        """
 
         # Allow 'recordable_src' to be missing. In this case; we expect
         # to be recording from the cell, and that there will be
@@ -208,6 +224,10 @@ class Simulation(object):
         if recordable_src is None:
             recordable_src = kwargs['cell_location'].cell
 
+        if sample_interval is not None or record_window is not None or envelope:
+            kwargs['sampling'] = RecordSampling(interval=sample_interval,
+                    window=record_window, envelope=envelope)
+
         recordable = recordable_src.get_recordable(simulation=self,
                 **kwargs)
         self.add_recordable(recordable)
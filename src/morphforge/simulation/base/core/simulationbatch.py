@@ -0,0 +1,132 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+import itertools
+from multiprocessing.pool import ThreadPool
+
+from morphforge.core import SettingsMgr
+from morphforge.core.mfrandom import MFRandom
+
+
+class SimulationBatchTask(object):
+    """A single simulation in a SimulationBatch. 'parameters' are the keyword
+    arguments passed to the builder, (or None if the simulation was given
+    directly)."""
+
+    def __init__(self, index, random_seed, simulation=None, parameters=None):
+        self.index = index
+        self.random_seed = random_seed
+        self.simulation = simulation
+        self.parameters = parameters
+
+
+class SimulationBatch(object):
+    """Runs many independent simulations in parallel.
+
+    The simulations are either given directly, as 'simulations', or are
+    built by calling 'builder(**params)' for each entry of 'parameters'.
+    'parameters' is either a list of keyword-argument dictionaries, or a
+    dictionary mapping each keyword to a list of values, in which case
+    every combination is simulated.
+
+    Each task gets its own random seed, 'random_seed + task.index', which is
+    set before the builder is called and is used for the simulation, so
+    that results do not depend on the order in which tasks finish. The
+    global random state is restored after each builder call. Up to
+    'n_workers' simulations are run at once, (by default, one per cpu).
+    Simulations whose results already exist on disk are loaded rather than
+    re-run, as with Simulation.run().
+    """
+
+    def __init__(self, environment, simulations=None, builder=None, parameters=None, n_workers=None, random_seed=None):
+        if (simulations is None) == (builder is None):
+            raise ValueError('Either simulations or a builder should be given to SimulationBatch')
+        if builder is not None and parameters is None:
+            raise ValueError('A builder needs parameters')
+
+        self.environment = environment
+        self.n_workers = n_workers or SettingsMgr.get_simulation_worker_pool_size()
+        self.random_seed = (random_seed if random_seed is not None else MFRandom.get_seed())
+        self.builder = builder
+
+        if simulations is not None:
+            self.tasks = [SimulationBatchTask(index=i, random_seed=self.random_seed + i, simulation=sim) for (i, sim) in enumerate(simulations)]
+        else:
+            self.tasks = [SimulationBatchTask(index=i, random_seed=self.random_seed + i, parameters=params) for (i, params) in enumerate(self._expand_parameters(parameters))]
+
+    @classmethod
+    def _expand_parameters(cls, parameters):
+        if isinstance(parameters, dict):
+            keys = sorted(parameters.keys())
+            return [dict(zip(keys, values)) for values in itertools.product(*[parameters[k] for k in keys])]
+        return list(parameters)
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def _build_tasks(self):
+        # Simulations are built serially in the calling thread, since
+        # building can depend on the global random state. The caller's
+        # random state is left as it was:
+        for task in self.tasks:
+            if task.simulation is None:
+                random_state = MFRandom.get_state()
+                try:
+                    MFRandom.seed(task.random_seed)
+                    task.simulation = self.builder(**task.parameters)
+                finally:
+                    MFRandom.set_state(random_state)
+
+    @classmethod
+    def _run_task(cls, task):
+        return (task, task.simulation.run(random_seed=task.random_seed))
+
+    def iter_results(self):
+        """Yields (task, SimulationResult) tuples, as the simulations finish"""
+
+        self._build_tasks()
+        self.environment.prepare_for_parallel_runs()
+
+        pool = ThreadPool(processes=self.n_workers)
+        try:
+            for (task, result) in pool.imap_unordered(self._run_task, self.tasks):
+                yield (task, result)
+        finally:
+            pool.terminate()
+
+    def run(self):
+        """Returns a list of the SimulationResults, in the order of the tasks"""
+
+        results = [None] * len(self.tasks)
+        for (task, result) in self.iter_results():
+            results[task.index] = result
+        return results
@@ -60,4 +60,13 @@ class SimulationEnvironment(object):
     def SimulationSettings(self, **kwargs):
         raise NotImplementedError()
 
+    def prepare_for_parallel_runs(self):
+        """Called once before simulations are run from several threads, so
+        that any process-wide setup is done before the threads start."""
+        pass
+
+    def SimulationBatch(self, **kwargs):
+        from morphforge.simulation.base.core.simulationbatch import SimulationBatch
+        return SimulationBatch(environment=self, **kwargs)
+
 
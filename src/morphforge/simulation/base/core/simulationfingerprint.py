@@ -0,0 +1,201 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+"""Canonical fingerprints of simulations.
+
+Pickles are not canonical: the same simulation can pickle differently
+depending on dictionary ordering, memo references and so on, and pickling
+a large simulation just to take its md5sum is slow. Instead, the
+fingerprint is an md5sum built by walking the object graph in a fixed
+order:
+
+ * numpy arrays (including quantities) are hashed from their raw data,
+   dtype, shape and units.
+ * dictionaries and sets are hashed in the order of their (hashed) keys.
+ * objects are hashed from their class and ``__getstate__()`` (or
+   ``__dict__``). Classes can override this by defining
+   ``_fingerprint_state()``, for example to leave out cached values, or to
+   describe a morphology by its arrays rather than by each Section.
+ * objects reached more than once are only hashed the first time, so
+   reference cycles are handled.
+
+Dictionary keys and set members which are not primitives are ordered by
+the md5sum of their own object graph, which is calculated once per object.
+Objects which share a large graph, (such as the Sections of a morphology),
+can define ``_fingerprint_sort_key()`` to return something cheaper to
+order by.
+"""
+
+import types
+import hashlib
+import cPickle
+import numpy as np
+
+# The hasher calls _fingerprint_state() on other classes:
+# pylint: disable=W0212
+
+
+_primitive_types = (types.NoneType, bool, int, long, float, str, unicode)
+
+
+class _FingerprintHasher(object):
+
+    def __init__(self):
+        self._md5 = hashlib.md5()
+        self._memo = {}
+
+        # Objects returned by _fingerprint_state() and __getstate__() can be
+        # temporaries, so we keep them alive to stop their ids being reused:
+        self._keep_alive = []
+
+        # The sort keys of dictionary keys and set members, by id:
+        self._sort_keys = {}
+
+    def hexdigest(self):
+        return self._md5.hexdigest()
+
+    def _write(self, *args):
+        for arg in args:
+            self._md5.update(arg)
+            self._md5.update('\0')
+
+    def _get_sort_key(self, obj):
+        if isinstance(obj, _primitive_types):
+            return (0, type(obj).__name__, repr(obj))
+        if isinstance(obj, tuple):
+            return (1, tuple([self._get_sort_key(value) for value in obj]))
+
+        obj_id = id(obj)
+        if obj_id in self._sort_keys:
+            return self._sort_keys[obj_id]
+
+        if hasattr(obj, '_fingerprint_sort_key'):
+            cls = obj.__class__
+            cheap_key = obj._fingerprint_sort_key()
+            self._keep_alive.append(cheap_key)
+            sort_key = (2, cls.__module__, cls.__name__, self._get_sort_key(cheap_key))
+        else:
+            hasher = _FingerprintHasher()
+            hasher.update(obj)
+            sort_key = (3, hasher.hexdigest())
+
+        self._keep_alive.append(obj)
+        self._sort_keys[obj_id] = sort_key
+        return sort_key
+
+    def update(self, obj):
+        if isinstance(obj, _primitive_types):
+            self._write(type(obj).__name__, repr(obj))
+            return
+
+        if isinstance(obj, (type, types.ClassType, types.FunctionType, types.BuiltinFunctionType, types.ModuleType)):
+            self._write('G', getattr(obj, '__module__', None) or '', obj.__name__)
+            return
+
+        # Objects seen before:
+        obj_id = id(obj)
+        if obj_id in self._memo:
+            self._write('R', str(self._memo[obj_id]))
+            return
+        self._memo[obj_id] = len(self._memo)
+        self._keep_alive.append(obj)
+
+        if isinstance(obj, np.ndarray):
+            data = np.ascontiguousarray(obj)
+            dimensionality = getattr(obj, 'dimensionality', None)
+            self._write('A', type(obj).__name__, data.dtype.str, repr(data.shape), str(dimensionality) if dimensionality is not None else '')
+            if data.dtype.hasobject:
+                for value in data.ravel():
+                    self.update(value)
+            else:
+                self._md5.update(data.data)
+            return
+
+        if isinstance(obj, np.generic):
+            self._write('S', obj.dtype.str, obj.tostring())
+            return
+
+        if isinstance(obj, (list, tuple)):
+            self._write('L' if isinstance(obj, list) else 'T', str(len(obj)))
+            for value in obj:
+                self.update(value)
+            return
+
+        if isinstance(obj, dict):
+            self._write('D', str(len(obj)))
+            for (_sort_key, key, value) in sorted([(self._get_sort_key(k), k, v) for (k, v) in obj.iteritems()], key=lambda item: item[0]):
+                self.update(key)
+                self.update(value)
+            return
+
+        if isinstance(obj, (set, frozenset)):
+            self._write('E', str(len(obj)))
+            for (_sort_key, value) in sorted([(self._get_sort_key(v), v) for v in obj], key=lambda item: item[0]):
+                self.update(value)
+            return
+
+        if isinstance(obj, types.MethodType):
+            self._write('M', obj.__name__)
+            self.update(obj.im_self if obj.im_self is not None else obj.im_class)
+            return
+
+        # General objects:
+        cls = obj.__class__
+        self._write('O', cls.__module__, cls.__name__)
+        if hasattr(obj, '_fingerprint_state'):
+            state = obj._fingerprint_state()
+        elif hasattr(obj, '__getstate__'):
+            state = obj.__getstate__()
+        elif hasattr(obj, '__dict__'):
+            state = obj.__dict__
+        else:
+            # Anything else should at least be picklable:
+            self._write('P', cPickle.dumps(obj, cPickle.HIGHEST_PROTOCOL))
+            return
+
+        self._keep_alive.append(state)
+        self.update(state)
+
+
+class SimulationFingerprint(object):
+
+    @classmethod
+    def get_md5(cls, obj, random_seed=None):
+        """Returns a canonical md5sum of 'obj' (normally a Simulation). If
+        'random_seed' is given, it is included, so that runs of the same
+        simulation with different seeds get different fingerprints."""
+
+        hasher = _FingerprintHasher()
+        hasher.update(obj)
+        if random_seed is not None:
+            hasher.update(random_seed)
+        return hasher.hexdigest()
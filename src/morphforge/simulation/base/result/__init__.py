@@ -30,6 +30,7 @@
 # ----------------------------------------------------------------------
 
 from simulationresult import SimulationResult
+from simulationresultcache import SimulationResultCache
 
-__all__ = ['SimulationResult']
+__all__ = ['SimulationResult', 'SimulationResultCache']
 
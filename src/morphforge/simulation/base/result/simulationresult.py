@@ -29,6 +29,14 @@
 #  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------
 
+
+import os
+import json
+import shutil
+import cPickle
+import numpy as np
+import quantities as pq
+
 from morphforge.core import LocMgr, FileIO
 from morphforge.core.misc import SeqUtils
 import pickle
@@ -39,11 +47,38 @@ class SimulationResult(object):
     """ traces is a list of trace Objects"""
 
     def __init__(self, traces, simulation):
-        self.traces = traces
+        self._traces = traces
         self.simulation = simulation
         self.t_start = None
         self.t_stop = None
 
+        # Results loaded from a columnar directory only load each trace when
+        # it is first needed:
+        self._trace_loader = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_traces'] = self.traces
+        state['_trace_loader'] = None
+        return state
+
+    def __setstate__(self, state):
+        # (Older pickles store the list of traces as 'traces'):
+        if 'traces' in state:
+            state['_traces'] = state.pop('traces')
+        state.setdefault('_trace_loader', None)
+        self.__dict__.update(state)
+
+    @property
+    def traces(self):
+        if self._traces is None:
+            self._traces = [self._trace_loader.get_trace(name) for name in self._trace_loader.get_trace_names()]
+        return self._traces
+
+    @traces.setter
+    def traces(self, traces):
+        self._traces = traces
+
     @property
     def hocfilename(self):
         return self.simulation.hocfilename
@@ -55,6 +90,8 @@ class SimulationResult(object):
     def get_trace(self, obj):
         # Get the results by string:
         if isinstance(obj, basestring):
+            if self._traces is None:
+                return self._trace_loader.get_trace(obj)
             return SeqUtils.filter_expect_single( self.traces, lambda s: s.name == obj)
 
         # Get the results by Recordable object:
@@ -65,6 +102,27 @@ class SimulationResult(object):
     def get_traces(self):
         return self.traces
 
+    def simplify_traces(self, epsilon, chunk_size=None):
+        """Returns a new SimulationResult, in which the point-based traces
+        are simplified with 'convert_to_variable' (Douglas-Peucker), for
+        example to reduce the size of results before they are saved.
+
+        'epsilon' is either a single tolerance, or a dictionary of
+        tolerances keyed on trace name; traces that are not in the
+        dictionary are not simplified."""
+        from morphforge.traces import TracePointBased
+
+        traces = []
+        for trace in self.traces:
+            trace_epsilon = epsilon.get(trace.name, None) if isinstance(epsilon, dict) else epsilon
+            if trace_epsilon is not None and isinstance(trace, TracePointBased):
+                trace = trace.convert_to_variable(trace_epsilon, chunk_size=chunk_size)
+            traces.append(trace)
+
+        result = SimulationResult(traces=traces, simulation=self.simulation)
+        result.set_simulation_time(self.t_start, self.t_stop)
+        return result
+
     # Loading & Saving:
     def save_to_file(self, filename):
         res_string = pickle.dumps(self)
@@ -75,6 +133,153 @@ class SimulationResult(object):
 
     @classmethod
     def load_from_file(cls, filename):
+        if os.path.isdir(filename):
+            return cls.load_from_directory(filename)
         return pickle.load(open(filename))
 
+    def save_to_directory(self, dirname):
+        """Saves the result in a columnar format, (see _ColumnarTraceStore),
+        which can be loaded lazily. The simulation is not saved."""
+        _ColumnarTraceStore.save(dirname, self)
+        return dirname
+
+    @classmethod
+    def load_from_directory(cls, dirname):
+        """Loads a result written by 'save_to_directory'. The traces are
+        memory-mapped, and each is only loaded when it is first used."""
+        loader = _ColumnarTraceStore(dirname)
+        result = SimulationResult(traces=None, simulation=None)
+        result._trace_loader = loader
+        (result.t_start, result.t_stop) = loader.get_simulation_time()
+        return result
+
+
+class _ColumnarTraceStore(object):
+    """A directory holding one .npy file for the data of each trace, and one
+    for each distinct time vector, (all the traces recorded from the same
+    simulation normally share a time vector). A json manifest holds the
+    names, units, tags and comments of the traces. Traces that are not
+    point-based are pickled together into a single file."""
+
+    _format_version = 1
+    _manifest_filename = 'manifest.json'
+    _other_traces_filename = 'other_traces.pickle'
+
+    def __init__(self, dirname):
+        self.dirname = dirname
+        with open(os.path.join(dirname, self._manifest_filename)) as fobj:
+            self.manifest = json.load(fobj)
+        if self.manifest['format_version'] != self._format_version:
+            raise ValueError('Unsupported result format: %s' % self.manifest['format_version'])
+
+        self._trace_entries = dict([(entry['name'], entry) for entry in self.manifest['traces']])
+        self._time_vectors = {}
+        self._other_traces = None
+
+        # Each trace is only built once, so repeated requests return the
+        # same object:
+        self._traces = {}
+
+    def get_simulation_time(self):
+        return (self.manifest['t_start'], self.manifest['t_stop'])
+
+    def get_trace_names(self):
+        return [entry['name'] for entry in self.manifest['traces']]
+
+    def _load_array(self, entry):
+        data = np.load(os.path.join(self.dirname, entry['filename']), mmap_mode='r')
+        return pq.Quantity(data, entry['units'], copy=False)
+
+    def _get_time_vector(self, index):
+        if not index in self._time_vectors:
+            self._time_vectors[index] = self._load_array(self.manifest['time_vectors'][index])
+        return self._time_vectors[index]
+
+    def get_trace(self, name):
+        if not name in self._traces:
+            self._traces[name] = self._build_trace(name)
+        return self._traces[name]
+
+    def _build_trace(self, name):
+        from morphforge.traces import TraceFixedDT, TraceVariableDT
+        if not name in self._trace_entries:
+            raise ValueError('No trace called: %s' % name)
+        entry = self._trace_entries[name]
+
+        if entry['type'] == 'other':
+            if self._other_traces is None:
+                with open(os.path.join(self.dirname, self._other_traces_filename), 'rb') as fobj:
+                    self._other_traces = cPickle.load(fobj)
+            return self._other_traces[entry['index']]
+
+        trace_type = {'TraceFixedDT': TraceFixedDT, 'TraceVariableDT': TraceVariableDT}[entry['type']]
+        return trace_type(time=self._get_time_vector(entry['time_vector']),
+                          data=self._load_array(entry),
+                          name=str(entry['name']),
+                          comment=entry['comment'],
+                          tags=[str(tag) for tag in entry['tags']])
+
+    @classmethod
+    def save(cls, dirname, result):
+        from morphforge.traces import TraceFixedDT, TraceVariableDT
+
+        # Traces are looked up by name when they are loaded:
+        names = [trace.name for trace in result.traces]
+        duplicates = sorted(set([name for name in names if names.count(name) > 1]))
+        if duplicates:
+            raise ValueError('Unable to save traces with duplicate names: %s' % ', '.join(duplicates))
+
+        # Write to a temporary directory, then rename it into place, so that
+        # other processes never see partially written results:
+        tmp_dir = LocMgr.get_temporary_filename(suffix='_results', filedirectory=os.path.dirname(os.path.abspath(dirname)))
+        os.makedirs(tmp_dir)
+
+        def save_array(filename, array):
+            np.save(os.path.join(tmp_dir, filename), array.magnitude)
+            return {'filename': filename, 'units': str(array.dimensionality)}
+
+        time_vectors = []
+        time_vector_arrays = []
+        trace_entries = []
+        other_traces = []
+        for (index, trace) in enumerate(result.traces):
+            if type(trace) not in (TraceFixedDT, TraceVariableDT):
+                trace_entries.append({'name': trace.name, 'type': 'other', 'index': len(other_traces)})
+                other_traces.append(trace)
+                continue
+
+            # Share time vectors between traces:
+            time = trace.time_pts
+            for (time_index, existing) in enumerate(time_vector_arrays):
+                if existing is time or (existing.shape == time.shape and existing.dimensionality == time.dimensionality and np.array_equal(existing.magnitude, time.magnitude)):
+                    break
+            else:
+                time_index = len(time_vector_arrays)
+                time_vector_arrays.append(time)
+                time_vectors.append(save_array('time%d.npy' % time_index, time))
+
+            entry = save_array('trace%d.npy' % index, trace.data_pts)
+            entry.update({'name': trace.name,
+                          'type': type(trace).__name__,
+                          'comment': trace.comment,
+                          'tags': list(trace.tags),
+                          'time_vector': time_index})
+            trace_entries.append(entry)
+
+        if other_traces:
+            with open(os.path.join(tmp_dir, cls._other_traces_filename), 'wb') as fobj:
+                cPickle.dump(other_traces, fobj, cPickle.HIGHEST_PROTOCOL)
+
+        manifest = {'format_version': cls._format_version,
+                    't_start': result.t_start,
+                    't_stop': result.t_stop,
+                    'time_vectors': time_vectors,
+                    'traces': trace_entries}
+        with open(os.path.join(tmp_dir, cls._manifest_filename), 'w') as fobj:
+            json.dump(manifest, fobj)
 
+        try:
+            os.rename(tmp_dir, dirname)
+        except OSError:
+            # Another process got there first:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,129 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+import os
+import shutil
+
+from morphforge.core.mgrs import LocMgr, SettingsMgr
+
+
+class SimulationResultCache(object):
+    """The results of spawned simulations, keyed on the fingerprint of the
+    simulation (see SimulationFingerprint).
+
+    Entries are stored in ``LocMgr.get_simulation_results_tmp_dir()``. Each
+    lookup that finds an entry marks it as recently used, and the least
+    recently used entries are removed when the cache grows larger than
+    ``SettingsMgr.get_simulation_result_cache_max_bytes()``.
+    """
+
+    ressuffix = '.neuronsim.results'
+
+    @classmethod
+    def get_result_filename(cls, fingerprint):
+        result_dir = LocMgr.ensure_dir_exists(os.path.join(LocMgr.get_simulation_results_tmp_dir(), fingerprint[:2]))
+        return os.path.join(result_dir, fingerprint + cls.ressuffix)
+
+    @classmethod
+    def lookup(cls, fingerprint):
+        """Returns the filename of the results for 'fingerprint', or None if
+        they are not in the cache"""
+
+        result_filename = cls.get_result_filename(fingerprint)
+        if not os.path.exists(result_filename):
+            return None
+
+        # Mark the entry as recently used:
+        try:
+            os.utime(result_filename, None)
+        except OSError:
+            # Evicted by another process:
+            return None
+        return result_filename
+
+    # Eviction:
+    @classmethod
+    def _get_entry_size(cls, result_filename):
+        if not os.path.isdir(result_filename):
+            return os.path.getsize(result_filename)
+        size = 0
+        for (dirpath, _dirnames, filenames) in os.walk(result_filename):
+            size += sum([os.path.getsize(os.path.join(dirpath, f)) for f in filenames])
+        return size
+
+    @classmethod
+    def _get_entries(cls):
+        """Returns a list of (last-used-time, size, result_filename)"""
+
+        results_dir = LocMgr.get_simulation_results_tmp_dir()
+        entries = []
+        for subdir in os.listdir(results_dir):
+            subdir = os.path.join(results_dir, subdir)
+            if not os.path.isdir(subdir):
+                continue
+            for filename in os.listdir(subdir):
+                if not filename.endswith(cls.ressuffix):
+                    continue
+                result_filename = os.path.join(subdir, filename)
+                try:
+                    entries.append((os.path.getmtime(result_filename), cls._get_entry_size(result_filename), result_filename))
+                except OSError:
+                    # Removed by another process:
+                    continue
+        return entries
+
+    @classmethod
+    def evict(cls, max_bytes=None):
+        """Removes the least-recently used entries until the cache is no
+        larger than `max_bytes`."""
+
+        if max_bytes is None:
+            max_bytes = SettingsMgr.get_simulation_result_cache_max_bytes()
+
+        entries = sorted(cls._get_entries())
+        total_size = sum([size for (_mtime, size, _result_filename) in entries])
+        for (_mtime, size, result_filename) in entries:
+            if total_size <= max_bytes:
+                break
+            try:
+                if os.path.isdir(result_filename):
+                    shutil.rmtree(result_filename)
+                else:
+                    os.unlink(result_filename)
+            except OSError:
+                pass
+            total_size -= size
+
+    @classmethod
+    def clear(cls):
+        """Removes all entries from the cache"""
+        cls.evict(max_bytes=0)
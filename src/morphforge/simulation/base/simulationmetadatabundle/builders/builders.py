@@ -35,7 +35,9 @@ import morphforge
 from morphforge.core import FileIO, LocMgr, Join
 from morphforge.core.misc import StrUtils
 from morphforge.simulation.base.simulationmetadatabundle import SimMetaDataBundle
-from morphforge.simulation.base.simulationmetadatabundle.postsimulation import PostSimulationActionPickleSimulation
+from morphforge.simulation.base.core.simulationfingerprint import SimulationFingerprint
+from morphforge.simulation.base.result import SimulationResultCache
+from morphforge.simulation.base.simulationmetadatabundle.postsimulation import PostSimulationActionSaveResultColumnar
 
 
 class MetaDataBundleBuilder(object):
@@ -46,38 +48,45 @@ class MetaDataBundleBuilder(object):
     """
 
     simsuffix = '.neuronsim.pickle'
-    ressuffix = '.neuronsim.results.pickle'
+    ressuffix = '.neuronsim.results'
 
     @classmethod
-    def build_std_pickler(cls, sim):
+    def build_std_pickler(cls, sim, random_seed=None, progress_dirname=None, simmd5sum=None):
+        """'simmd5sum' is the SimulationFingerprint of 'sim' and
+        'random_seed', if the caller has already computed it."""
 
-        reslocation = LocMgr.get_simulation_results_tmp_dir()
-
-        bundle = MetaDataBundleBuilder.prepare_sim_bundle(sim)
         # Save the random number seed
-        bundle.random_seed = morphforge.core.mfrandom.MFRandom.get_seed()
-        md5sum = bundle.get_sim_md5sum()
-        resfilename = Join(reslocation, '%s/' % md5sum[:2]+'/', md5sum
-                           + cls.ressuffix)
+        if random_seed is None:
+            random_seed = morphforge.core.mfrandom.MFRandom.get_seed()
+        if simmd5sum is None:
+            simmd5sum = SimulationFingerprint.get_md5(sim, random_seed=random_seed)
+
+        bundle = MetaDataBundleBuilder.prepare_sim_bundle(sim, simmd5sum=simmd5sum)
+        bundle.random_seed = random_seed
+        bundle.progress_dirname = progress_dirname
+        resfilename = SimulationResultCache.get_result_filename(bundle.get_sim_md5sum())
 
-        # Save the results to pickle file:
-        bundle.add_postprocessing_action(PostSimulationActionPickleSimulation(resfilename))
+        # Save the traces of the result, (one .npy per trace):
+        bundle.add_postprocessing_action(PostSimulationActionSaveResultColumnar(resfilename))
 
         return (bundle, resfilename)
 
     @classmethod
-    def prepare_sim_bundle(cls, sim):
+    def prepare_sim_bundle(cls, sim, simmd5sum=None):
+        """The bundle is keyed on 'simmd5sum', (the SimulationFingerprint of
+        'sim' by default); the md5sum of the pickle only names the file that
+        the simulation is written to."""
 
         simstring = cPickle.dumps(sim)
-        simmd5sum = StrUtils.get_hash_md5(simstring)
+        pickle_md5sum = StrUtils.get_hash_md5(simstring)
 
-        simloc = LocMgr.get_simulation_tmp_dir() + simmd5sum[0:2]
+        simloc = LocMgr.get_simulation_tmp_dir() + pickle_md5sum[0:2]
         simloc = LocMgr.ensure_dir_exists(simloc)
-        simfilename = Join(simloc, simmd5sum + cls.simsuffix)
+        simfilename = Join(simloc, pickle_md5sum + cls.simsuffix)
 
         FileIO.write_to_file(txt=simstring, filename=simfilename)
 
-        bundle = SimMetaDataBundle(sim)
+        bundle = SimMetaDataBundle(sim, simmd5sum=simmd5sum)
         return bundle
 
 
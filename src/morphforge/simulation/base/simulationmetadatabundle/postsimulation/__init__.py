@@ -31,6 +31,8 @@
 
 from postsimulationaction import PostSimulationAction
 from postsimulationaction import PostSimulationActionPickleSimulation
+from postsimulationaction import PostSimulationActionSaveResultColumnar
 
 __all__ = ['PostSimulationAction',
-           'PostSimulationActionPickleSimulation']
+           'PostSimulationActionPickleSimulation',
+           'PostSimulationActionSaveResultColumnar']
@@ -53,3 +53,13 @@ class PostSimulationActionPickleSimulation(object):
         FileIO.write_to_file(txt=resstring, filename=filename)
 
 
+class PostSimulationActionSaveResultColumnar(object):
+    """Saves the traces of the result into a directory, with one .npy file
+    per trace, (see SimulationResult.save_to_directory)"""
+
+    def __init__(self, dirname=None):
+        self.dirname = dirname
+        assert self.dirname
+
+    def __call__(self, result, bundle):
+        result.save_to_directory(self.dirname)
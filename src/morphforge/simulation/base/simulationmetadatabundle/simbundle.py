@@ -34,7 +34,7 @@ import cPickle
 
 from morphforge.core import FileIO
 from morphforge.core import LocMgr
-from morphforge.core.misc import StrUtils
+from morphforge.simulation.base.core.simulationfingerprint import SimulationFingerprint
 
 
 # This class is a work around for the circular loop caused by not being
@@ -42,10 +42,10 @@ from morphforge.core.misc import StrUtils
 
 class SimMetaDataBundleBase(object):
 
-    def __init__(self, sim):
+    def __init__(self, sim, simmd5sum=None):
         super(SimMetaDataBundleBase, self).__init__()
         self.sim = sim
-        self.simmd5sum = StrUtils.get_hash_md5(cPickle.dumps(sim))
+        self.simmd5sum = (simmd5sum if simmd5sum is not None else SimulationFingerprint.get_md5(sim))
         self.postsimulationactions = []
 
     def add_postprocessing_action(self, action):
@@ -70,10 +70,12 @@ class SimMetaDataBundleBase(object):
 
 class SimMetaDataBundle(SimMetaDataBundleBase):
 
-    def __init__(self, sim):
-        super(SimMetaDataBundle, self).__init__(sim=sim)
+    def __init__(self, sim, simmd5sum=None):
+        super(SimMetaDataBundle, self).__init__(sim=sim, simmd5sum=simmd5sum)
         self.metadata = {}
         self.random_seed = None
+        # Where the simulation should report its progress, (if anywhere):
+        self.progress_dirname = None
 
     def _write_to_file(self, bundlefilename=None):
         bundleloc = LocMgr.get_simulation_tmp_dir()
@@ -62,6 +62,19 @@ class NEURONChl_Base(object):
     def get_mod_file_changeables(self):
         raise NotImplementedError()
 
+    def build_hoc_sections(self, cell, sections, hocfile_obj, mta):
+        # Mechanisms can override this to write many sections in one go:
+        for section in sections:
+            self.build_hoc_section(cell=cell, section=section, hocfile_obj=hocfile_obj, mta=mta)
+
+    def supports_nrn_build(self):
+        # Mechanisms which implement build_nrn_section() return True: see
+        # NEURONObject.supports_nrn_build()
+        return False
+
+    def build_nrn_section(self, cell, section, nrnbuild_obj, mta):
+        raise NotImplementedError()
+
 
 
 
@@ -30,8 +30,11 @@
 # ----------------------------------------------------------------------
 
 import os
+import fcntl
 import subprocess
 import shutil
+import tempfile
+import contextlib
 
 from morphforge.core import FileIO, LocMgr, LogMgr
 from morphforge.core import RCMgr as RCReader
@@ -44,6 +47,7 @@ class ModBuilderParams(object):
     nocmodlpath = RCReader.get('Neuron', 'nocmodlpath')
     libtoolpath = RCReader.get('Neuron', 'libtoolpath')
 
+    # Relative include paths are relative to the mod build directory:
     compile_includes = ['.', '..'] + \
                       RCReader.get('Neuron', 'compileincludes').split(':')
 
@@ -73,8 +77,17 @@ class ModBuilderParams(object):
     modlunitpath = RCReader.get('Neuron', 'modlunitpath')
 
     @classmethod
-    def get_compile_str(cls, c_filename, lo_filename, additional_compile_flags=''):
-        incl_str = ' '.join(["""-I"%s" """ % _incl for _incl in cls.compile_includes])
+    def get_compile_includes(cls, base_dir):
+        """Returns the include paths as absolute paths. (The tools are run in
+        a temporary subdirectory of 'base_dir', so relative paths would no
+        longer point at the same place)."""
+        return [os.path.abspath(os.path.join(base_dir, _incl)) for _incl in cls.compile_includes]
+
+    @classmethod
+    def get_compile_str(cls, c_filename, lo_filename, additional_compile_flags='', compile_includes=None):
+        if compile_includes is None:
+            compile_includes = cls.compile_includes
+        incl_str = ' '.join(["""-I"%s" """ % _incl for _incl in compile_includes])
         def_str = ' '.join(["""-D%s """ % _def for _def in cls.compile_defs])
         variables = {'lo': lo_filename, 'c': c_filename, 'incs': incl_str, 'defs': def_str, 'additional_flags': additional_compile_flags}
         return """--mode=compile gcc %(defs)s  %(incs)s %(additional_flags)s  -g -O2 -c -o %(lo)s %(c)s  """ % variables
@@ -103,10 +116,11 @@ class ModBuilderParams(object):
 
 
 
-def _simple_exec(cmd, remaining):
+def _simple_exec(cmd, remaining, cwd=None):
     print 'Executing: %s %s' % (cmd, remaining)
     output = subprocess.Popen([cmd + ' ' + remaining],
                               shell=True,
+                              cwd=cwd,
                               stdout=subprocess.PIPE,
                               stderr=subprocess.PIPE).communicate()[0]
     if SettingsMgr.simulator_is_verbose():
@@ -114,15 +128,20 @@ def _simple_exec(cmd, remaining):
     return output
 
 
-def _build_modfile_local(mod_filename_short, modfile=None):
-    print os.getcwd()
+def _build_modfile_local(mod_filename_short, build_dir, modfile=None, compile_includes=None):
+    # The tools are run with 'build_dir' as their working directory, (rather
+    # than changing the working directory of the whole process), so
+    # several modfiles can be built at once in different directories:
     mod_file_basename = mod_filename_short.replace('.mod', '')
     c_filename = mod_file_basename + '.c'
     la_filename = mod_file_basename + '.la'
     lo_filename = mod_file_basename + '.lo'
     so_filename = mod_file_basename + '.so'
 
-    libs_dir = '.libs/'
+    def in_build_dir(filename):
+        return os.path.join(build_dir, filename)
+
+    libs_dir = in_build_dir('.libs/')
 
     # Check for some existing files:
 
@@ -132,9 +151,9 @@ def _build_modfile_local(mod_filename_short, modfile=None):
     #        LocMgr.BackupDirectory(gen_file)
 
     c_filename = mod_file_basename + '.c'
-    output = _simple_exec(ModBuilderParams.nocmodlpath, mod_filename_short)
+    output = _simple_exec(ModBuilderParams.nocmodlpath, mod_filename_short, cwd=build_dir)
 
-    if not os.path.exists(c_filename):
+    if not os.path.exists(in_build_dir(c_filename)):
         print 'Failed to compile modfile. Error:'
         print output, '\n'
         assert False
@@ -143,7 +162,7 @@ def _build_modfile_local(mod_filename_short, modfile=None):
 
     new_register_func = """\n modl_reg(){ _%s_reg(); }""" \
         % mod_file_basename
-    FileIO.append_to_file(new_register_func, c_filename)
+    FileIO.append_to_file(new_register_func, in_build_dir(c_filename))
 
     # Compile the .c file -> .so:
     compile_str = ModBuilderParams.get_compile_str(c_filename, lo_filename)
@@ -156,8 +175,8 @@ def _build_modfile_local(mod_filename_short, modfile=None):
 
     compile_flags = modfile.additional_compile_flags if modfile else ''
     link_flags = modfile.additional_link_flags if modfile else ''
-    op1 = _simple_exec(ModBuilderParams.libtoolpath, ModBuilderParams.get_compile_str(c_filename, lo_filename, additional_compile_flags=compile_flags))
-    op2 = _simple_exec(ModBuilderParams.libtoolpath, ModBuilderParams.get_link_str(lo_filename, la_filename, additional_link_flags=link_flags))
+    op1 = _simple_exec(ModBuilderParams.libtoolpath, ModBuilderParams.get_compile_str(c_filename, lo_filename, additional_compile_flags=compile_flags, compile_includes=compile_includes), cwd=build_dir)
+    op2 = _simple_exec(ModBuilderParams.libtoolpath, ModBuilderParams.get_link_str(lo_filename, la_filename, additional_link_flags=link_flags), cwd=build_dir)
 
     if SettingsMgr.simulator_is_verbose() or True:
         print 'OP1:', op1
@@ -166,15 +185,15 @@ def _build_modfile_local(mod_filename_short, modfile=None):
     # Copy the correct .so from the libDir to the build_dir:
     shutil.move(
         os.path.join(libs_dir, mod_file_basename + '.so.0.0.0'),
-        so_filename)
+        in_build_dir(so_filename))
 
 
     # Clean up:
     if True:
-        os.remove(c_filename)
-        os.remove(mod_filename_short)
+        os.remove(in_build_dir(c_filename))
+        os.remove(in_build_dir(mod_filename_short))
         for ext in ['.la', '.lo']:
-            os.remove(mod_file_basename + ext)
+            os.remove(in_build_dir(mod_file_basename + ext))
         for ext in ['.la', '.lai', '.o', '.so', '.so.0']:
             os.remove(os.path.join(libs_dir, mod_file_basename + ext))
         os.rmdir(libs_dir)
@@ -186,7 +205,12 @@ def _build_modfile_local(mod_filename_short, modfile=None):
 
 def _build_mod_file(modfilename, output_dir=None, build_dir=None, modfile=None):
 
-    build_dir = LocMgr().get_default_mod_builddir() if not build_dir else build_dir
+    # Each build gets its own directory, so that concurrent builds do not
+    # see each other's intermediate files. The include paths are resolved
+    # first, so they are relative to the shared build directory:
+    base_build_dir = LocMgr().get_default_mod_builddir() if not build_dir else build_dir
+    compile_includes = ModBuilderParams.get_compile_includes(base_build_dir)
+    build_dir = tempfile.mkdtemp(dir=base_build_dir)
     output_dir = LocMgr().get_default_mod_outdir() if not output_dir else output_dir
 
     if SettingsMgr.simulator_is_verbose():
@@ -194,26 +218,48 @@ def _build_mod_file(modfilename, output_dir=None, build_dir=None, modfile=None):
 
     modfilenamebase = os.path.basename(modfilename)
     sofilenamebase = modfilenamebase.replace('.mod', '.so')
-
-    shutil.copyfile(
-        modfilename, 
-        os.path.join(build_dir, modfilenamebase))
-
     so_filename_output = os.path.join(output_dir, sofilenamebase)
 
-    # Move to new directory to build:
-    initial_cwd = os.getcwd()
-    os.chdir(build_dir)
-    so_filename_build_short = _build_modfile_local(mod_filename_short=modfilenamebase, modfile=modfile)
-    os.chdir(initial_cwd)
+    # (The build directory is removed, even if the build fails):
+    try:
+        shutil.copyfile(
+            modfilename, 
+            os.path.join(build_dir, modfilenamebase))
 
-    # CopyFile to output cell_location:
-    so_filename_build = os.path.join(build_dir, so_filename_build_short)
-    if so_filename_build != so_filename_output:
-        shutil.move(so_filename_build, so_filename_output)
+        so_filename_build_short = _build_modfile_local(mod_filename_short=modfilenamebase, build_dir=build_dir, modfile=modfile, compile_includes=[build_dir] + compile_includes)
+
+        # CopyFile to output cell_location:
+        so_filename_build = os.path.join(build_dir, so_filename_build_short)
+        if so_filename_build != so_filename_output:
+            shutil.move(so_filename_build, so_filename_output)
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
     return so_filename_output
 
 
+@contextlib.contextmanager
+def _file_lock(filename):
+    # An exclusive lock, which is shared between processes. The lock-file
+    # is removed before the lock is released, so anyone who was waiting on
+    # the old file will find that it has gone, and try again:
+    while True:
+        lock_file = open(filename, 'a')
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            if os.stat(filename).st_ino == os.fstat(lock_file.fileno()).st_ino:
+                break
+        except OSError:
+            pass
+        lock_file.close()
+
+    try:
+        yield
+    finally:
+        os.remove(filename)
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        lock_file.close()
+
+
 class ModFileCompiler(object):
 
     @classmethod
@@ -240,17 +286,24 @@ class ModFileCompiler(object):
     def build_modfile(cls, modfile):
         output_filename = modfile.get_built_filename_full(ensure_built=False)
 
-        if not os.path.exists(output_filename):
-            LogMgr.info('Does not exist: building: %s'
-                        % output_filename)
-
-            mod_txt_filename = FileIO.write_to_file(modfile.modtxt, suffix='.mod')
-            ModFileCompiler.check_modfile_units(mod_txt_filename)
-            mod_dyn_filename = _build_mod_file(mod_txt_filename, modfile=modfile)
-            shutil.move(mod_dyn_filename, output_filename)
-        else:
-
+        if os.path.exists(output_filename):
             LogMgr.info('Already Built')
+            return output_filename
+
+        # Another process (or thread) may be building the same modfile, so
+        # we check again once we hold the lock. The .so is moved into place
+        # in a single step, so it is never seen half-written:
+        with _file_lock(output_filename + '.lock'):
+            if not os.path.exists(output_filename):
+                LogMgr.info('Does not exist: building: %s'
+                            % output_filename)
+
+                mod_txt_filename = FileIO.write_to_file(modfile.modtxt, suffix='.mod')
+                ModFileCompiler.check_modfile_units(mod_txt_filename)
+                mod_dyn_filename = _build_mod_file(mod_txt_filename, modfile=modfile)
+                os.rename(mod_dyn_filename, output_filename)
+            else:
+                LogMgr.info('Already Built')
         return output_filename
 
 
@@ -32,5 +32,5 @@
 from morphforge.simulation.neuron.objects import NEURONCell
 from morphforge.simulation.neuron.core.neuronsimulation import NEURONSimulation
 from morphforge.simulation.neuron.core.neuronsimulationsettings import NEURONSimulationSettings
-
+from morphforge.simulation.neuron.core.neuronsimulationprogress import NEURONSimulationProgress
 
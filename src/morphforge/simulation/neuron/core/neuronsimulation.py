@@ -33,18 +33,26 @@ import subprocess
 import sys
 import os
 import time
+import threading
 
 import numpy as np
+import quantities as pq
 
 from morphforge.core import FileIO
 from morphforge.core import RCMgr
+from morphforge.core import SettingsMgr
+from morphforge.core.mfrandom import MFRandom
 from morphforge.simulation.base import Simulation, SimulationResult
+from morphforge.simulation.base.result import SimulationResultCache
+from morphforge.simulation.base.core.simulationfingerprint import SimulationFingerprint
 from morphforge.simulation.base.simulationmetadatabundle.builders import MetaDataBundleBuilder
 from morphforge.simulation.neuron.objects import NeuronSimSetupObj
 from morphforge.simulation.neuron.simulationdatacontainers import MHocFile
 from morphforge.simulation.neuron.simulationdatacontainers import MHocFileData
 from morphforge.simulation.neuron.simulationdatacontainers import MModFileSet
+from morphforge.simulation.neuron.simulationdatacontainers import MNrnBuild
 from morphforge.simulation.neuron.misc import NeuronSimulationConstants
+from morphforge.simulation.neuron.core.neuronsimulationprogress import NEURONSimulationProgressChannel
 
 from morphforge.core.mgrs.logmgr import LogMgr
 from morphforge.traces import TraceVariableDT
@@ -55,6 +63,15 @@ from morphforge.simulationanalysis.summaries_new import SimulationMRedoc
 import contextlib
 import cStringIO
 
+def _as_quantity_inplace(array, quantity_unit):
+    # 'array * unit' would copy the array, so we apply any scaling in
+    # place, and attach the units to a view:
+    magnitude = float(quantity_unit.magnitude)
+    if magnitude != 1.0:
+        array *= magnitude
+    return pq.Quantity(array, quantity_unit.units, copy=False)
+
+
 def _random_walk(t_steps, std_dev):
     nums = (np.random.rand(t_steps) - 0.5) * std_dev
     walk = np.cumsum(nums)
@@ -97,6 +114,19 @@ class redirect_stdout(object):
 
 class NEURONSimulation(Simulation):
 
+    # The mod-file DLLs loaded into this process. (NEURON can not load the
+    # same DLL twice, and a simulation worker process runs many simulations):
+    _loaded_mod_dlls = set()
+
+    @classmethod
+    def _load_mod_dll(cls, filename):
+        if filename in cls._loaded_mod_dlls:
+            return
+        import neuron
+        if neuron.h.nrn_load_dll(filename) != 1.0:
+            raise ValueError('nrn Command Failed')
+        cls._loaded_mod_dlls.add(filename)
+
     def _sim_desc_str(self):
         sname = sys.argv[0]
         return '%s: %s' % (sname, self.name.replace(' ', ''))
@@ -110,44 +140,101 @@ class NEURONSimulation(Simulation):
 
         self.simulation_objects = [NeuronSimSetupObj(self.simsettings,
                                    simulation=self)]
-        self.hocfilename = None
-
-
 
+        # The HOC file the simulation was built from. This stays None when
+        # the simulation is built directly through 'neuron.h', unless
+        # SettingsMgr.is_neuron_hoc_export_enabled() is set:
+        self.hocfilename = None
 
 
 
-    def run(self, do_spawn=True):
 
 
-        if do_spawn:
-            return self._run_spawn()
-        else:
-            return self._run_no_spawn()
 
-    def _run_spawn(self):
+    _ld_library_path_lock = threading.Lock()
 
-        LogMgr.info('_run_spawn() [Pickling Sim]')
-        (bundle, resfilename) = MetaDataBundleBuilder.build_std_pickler(self)
-        (_bundlefname, sim_cmd) = bundle.write_to_file_and_get_exec_string()
+    @classmethod
+    def setup_ld_library_path(cls):
+        """Adds the 'ld_library_path_suffix' entries from the .mfrc file to
+        LD_LIBRARY_PATH, for spawned simulations. Entries that are already
+        there are not added again, so once this has been called, (for
+        example, before starting several threads), the environment is not
+        modified again."""
 
-        # if Exists(resfilename):
-        #    os.unlink(resfilename)
+        # It may be nessesary to add the following to .mfrc
+        # ld_library_path_suffix = /home/michael/hw/morphforge/src/morphforgecontrib/neuron_gsl/cpp
+        ld_path_additions = RCMgr.get('Neuron', 'ld_library_path_suffix').split(':')
+        with cls._ld_library_path_lock:
+            old_ld_path = os.environ.get('LD_LIBRARY_PATH', '')
+            missing = [p for p in ld_path_additions if not p in old_ld_path.split(':')]
+            if missing:
+                os.environ['LD_LIBRARY_PATH'] = ':'.join([old_ld_path] + missing)
 
-        if not os.path.exists(resfilename):
+    def run(self, do_spawn=True, random_seed=None, progress_callback=None, progress_dirname=None):
+        """ Run the simulation.
 
-            # Setup the LD_LIBRARY PATH:
-            # It may be nessesary to add the following to .mfrc
-            # ld_library_path_suffix = /home/michael/hw/morphforge/src/morphforgecontrib/neuron_gsl/cpp
-            ld_path_additions = RCMgr.get('Neuron', 'ld_library_path_suffix').split(':')
-            old_ld_path = os.environ.get('LD_LIBRARY_PATH', '')
-            os.environ['LD_LIBRARY_PATH'] = ':'.join([old_ld_path] + ld_path_additions)
+        For spawned simulations, 'progress_callback' is called periodically
+        with a NEURONSimulationProgress, from which the traces recorded so
+        far can be inspected. If it returns False, the simulation is
+        cancelled, and a ValueError raised. ('progress_dirname' is used by
+        the spawned process to report back).
+        """
 
-            LogMgr.info('_run_spawn() [Spawning subprocess]')
-            ret_code = subprocess.call(sim_cmd, shell=True)
-            if ret_code != 1:
+        if do_spawn:
+            return self._run_spawn(random_seed=random_seed, progress_callback=progress_callback)
+        else:
+            return self._run_no_spawn(progress_dirname=progress_dirname)
+
+    def _run_spawn(self, random_seed=None, progress_callback=None):
+
+        # Have we already got the results? (This avoids pickling anything).
+        # The seed is part of the key, so replicates are not shared:
+        if random_seed is None:
+            random_seed = MFRandom.get_seed()
+        fingerprint = SimulationFingerprint.get_md5(self, random_seed=random_seed)
+        resfilename = SimulationResultCache.lookup(fingerprint)
+
+        if resfilename is None:
+            progress_channel = None
+            if progress_callback is not None:
+                progress_channel = NEURONSimulationProgressChannel.create()
+
+            LogMgr.info('_run_spawn() [Pickling Sim]')
+            (bundle, resfilename) = MetaDataBundleBuilder.build_std_pickler(self,
+                    random_seed=random_seed,
+                    simmd5sum=fingerprint,
+                    progress_dirname=(progress_channel.dirname if progress_channel else None))
+            (_bundlefname, sim_cmd) = bundle.write_to_file_and_get_exec_string()
+
+            self.setup_ld_library_path()
+
+            def run_simulation():
+                if SettingsMgr.is_simulation_worker_pool_enabled():
+                    LogMgr.info('_run_spawn() [Running in worker pool]')
+                    from morphforge.simulation.neuron.core.neuronsimulationworkerpool import NEURONSimulationWorkerPool
+                    ok = NEURONSimulationWorkerPool.get_pool().run_bundle(_bundlefname)
+                    LogMgr.info('_run_spawn() [Finished running in worker pool]')
+                else:
+                    LogMgr.info('_run_spawn() [Spawning subprocess]')
+                    ok = (subprocess.call(sim_cmd, shell=True) == 1)
+                    LogMgr.info('_run_spawn() [Finished spawning subprocess]')
+                return ok
+
+            if progress_channel is None:
+                ok = run_simulation()
+                cancelled = False
+            else:
+                try:
+                    (ok, cancelled) = self._run_with_progress(run_simulation, progress_channel, progress_callback)
+                finally:
+                    progress_channel.remove()
+
+            if cancelled:
+                raise ValueError('Simulation cancelled: %s' % self.name)
+            if not ok:
                 raise ValueError('Unable to simulate %s' % self.name)
-            LogMgr.info('_run_spawn() [Finished spawning subprocess]')
+
+            SimulationResultCache.evict()
 
         # Load back the results:
         LogMgr.info('_run_spawn() [Loading results]')
@@ -170,6 +257,39 @@ class NEURONSimulation(Simulation):
 
         return self.result
 
+    @classmethod
+    def _run_with_progress(cls, run_simulation, progress_channel, progress_callback):
+        # Run the simulation from a thread, (it is just waiting on another
+        # process), and poll the channel for progress reports from here:
+        outcome = {}
+
+        def run_thread():
+            try:
+                outcome['ok'] = run_simulation()
+            except Exception:
+                outcome['ok'] = False
+                raise
+        thread = threading.Thread(target=run_thread)
+        thread.daemon = True
+        thread.start()
+
+        cancelled = False
+        last_progress_time = None
+        while thread.is_alive():
+            thread.join(SettingsMgr.get_simulation_progress_interval() / 2.0)
+            progress = progress_channel.read_progress()
+            if progress is None or cancelled:
+                continue
+            progress_time = float(progress.wall_time)
+            if progress_time == last_progress_time:
+                continue
+            last_progress_time = progress_time
+            if progress_callback(progress) is False:
+                progress_channel.cancel()
+                cancelled = True
+
+        return (outcome.get('ok', False), cancelled)
+
     def run_return_random_walks(self):
         # Create the HOC and ModFiles:
         hoc_data = MHocFile()
@@ -195,7 +315,20 @@ class NEURONSimulation(Simulation):
         self.result = SimulationResult(traces, self)
         return self.result
 
-    def _run_no_spawn(self):
+    def _build_nrn(self, h):
+        # Check everything can be built directly before creating anything,
+        # so the simulation is never left partly built in 'h':
+        for sim_obj in self.simulation_objects:
+            if not sim_obj.supports_nrn_build():
+                LogMgr.info('Building simulation from HOC (%s has no direct builder)' % sim_obj.name)
+                return None
+
+        nrn_data = MNrnBuild(h)
+        for sim_obj in self.simulation_objects:
+            sim_obj.build_nrn(nrn_data)
+        return nrn_data
+
+    def _run_no_spawn(self, progress_dirname=None):
 
         # Generate Random data:
         if False or MockControl.is_mock_simulation:
@@ -211,12 +344,9 @@ class NEURONSimulation(Simulation):
         with redirect_stdout(stdout_stream=stdout, stderr_stream=stdout) as display_output:
 
 
-            # Create the HOC and ModFiles:
-            hoc_data = MHocFile()
+            # Create the ModFiles:
             mod_files = MModFileSet()
             for sim_obj in self.simulation_objects:
-                # print 'BUILDING HOC:', sim_obj
-                sim_obj.build_hoc(hoc_data)
                 # print 'BUILDING MOD:', sim_obj
                 sim_obj.build_mod(mod_files)
 
@@ -230,62 +360,169 @@ class NEURONSimulation(Simulation):
 
             # Insert the mod-files:
             for modfile in mod_files:
-                nrn(neuron.h.nrn_load_dll, modfile.get_built_filename_full())
+                self._load_mod_dll(modfile.get_built_filename_full())
 
-            # Write the HOC file:
             t_sim_start = time.time()
-            hoc_filename = FileIO.write_to_file(
-                            str(hoc_data), 
-                            suffix='.hoc')
 
-            nrn(neuron.h.load_file, hoc_filename)
-            self.hocfilename = hoc_filename
+            # Build the simulation directly through 'neuron.h' if we can:
+            nrn_data = None
+            if SettingsMgr.is_neuron_direct_instantiation_enabled():
+                nrn_data = self._build_nrn(neuron.h)
+
+            # Otherwise, (or for debugging), write the HOC file:
+            hoc_data = None
+            if nrn_data is None or SettingsMgr.is_neuron_hoc_export_enabled():
+                hoc_data = MHocFile()
+                for sim_obj in self.simulation_objects:
+                    # print 'BUILDING HOC:', sim_obj
+                    sim_obj.build_hoc(hoc_data)
+
+                hoc_filename = FileIO.write_to_file(
+                                str(hoc_data),
+                                suffix='.hoc')
+                self.hocfilename = hoc_filename
+
+            if nrn_data is None:
+                nrn(neuron.h.load_file, hoc_filename)
+
+            # Where the recordings will be:
+            if nrn_data is not None:
+                all_records = nrn_data[MHocFileData.Recordables].items()
+                time_vector = nrn_data.time_vector
+                get_record_vector = lambda details: details['vector']
+                get_record_times_vector = lambda details: details.get('record_times', None)
+            else:
+                all_records = hoc_data[MHocFileData.Recordables].items()
+                time_vector = neuron.h.__getattribute__(NeuronSimulationConstants.TimeVectorName)
+                get_record_vector = lambda details: neuron.h.__getattribute__(details['recVecName'])
+                get_record_times_vector = lambda details: (neuron.h.__getattribute__(details['record_times_name']) if details.get('record_times_name') else None)
+
+            # Records sampled by NEURON have their own time-base:
+            is_sampled = lambda record_obj: record_obj.sampling is not None and not record_obj.sampling.is_every_step()
+            records = [(record_obj, details) for (record_obj, details) in all_records if not is_sampled(record_obj)]
+            sampled_records = [(record_obj, details) for (record_obj, details) in all_records if is_sampled(record_obj)]
+
+            progress_channel = None
+            if progress_dirname is not None:
+                progress_channel = NEURONSimulationProgressChannel(progress_dirname)
+                progress_channel.write_manifest([record_obj for (record_obj, _details) in records])
 
             class Event(object):
 
                 def __init__(self):
                     self.interval = 5.0
+                    self.n_pts_flushed = 0
+                    self.last_report_time = None
+                    self.cancelled = False
                     self.fih = neuron.h.FInitializeHandler(0.01, self.callback)
 
+                def report_progress(self):
+                    wall_time = time.time() - t_sim_start
+                    if self.last_report_time is not None and \
+                       wall_time - self.last_report_time < SettingsMgr.get_simulation_progress_interval():
+                        return
+                    self.last_report_time = wall_time
+
+                    # Flush the samples recorded since the last report:
+                    n_pts = int(time_vector.size())
+                    if n_pts > self.n_pts_flushed:
+                        block = np.empty((len(records) + 1, n_pts - self.n_pts_flushed))
+                        time_vector.c(self.n_pts_flushed, n_pts - 1).to_python(block[0])
+                        for (index, (_record_obj, details)) in enumerate(records):
+                            get_record_vector(details).c(self.n_pts_flushed, n_pts - 1).to_python(block[index + 1])
+                        progress_channel.write_chunk(block)
+                        self.n_pts_flushed = n_pts
+
+                    progress_channel.write_progress(t=float(neuron.h.t), tstop=float(neuron.h.tstop), wall_time=wall_time)
+
+                    if progress_channel.is_cancelled():
+                        self.cancelled = True
+                        neuron.h.stoprun = 1
+
                 def callback(self):
                     #print display_output
                     #display_output.stdout_prev.write('Simulating: t=%.0f/%.0fms \r' % (neuron.h.t, float(neuron.h.tstop)))
                     #display_output.stdout_prev.flush()
                     sys.__stdout__.write('Simulating: t=%.0f/%.0fms \r' % (neuron.h.t, float(neuron.h.tstop)))
                     sys.__stdout__.flush()
-                    if neuron.h.t + self.interval < neuron.h.tstop:
+                    if progress_channel is not None:
+                        self.report_progress()
+                    if neuron.h.t + self.interval < neuron.h.tstop and not self.cancelled:
                         neuron.h.cvode.event(neuron.h.t + self.interval, self.callback)
 
-            Event()
+            event = Event()
             print 'Running Simulation'
             neuron.h.run()
+            if event.cancelled:
+                raise ValueError('Simulation cancelled: %s' % self.name)
             assert neuron.h.t + 1 >= neuron.h.tstop
 
 
 
         print 'Time for Simulation: ', time.time() - t_sim_start
 
-        # Extract the values back out:
-        time_array = np.array(neuron.h.__getattribute__(NeuronSimulationConstants.TimeVectorName)) * NeuronSimulationConstants.TimeUnit
-
+        # Extract the values back out. All the vectors are copied into a
+        # single block, (row 0 is the time), and the traces are views of
+        # it, which share the same time array:
         t_trace_read_start = time.time()
-        traces = []
-        records = hoc_data[MHocFileData.Recordables]
-        for (record_obj, hoc_details) in records.iteritems():
+        n_pts = int(time_vector.size())
 
-            data_array = np.array(neuron.h.__getattribute__(hoc_details["recVecName"])) * record_obj.get_unit()
+        block = np.empty((len(records) + 1, n_pts))
+        time_vector.to_python(block[0])
+        for (index, (record_obj, details)) in enumerate(records):
+            record_vector = get_record_vector(details)
+            if int(record_vector.size()) != n_pts:
+                raise ValueError('Recorded vector for %s has %d points, (expected %d)' % (record_obj.name, record_vector.size(), n_pts))
+            record_vector.to_python(block[index + 1])
 
-            tr = TraceVariableDT(name=record_obj.name,
-                                 comment=record_obj.get_description(),
-                                 time=time_array, data=data_array,
-                                 tags=record_obj.get_tags())
-            traces.append(tr)
-        print 'Time for Extracting Data: (%d records)' % len(records), \
+        time_array = _as_quantity_inplace(block[0], NeuronSimulationConstants.TimeUnit)
+
+        traces = []
+        for (index, (record_obj, _details)) in enumerate(records):
+
+            data_array = _as_quantity_inplace(block[index + 1], record_obj.get_unit())
+            traces.append(self._build_trace(record_obj, time_array, data_array))
+
+        for (record_obj, details) in sampled_records:
+            record_vector = get_record_vector(details)
+            data_array = np.empty(int(record_vector.size()))
+            record_vector.to_python(data_array)
+
+            record_times_vector = get_record_times_vector(details)
+            if record_times_vector is not None:
+                record_time_array = np.empty(int(record_times_vector.size()))
+                record_times_vector.to_python(record_time_array)
+                record_time_array = record_time_array[:len(data_array)]
+            else:
+                interval = record_obj.sampling.get_simulator_interval()
+                record_time_array = np.arange(len(data_array)) * float(interval.rescale('ms').magnitude)
+
+            traces.append(self._build_trace(record_obj,
+                    time_array=_as_quantity_inplace(record_time_array, pq.ms),
+                    data_array=_as_quantity_inplace(data_array, record_obj.get_unit())))
+
+        print 'Time for Extracting Data: (%d records)' % len(all_records), \
             time.time() - t_trace_read_start
 
         self.result = SimulationResult(traces, self)
         return self.result
 
+    @classmethod
+    def _build_trace(cls, record_obj, time_array, data_array):
+        # Recordings with an envelope only keep the minimum and maximum
+        # samples of each interval:
+        if record_obj.sampling is not None and record_obj.sampling.envelope:
+            indices = record_obj.sampling.get_envelope_indices(
+                    time_array=time_array.rescale('ms').magnitude,
+                    data_array=data_array.magnitude)
+            time_array = time_array[indices]
+            data_array = data_array[indices]
+
+        return TraceVariableDT(name=record_obj.name,
+                               comment=record_obj.get_description(),
+                               time=time_array, data=data_array,
+                               tags=record_obj.get_tags())
+
     # NEW API:
     def add_cell_backend_specific(self, cell):
         self.simulation_objects.append(cell)
@@ -53,6 +53,9 @@ class NEURONEnvironment(SimulationEnvironment):
     def SimulationSettings(self, **kwargs):
         return NEURONSimulationSettings(**kwargs)
 
+    def prepare_for_parallel_runs(self):
+        NEURONSimulation.setup_ld_library_path()
+
     channels = PluginDict()
     presynapticmechanisms = PluginDict()
     postsynapticmechanisms = PluginDict()
@@ -0,0 +1,159 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+import os
+import glob
+import json
+import shutil
+
+import numpy as np
+import quantities as pq
+
+from morphforge.core import LocMgr
+from morphforge.simulation.neuron.misc import NeuronSimulationConstants
+from morphforge.traces import TraceVariableDT
+
+
+class NEURONSimulationProgress(object):
+
+    """ A progress report from a running simulation.
+
+    'rate' is the simulated time per second of wall-clock time.
+    """
+
+    def __init__(self, channel, t, tstop, wall_time):
+        self._channel = channel
+        self.t = t * NeuronSimulationConstants.TimeUnit
+        self.tstop = tstop * NeuronSimulationConstants.TimeUnit
+        self.wall_time = wall_time * pq.s
+        self.rate = (t / wall_time if wall_time > 0 else 0.0) * NeuronSimulationConstants.TimeUnit / pq.s
+
+    def get_fraction_complete(self):
+        return float(self.t / self.tstop) if self.tstop else 0.0
+
+    def get_partial_traces(self):
+        return self._channel.get_partial_traces()
+
+    def cancel(self):
+        self._channel.cancel()
+
+
+class NEURONSimulationProgressChannel(object):
+
+    """ A directory through which a simulation running in another process
+    reports its progress, and streams back chunks of its recorded traces.
+
+    The simulation writes 'progress.json', 'manifest.json' and a
+    'chunkNNNNN.npy' file of new samples for each flush. (Each file is
+    written to a temporary name and renamed, so the reader never sees a
+    partial file). The reader asks the simulation to stop by creating
+    'cancel'.
+    """
+
+    def __init__(self, dirname):
+        self.dirname = dirname
+        self._n_chunks_written = 0
+
+    @classmethod
+    def create(cls):
+        import tempfile
+        tmp_dir = LocMgr.ensure_dir_exists(LocMgr.get_tmp_path())
+        return NEURONSimulationProgressChannel(tempfile.mkdtemp(prefix='simprogress_', dir=tmp_dir))
+
+    def _write_file(self, filename, write_func):
+        tmp_filename = os.path.join(self.dirname, '.tmp_%d_%s' % (os.getpid(), filename))
+        with open(tmp_filename, 'wb') as f:
+            write_func(f)
+        os.rename(tmp_filename, os.path.join(self.dirname, filename))
+
+    # Simulation side:
+    # ##################
+    def write_manifest(self, records):
+        manifest = {'records': [{
+            'name': record_obj.name,
+            'comment': record_obj.get_description(),
+            'tags': list(record_obj.get_tags()),
+            'unit_magnitude': float(record_obj.get_unit().magnitude),
+            'unit': str(record_obj.get_unit().dimensionality),
+            } for record_obj in records]}
+        self._write_file('manifest.json', lambda f: json.dump(manifest, f))
+
+    def write_progress(self, t, tstop, wall_time):
+        progress = {'t': t, 'tstop': tstop, 'wall_time': wall_time}
+        self._write_file('progress.json', lambda f: json.dump(progress, f))
+
+    def write_chunk(self, block):
+        # 'block' is [time, record0, record1, ...] x new samples:
+        filename = 'chunk%05d.npy' % self._n_chunks_written
+        self._write_file(filename, lambda f: np.save(f, block))
+        self._n_chunks_written += 1
+
+    def is_cancelled(self):
+        return os.path.exists(os.path.join(self.dirname, 'cancel'))
+
+    # Reader side:
+    # ##############
+    def read_progress(self):
+        try:
+            with open(os.path.join(self.dirname, 'progress.json')) as f:
+                progress = json.load(f)
+        except (IOError, ValueError):
+            return None
+        return NEURONSimulationProgress(channel=self, **progress)
+
+    def get_partial_traces(self):
+        """ The traces recorded so far, (from the chunks flushed so far)."""
+        try:
+            with open(os.path.join(self.dirname, 'manifest.json')) as f:
+                manifest = json.load(f)
+        except (IOError, ValueError):
+            return []
+
+        chunk_filenames = sorted(glob.glob(os.path.join(self.dirname, 'chunk*.npy')))
+        if not chunk_filenames:
+            return []
+        block = np.hstack([np.load(filename) for filename in chunk_filenames])
+
+        time_array = block[0] * NeuronSimulationConstants.TimeUnit
+        traces = []
+        for (index, record) in enumerate(manifest['records']):
+            data_array = pq.Quantity(block[index + 1] * record['unit_magnitude'], record['unit'])
+            traces.append(TraceVariableDT(name=record['name'],
+                                          comment=record['comment'],
+                                          time=time_array, data=data_array,
+                                          tags=record['tags']))
+        return traces
+
+    def cancel(self):
+        open(os.path.join(self.dirname, 'cancel'), 'w').close()
+
+    def remove(self):
+        shutil.rmtree(self.dirname, ignore_errors=True)
@@ -0,0 +1,176 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+import os
+import sys
+import fcntl
+import atexit
+import cPickle
+import threading
+import subprocess
+import Queue
+
+from morphforge.core import LocMgr
+from morphforge.core import SettingsMgr
+from morphforge.core.mgrs.logmgr import LogMgr
+
+
+def _set_cloexec(fd):
+    flags = fcntl.fcntl(fd, fcntl.F_GETFD)
+    fcntl.fcntl(fd, fcntl.F_SETFD, flags | fcntl.FD_CLOEXEC)
+
+
+class _SimulationWorker(object):
+    """A single 'bin/SimulateBundleWorker.py' process. Bundle filenames are
+    sent on its stdin, and (succeeded, message) tuples are read back from a
+    separate pipe, so that the simulation output still reaches stdout."""
+
+    def __init__(self):
+        (result_r, result_w) = os.pipe()
+        _set_cloexec(result_r)
+
+        worker_bin = os.path.join(LocMgr.get_bin_path(), 'SimulateBundleWorker.py')
+        self.process = subprocess.Popen([sys.executable, worker_bin, str(result_w)], stdin=subprocess.PIPE, close_fds=False)
+        os.close(result_w)
+
+        _set_cloexec(self.process.stdin.fileno())
+        self.result_file = os.fdopen(result_r, 'rb')
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def run_bundle(self, bundle_filename):
+        cPickle.dump(bundle_filename, self.process.stdin, cPickle.HIGHEST_PROTOCOL)
+        self.process.stdin.flush()
+        (succeeded, message) = cPickle.load(self.result_file)
+        if message:
+            LogMgr.info('Simulation worker: %s' % message)
+        return succeeded
+
+    def stop(self):
+        try:
+            cPickle.dump(None, self.process.stdin, cPickle.HIGHEST_PROTOCOL)
+            self.process.stdin.close()
+        except IOError:
+            pass
+        self.process.wait()
+        self.result_file.close()
+
+
+class NEURONSimulationWorkerPool(object):
+    """A pool of long-lived simulation worker processes.
+
+    Workers keep morphforge, NEURON and the mod-file DLLs that they have
+    used loaded between simulations, which removes the interpreter startup
+    and import cost from each spawned simulation. Workers are started on
+    demand, up to 'n_workers', and 'run_bundle' can be called from multiple
+    threads at once.
+    """
+
+    _pool = None
+    _pool_lock = threading.Lock()
+
+    @classmethod
+    def get_pool(cls):
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = NEURONSimulationWorkerPool(n_workers=SettingsMgr.get_simulation_worker_pool_size())
+                atexit.register(cls.shutdown_pool)
+            return cls._pool
+
+    @classmethod
+    def shutdown_pool(cls):
+        with cls._pool_lock:
+            if cls._pool is not None:
+                cls._pool.shutdown()
+                cls._pool = None
+
+    def __init__(self, n_workers):
+        self.n_workers = n_workers
+        self._workers = []
+        self._idle_workers = Queue.Queue()
+        self._lock = threading.Lock()
+
+    def _get_worker(self):
+        while True:
+            with self._lock:
+                if self._idle_workers.empty() and len(self._workers) < self.n_workers:
+                    LogMgr.info('Starting simulation worker %d' % len(self._workers))
+                    worker = _SimulationWorker()
+                    self._workers.append(worker)
+                    return worker
+
+            # (Poll, in case a busy worker dies and needs replacing):
+            try:
+                worker = self._idle_workers.get(timeout=1.0)
+            except Queue.Empty:
+                continue
+
+            # Workers can die while they are idle:
+            if worker.is_alive():
+                return worker
+            LogMgr.info('Simulation worker died while idle')
+            self._discard_worker(worker)
+
+    def _discard_worker(self, worker):
+        with self._lock:
+            self._workers.remove(worker)
+        if worker.is_alive():
+            worker.process.kill()
+        worker.process.wait()
+        for fobj in (worker.process.stdin, worker.result_file):
+            try:
+                fobj.close()
+            except IOError:
+                pass
+
+    def run_bundle(self, bundle_filename):
+        """Simulates the bundle in 'bundle_filename' on a worker, and
+        returns whether it succeeded."""
+
+        worker = self._get_worker()
+        try:
+            succeeded = worker.run_bundle(bundle_filename)
+        except (EOFError, IOError, cPickle.UnpicklingError):
+            # The worker died, (rather than just the simulation failing):
+            LogMgr.info('Simulation worker died')
+            self._discard_worker(worker)
+            return False
+
+        self._idle_workers.put(worker)
+        return succeeded
+
+    def shutdown(self):
+        with self._lock:
+            (workers, self._workers) = (self._workers, [])
+        for worker in workers:
+            worker.stop()
@@ -33,6 +33,7 @@
 from morphforge.simulation.neuron.hocmodbuilders.hocbuilder import HocBuilder
 from morphforge.simulation.neuron.hocmodbuilders.hocbuilder_cell import HocBuilder_Cell
 from morphforge.simulation.neuron.hocmodbuilders.hocmodutils import HocModUtils
+from morphforge.simulation.neuron.hocmodbuilders.nrnbuilder import NrnBuilder
 from morphforge.simulation.neuron.hocmodbuilders.modfilesectioned import ModFileSectioned, NeuronParameter
 from morphforge.simulation.neuron.hocmodbuilders.modfilewriterbase import MM_ModFileWriterBase
 
@@ -40,6 +41,7 @@ __all__ = [
     'HocBuilder',
     'HocBuilder_Cell',
     'HocModUtils',
+    'NrnBuilder',
     'ModFileSectioned',
     'NeuronParameter',
     'MM_ModFileWriterBase',
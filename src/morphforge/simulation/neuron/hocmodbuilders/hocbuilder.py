@@ -31,7 +31,7 @@
 
 #from hocbuilder_cell import HocBuilder_Cell
 
-from Cheetah.Template import Template
+from morphforge.core import TemplateCache
 from morphforge.simulation.neuron.hocmodbuilders.hocbuilder_cell import HocBuilder_Cell
 from morphforge.simulation.neuron.simulationdatacontainers import MHOCSections
 from morphforge.simulation.neuron.simulationdatacontainers import MHocFileData
@@ -107,7 +107,7 @@ class HocBuilder(object):
 
         # Create the HOC
         hocfile_obj.add_to_section(MHOCSections.InitVoltageClamps,
-                                   Template(vc_tmpl, data).respond())
+                                   TemplateCache.render(vc_tmpl, data))
 
     @classmethod
     def CurrentClamp(cls, hocfile_obj, currentclamp):
@@ -130,7 +130,7 @@ class HocBuilder(object):
 
         # Create the HOC
         hocfile_obj.add_to_section(MHOCSections.InitCurrentClamps,
-                                   Template(_cc_tmpl, data).respond())
+                                   TemplateCache.render(_cc_tmpl, data))
 
     @classmethod
     def Cell(cls, hocfile_obj, cell):
@@ -29,23 +29,23 @@
 #  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------
 
-from Cheetah.Template import Template
-from morphforge.morphology.visitor.visitorbaseclasses import SectionIndexerDF
+from morphforge.core import TemplateCache
 from morphforge.simulation.neuron.simulationdatacontainers import MHOCSections
 from morphforge.simulation.neuron.simulationdatacontainers import MHocFileData
 
 _cell_templ_tmpl = """
 
-v_init = $cell.initial_voltage.rescale('mV').magnitude
-
 // Cell Template for: $cell_template_name
 #set nSections = len($section_indexer)
 begintemplate $cell_template_name
     create internalsections[$nSections]
     public internalsections
+    objref all_sections
+    public all_sections
 
     proc init() {
         create internalsections[$nSections]
+        all_sections = new SectionList()
 
         #for $section in $cell.morphology:
         internalsections[$section_indexer[$section]] {
@@ -65,6 +65,8 @@ begintemplate $cell_template_name
             // Segmentation:
             nseg = $cell.get_segmenter().get_num_segments($section)
 
+            all_sections.append()
+
 
 
 
@@ -98,6 +100,7 @@ endtemplate $cell_template_name
 """
 
 _cell_obj_decl_tmpl = """
+v_init = $cell.initial_voltage.rescale('mV').magnitude
 objref $cell_name
 $cell_name = new  $cell_template_name ()
 """
@@ -105,31 +108,69 @@ $cell_name = new  $cell_template_name ()
 
 class HocBuilder_Cell(object):
 
+    @classmethod
+    def _get_template_key(cls, cell, section_indexer):
+        # Everything that is written into the cell template. Cells with the
+        # same key, (for example, a population built from one morphology),
+        # can share a template:
+        biophysics = cell.get_biophysics()
+        segmenter = cell.get_segmenter()
+
+        sections = []
+        for section in cell.morphology:
+            parent_index = (None if section.is_a_root_section() else section_indexer[section.parent])
+            cm = biophysics.get_passive_property_for_section(section, 'SpecificCapacitance').rescale('uF/cm2').magnitude
+            ra = biophysics.get_passive_property_for_section(section, 'AxialResistance').rescale('ohmcm').magnitude
+            sections.append((section_indexer[section], parent_index,
+                             section.get_length(), section.p_r, section.d_r,
+                             float(cm), float(ra),
+                             segmenter.get_num_segments(section)))
+
+        roots = tuple(section_indexer[r] for r in cell.morphology.get_root_sections())
+        return (tuple(sections), roots)
+
     @classmethod
     def build(cls, hocfile_obj, cell):
 
+        section_indexer = cell.morphology.get_section_indexer()
+        templates = hocfile_obj[MHocFileData.CellTemplates]
+        template_key = cls._get_template_key(cell, section_indexer)
+        template_name = templates.get(template_key, 'CellTempl_%s' % cell.name)
+
         data = {
             'cell': cell,
-            'section_indexer': SectionIndexerDF(morph=cell.morphology)(),
-            'cell_template_name': 'CellTempl_%s' % cell.name,
+            'section_indexer': section_indexer,
+            'cell_template_name': template_name,
             'cell_name': 'cell_%s' % cell.name,
             }
 
-        # Create the Cell Topology Template:
-        hocfile_obj.add_to_section(
-                        MHOCSections.InitTemplates,
-                        Template(_cell_templ_tmpl, data).respond())
+        # Create the Cell Topology Template, (once per template key):
+        if not template_key in templates:
+            templates[template_key] = template_name
+            hocfile_obj.add_to_section(
+                            MHOCSections.InitTemplates,
+                            TemplateCache.render(_cell_templ_tmpl, data))
+
         hocfile_obj.add_to_section(
                         MHOCSections.InitCells,
-                        Template(_cell_obj_decl_tmpl, data).respond())
+                        TemplateCache.render(_cell_obj_decl_tmpl, data))
 
         # Save the data about this cell:
         hocfile_obj[MHocFileData.Cells][cell] = data
 
-        # Create the membrane properties:
+        # Create the membrane properties. Sections are grouped by mechanism,
+        # so each mechanism can write all its sections in one go:
+        mta_sections = {}
+        mta_order = []
         for section in cell.morphology:
             for mta in cell.get_biophysics().get_resolved_mtas_for_section(section):
-                mta.mechanism.build_hoc_section(cell=cell,
-                        section=section, hocfile_obj=hocfile_obj, mta=mta)
+                if not mta in mta_sections:
+                    mta_sections[mta] = []
+                    mta_order.append(mta)
+                mta_sections[mta].append(section)
+
+        for mta in mta_order:
+            mta.mechanism.build_hoc_sections(cell=cell,
+                    sections=mta_sections[mta], hocfile_obj=hocfile_obj, mta=mta)
 
 
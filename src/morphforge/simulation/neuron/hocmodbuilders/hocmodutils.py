@@ -29,7 +29,7 @@
 #  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------
 
-from Cheetah.Template import Template
+from morphforge.core import TemplateCache
 
 from morphforge.simulation.neuron.simulationdatacontainers.mhocfile import MHocFileData
 from morphforge.simulation.neuron.simulationdatacontainers.mhocfile import MHOCSections
@@ -42,9 +42,49 @@ class HocModUtils(object):
     _tmpl_str_record_modvariable = """
     objref $recVecName
     $recVecName = new Vector()
-    ${recVecName}.buffer_size(%d)
-    ${recVecName}.record(& ${cellname}.internalsections[${sectionindex}].${modvariable}_${neuron_suffix} ($sectionpos))
-    """ % initial_buffer_size
+    ${recVecName}.buffer_size($buffer_size)
+    $record_setup
+    ${recVecName}.record(& ${cellname}.internalsections[${sectionindex}].${modvariable}_${neuron_suffix} ($sectionpos)${record_args})
+    """
+
+    _tmpl_str_record_times = """
+objref $record_times_name
+$record_times_name = new Vector()
+${record_times_name}.indgen($start, $stop, $step)"""
+
+    @classmethod
+    def get_record_sampling(cls, recordobj, vecname):
+        # The template variables to record 'recordobj' into the hoc Vector
+        # 'vecname' according to its RecordSampling; using a Vector of
+        # record times for a window, or the 'Dt' argument of
+        # Vector.record() for a fixed interval:
+        sampling = recordobj.sampling
+        if sampling is None or sampling.is_every_step():
+            return {'buffer_size': cls.initial_buffer_size,
+                    'record_setup': '',
+                    'record_args': '',
+                    'record_times_name': None}
+
+        simsettings = recordobj.simulation.simsettings
+        record_times = sampling.get_record_times(simsettings['dt'])
+        sampling_data = {
+            'buffer_size': sampling.get_n_samples(simsettings['tstop'], simsettings['dt']),
+            'record_setup': '',
+            'record_times_name': None,
+            }
+        if record_times is not None:
+            record_times_name = '%s_times' % vecname
+            step = (record_times[1] - record_times[0] if len(record_times) > 1 else 1.0)
+            sampling_data['record_setup'] = TemplateCache.render(HocModUtils._tmpl_str_record_times, {
+                    'record_times_name': record_times_name,
+                    'start': record_times[0],
+                    'stop': record_times[-1],
+                    'step': step})
+            sampling_data['record_args'] = ', %s' % record_times_name
+            sampling_data['record_times_name'] = record_times_name
+        else:
+            sampling_data['record_args'] = ', %s' % float(sampling.get_simulator_interval().rescale('ms').magnitude)
+        return sampling_data
 
     @classmethod
     def create_record_from_modfile(cls, hocfile_obj, vecname, cell_location, modvariable, mod_neuronsuffix, recordobj  ):
@@ -63,9 +103,10 @@ class HocModUtils(object):
             'recVecName': vecname,
             'modvariable': modvariable,
             }
+        data.update(HocModUtils.get_record_sampling(recordobj, vecname))
 
         # Create the Cell Topology Template:
-        hocfile_obj.add_to_section(MHOCSections.InitRecords,   Template(HocModUtils._tmpl_str_record_modvariable, data).respond())
+        hocfile_obj.add_to_section(MHOCSections.InitRecords,   TemplateCache.render(HocModUtils._tmpl_str_record_modvariable, data))
 
         # Save the data about this cell:
         hocfile_obj[MHocFileData.Recordables][recordobj] = data
@@ -73,21 +114,93 @@ class HocModUtils(object):
 
 
 
+    _tmpl_str_section_list = """
+objref $list_name
+$list_name = new SectionList()
+#for first, last in $runs:
+for mf_section_index = $first, $last ${cell_name}.internalsections[mf_section_index] ${list_name}.append()
+#end for
+"""
+
+    @classmethod
+    def get_mechanism_section_groups(cls, cell_hoc, sections, mta, units):
+        # Sections where the mechanism has the same variable values are
+        # written as a single block. Returns [(setup, selector, variables),...],
+        # where 'setup' is any HOC needed before 'selector {...}':
+        groups = {}
+        group_order = []
+        for section in sections:
+            variables = cls.get_mechanism_variables(mta=mta, section=section, units=units)
+            key = tuple([(v[0], float(v[1])) for v in variables])
+            if not key in groups:
+                groups[key] = ([], variables)
+                group_order.append(key)
+            groups[key][0].append(cell_hoc['section_indexer'][section])
+
+        cell_name = cell_hoc['cell_name']
+        n_sections = len(cell_hoc['section_indexer'])
+
+        section_groups = []
+        for key in group_order:
+            (section_indices, variables) = groups[key]
+
+            # A single section:
+            if len(section_indices) == 1:
+                selector = '%s.internalsections [%d]' % (cell_name, section_indices[0])
+                section_groups.append(('', selector, variables))
+                continue
+
+            # The whole cell:
+            if len(section_indices) == n_sections:
+                selector = 'forsec %s.all_sections' % cell_name
+                section_groups.append(('', selector, variables))
+                continue
+
+            # Otherwise, build a SectionList from runs of consecutive indices:
+            runs = []
+            for index in sorted(section_indices):
+                if runs and runs[-1][1] == index - 1:
+                    runs[-1][1] = index
+                else:
+                    runs.append([index, index])
+
+            list_index = cell_hoc.get('n_section_lists', 0)
+            cell_hoc['n_section_lists'] = list_index + 1
+            list_name = 'seclist_%s_%d' % (cell_name, list_index)
+            setup = TemplateCache.render(HocModUtils._tmpl_str_section_list,
+                    {'list_name': list_name, 'cell_name': cell_name, 'runs': runs})
+            section_groups.append((setup, 'forsec %s' % list_name, variables))
+
+        return section_groups
+
+    @classmethod
+    def get_mechanism_variables(cls, mta, section, units):
+        # [(name, value_nounit, value_with_unit, unit),...] for the templates:
+        variables = []
+        for variable_name in mta.mechanism.get_variables():
+            variable_value_with_unit = mta.applicator.get_variable_value_for_section(variable_name=variable_name, section=section)
+            variable_unit = units[variable_name]
+            variable_value_nounit = variable_value_with_unit.rescale(variable_unit).magnitude
+            variables.append([variable_name, variable_value_nounit, variable_value_with_unit, variable_unit])
+        return variables
+
     _tmpl_str_record_hoc = """
         objref $recVecName
         $recVecName = new Vector()
-        ${recVecName}.buffer_size(%d)
-        ${recVecName}.record(& ${objname}.${objvar})
-        """ % initial_buffer_size
+        ${recVecName}.buffer_size($buffer_size)
+        $record_setup
+        ${recVecName}.record(& ${objname}.${objvar}${record_args})
+        """
     @classmethod
     def create_record_from_object(cls, hocfile_obj, vecname, objname, objvar, recordobj):
 
         data = {'recVecName': vecname,
                 'objname': objname,
                 'objvar': objvar}
+        data.update(HocModUtils.get_record_sampling(recordobj, vecname))
 
         # Create the Cell Topology Template:
-        sect_text = Template(HocModUtils._tmpl_str_record_hoc, data).respond()
+        sect_text = TemplateCache.render(HocModUtils._tmpl_str_record_hoc, data)
         hocfile_obj.add_to_section(MHOCSections.InitRecords,
                                    sect_text)
 
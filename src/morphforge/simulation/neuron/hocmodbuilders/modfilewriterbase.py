@@ -29,7 +29,7 @@
 #  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------
 
-from Cheetah.Template import Template
+from morphforge.core import TemplateCache
 from datetime import datetime
 
 mod_tmpl_header = """
@@ -296,7 +296,7 @@ class MM_ModFileWriterBase(object):
         #    print blk
         #    print Template(blk, [self]).respond()
 
-        resps = [Template(blk, [self]).respond() for blk in blks]
+        resps = [TemplateCache.render(blk, [self]) for blk in blks]
         return ''.join(resps)
 
 
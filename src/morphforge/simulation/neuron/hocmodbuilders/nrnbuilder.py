@@ -0,0 +1,119 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+from morphforge.simulation.neuron.simulationdatacontainers import MHocFileData
+from morphforge.simulation.neuron.misc import NEURONSettings
+
+
+class NrnBuilder(object):
+
+    """ Builds cells and stimulations directly through ``neuron.h``.
+
+    These mirror the HocBuilder methods, (which remain the reference for
+    what is built), but create the objects in the running NEURON instance,
+    rather than writing HOC for it to parse.
+    """
+
+    @classmethod
+    def VoltageClamp(cls, nrnbuild_obj, voltageclamp):
+        h = nrnbuild_obj.h
+        vclamp_type = NEURONSettings.get_voltageclamp_type()
+        stim = getattr(h, vclamp_type)(nrnbuild_obj.get_segment(voltageclamp.cell_location))
+        stim.dur1 = float(voltageclamp.dur1.rescale('ms').magnitude)
+        stim.dur2 = float(voltageclamp.dur2.rescale('ms').magnitude)
+        stim.dur3 = float(voltageclamp.dur3.rescale('ms').magnitude)
+        stim.amp1 = float(voltageclamp.amp1.rescale('mV').magnitude)
+        stim.amp2 = float(voltageclamp.amp2.rescale('mV').magnitude)
+        stim.amp3 = float(voltageclamp.amp3.rescale('mV').magnitude)
+        if vclamp_type == 'SEClamp':
+            stim.rs = float(voltageclamp.rs.rescale('MOhm').magnitude)
+
+        nrnbuild_obj[MHocFileData.VoltageClamps][voltageclamp] = {'stim': stim}
+
+    @classmethod
+    def CurrentClamp(cls, nrnbuild_obj, currentclamp):
+        h = nrnbuild_obj.h
+        stim = h.IClamp(nrnbuild_obj.get_segment(currentclamp.cell_location))
+        stim.dur = float(currentclamp.dur.rescale('ms').magnitude)
+        # ('del' is a python keyword):
+        setattr(stim, 'del', float(currentclamp.delay.rescale('ms').magnitude))
+        stim.amp = float(currentclamp.amp.rescale('nA').magnitude)
+
+        nrnbuild_obj[MHocFileData.CurrentClamps][currentclamp] = {'stim': stim}
+
+    @classmethod
+    def Cell(cls, nrnbuild_obj, cell):
+        h = nrnbuild_obj.h
+        h.v_init = float(cell.initial_voltage.rescale('mV').magnitude)
+
+        section_indexer = cell.morphology.get_section_indexer()
+        biophysics = cell.get_biophysics()
+        segmenter = cell.get_segmenter()
+
+        sections = [None] * len(section_indexer)
+        for section in cell.morphology:
+            index = section_indexer[section]
+            nrn_section = h.Section(name='cell_%s_%d' % (cell.name, index))
+
+            # Section Geometry:
+            nrn_section.L = section.get_length()
+            nrn_section(0.0).diam = section.p_r * 2.0
+            nrn_section(1.0).diam = section.d_r * 2.0
+
+            # Passive Parameters:
+            nrn_section.cm = float(biophysics.get_passive_property_for_section(section, 'SpecificCapacitance').rescale('uF/cm2').magnitude)
+            nrn_section.Ra = float(biophysics.get_passive_property_for_section(section, 'AxialResistance').rescale('ohmcm').magnitude)
+
+            # Segmentation:
+            nrn_section.nseg = segmenter.get_num_segments(section)
+            sections[index] = nrn_section
+
+        # Section Connections:
+        for section in cell.morphology:
+            if section.is_a_root_section():
+                continue
+            sections[section_indexer[section]].connect(sections[section_indexer[section.parent]], 1.0, 0.0)
+
+        # (The HOC template connects any further root sections to
+        # themselves; here they are simply left as separate trees)
+
+        # Save the data about this cell:
+        nrnbuild_obj[MHocFileData.Cells][cell] = {
+            'cell': cell,
+            'section_indexer': section_indexer,
+            'sections': sections,
+            }
+
+        # Create the membrane properties:
+        for section in cell.morphology:
+            for mta in biophysics.get_resolved_mtas_for_section(section):
+                mta.mechanism.build_nrn_section(cell=cell,
+                        section=section, nrnbuild_obj=nrnbuild_obj, mta=mta)
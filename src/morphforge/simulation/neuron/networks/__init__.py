@@ -32,7 +32,7 @@
 from morphforge.simulation.neuron.simulationdatacontainers.mhocfile import MHocFileData
 from morphforge.simulation.neuron.simulationdatacontainers.mhocfile import MHOCSections
 from morphforge.simulation.neuron.objects.neuronobject import NEURONObject
-from Cheetah.Template import Template
+from morphforge.core import TemplateCache
 from morphforge.simulation.base.networks import Synapse
 from morphforge.simulation.base.networks import GapJunction
 from morphforge.simulation.neuron.biophysics.modfile import ModFile
@@ -151,7 +151,7 @@ class NEURONGapJunction(GapJunction, NEURONObject):
             }
 
         hocfile_obj.add_to_section(MHOCSections.InitGapJunction,
-                                   Template(_expr_tmpl, data).respond())
+                                   TemplateCache.render(_expr_tmpl, data))
 
         hocfile_obj[MHocFileData.GapJunctions][self] = data
 
@@ -42,6 +42,14 @@ class NEURONObject(NamedSimulationObject):
     def build_hoc(self, hocfile_obj):
         raise NotImplementedError()
 
+    def supports_nrn_build(self):
+        # Objects which implement build_nrn() return True. If any object in
+        # a simulation does not, the simulation is built from HOC instead:
+        return False
+
+    def build_nrn(self, nrnbuild_obj):
+        raise NotImplementedError()
+
     def build_mod(self, modfile_set):
         raise NotImplementedError()
 
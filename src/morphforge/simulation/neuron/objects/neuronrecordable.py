@@ -44,6 +44,9 @@ class NEURONRecordable(Recordable, NEURONObject):
     def build_hoc(self, hocfile_obj):
         raise NotImplementedError()
 
+    def build_nrn(self, nrnbuild_obj):
+        raise NotImplementedError()
+
     def build_mod(self, modfile_set):
         raise NotImplementedError()
 
@@ -64,6 +67,9 @@ class NEURONRecordableOnLocation(NEURONRecordable):
     def build_hoc(self, hocfile_obj):
         raise NotImplementedError()
 
+    def build_nrn(self, nrnbuild_obj):
+        raise NotImplementedError()
+
     def build_mod(self, modfile_set):
         raise NotImplementedError()
 
@@ -56,6 +56,20 @@ class NeuronSimSetupObj(NEURONObject):
         hocfile_obj.add_to_section(MHOCSections.InitSimParams, """dt=%s"""%(self.simsettings["dt"].rescale("ms").magnitude))
         hocfile_obj.add_to_section(MHOCSections.InitRecords, "\n".join(["objref rect", "rect = new Vector()", "rect.record(&t)"]))
 
+    def supports_nrn_build(self):
+        return True
+
+    def build_nrn(self, nrnbuild_obj):
+        h = nrnbuild_obj.h
+        h.load_file('noload.hoc')
+
+        if self.simsettings['cvode']:
+            h.cvode_active(1)
+
+        h.tstop = float(self.simsettings['tstop'].rescale('ms').magnitude)
+        h.dt = float(self.simsettings['dt'].rescale('ms').magnitude)
+        nrnbuild_obj.time_vector = nrnbuild_obj.create_record_vector(h._ref_t)
+
     def build_mod(self, modfile_set):
         pass
 
@@ -36,6 +36,7 @@ from morphforge.simulation.neuron.simulationdatacontainers import MHocFileData
 from morphforge.core.quantities import unit
 from morphforge.simulation.neuron.hocmodbuilders.hocmodutils import HocModUtils
 from morphforge.simulation.neuron.hocmodbuilders import HocBuilder
+from morphforge.simulation.neuron.hocmodbuilders import NrnBuilder
 from morphforge.simulation.neuron.objects.neuronrecordable import NEURONRecordable
 from morphforge.simulation.base.stimulation import CurrentClampStepChange
 from morphforge.simulation.neuron.core.neuronsimulationenvironment import NEURONEnvironment
@@ -62,6 +63,13 @@ class CurrentClampCurrentRecord(NEURONRecordable):
                         objvar='i',
                         recordobj=self)
 
+    def supports_nrn_build(self):
+        return True
+
+    def build_nrn(self, nrnbuild_obj):
+        stim = nrnbuild_obj[MHocFileData.CurrentClamps][self.cclamp]['stim']
+        nrnbuild_obj.create_record_from_object(recordobj=self, obj=stim, objvar='i')
+
     def build_mod(self, modfile_set):
         pass
 
@@ -79,6 +87,13 @@ class NEURONCurrentClampStepChange(CurrentClampStepChange, NEURONObject):
         HocBuilder.CurrentClamp(hocfile_obj=hocfile_obj,
                                 currentclamp=self)
 
+    def supports_nrn_build(self):
+        return True
+
+    def build_nrn(self, nrnbuild_obj):
+        NrnBuilder.CurrentClamp(nrnbuild_obj=nrnbuild_obj,
+                                currentclamp=self)
+
     def build_mod(self, modfile_set):
         pass
 
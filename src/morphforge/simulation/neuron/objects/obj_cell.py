@@ -35,24 +35,25 @@ from neuronobject import NEURONObject
 from morphforge.simulation.base import Cell
 
 from morphforge.simulation.neuron.hocmodbuilders import HocBuilder
+from morphforge.simulation.neuron.hocmodbuilders import HocModUtils
+from morphforge.simulation.neuron.hocmodbuilders import NrnBuilder
 from morphforge.simulation.neuron.simulationdatacontainers import MHocFileData
 from morphforge.simulation.neuron.simulationdatacontainers import MHOCSections
 from morphforge.simulation.neuron.objects.neuronrecordable import NEURONRecordable
 
-from Cheetah.Template import Template
+from morphforge.core import TemplateCache
 from morphforge.constants.standardtags import StandardTags
 
 
 class MembraneVoltageRecord(NEURONRecordable):
 
-    initial_buffer_size = 50000
-
     _tmpl_str_obj_ref = """
 objref $recVecName
 $recVecName = new Vector()
-${recVecName}.buffer_size(%d)
-${recVecName}.record(& ${cellname}.internalsections[${sectionindex}].v ($sectionpos))
-    """ % initial_buffer_size
+${recVecName}.buffer_size($buffer_size)
+$record_setup
+${recVecName}.record(& ${cellname}.internalsections[${sectionindex}].v ($sectionpos)${record_args})
+    """
 
     def __init__(self, cell, cell_location=None, **kwargs):
         super(MembraneVoltageRecord, self).__init__(**kwargs)
@@ -86,13 +87,21 @@ ${recVecName}.record(& ${cellname}.internalsections[${sectionindex}].v ($section
             'sectionindex': section_index,
             'sectionpos': self.cell_location.morphlocation.sectionpos,
             }
+        tmpl_dict.update(HocModUtils.get_record_sampling(self, self.name))
         #print tmpl_dict
 
-        sect_txt = Template(MembraneVoltageRecord._tmpl_str_obj_ref, tmpl_dict).respond()
+        sect_txt = TemplateCache.render(MembraneVoltageRecord._tmpl_str_obj_ref, tmpl_dict)
         hocfile_obj.add_to_section(MHOCSections.InitRecords, sect_txt)
 
         hocfile_obj[MHocFileData.Recordables][self] = tmpl_dict
 
+    def supports_nrn_build(self):
+        return True
+
+    def build_nrn(self, nrnbuild_obj):
+        segment = nrnbuild_obj.get_segment(self.cell_location)
+        nrnbuild_obj.create_record(self, segment._ref_v)
+
     def build_mod(self, modfile_set):
         pass
 
@@ -102,6 +111,13 @@ class NEURONCell(Cell, NEURONObject):
     def build_hoc(self, hocfile_obj):
         HocBuilder.Cell(hocfile_obj=hocfile_obj, cell=self)
 
+    def supports_nrn_build(self):
+        return all([mta.mechanism.supports_nrn_build() for mta in
+                    self.get_biophysics().appliedmechanisms])
+
+    def build_nrn(self, nrnbuild_obj):
+        NrnBuilder.Cell(nrnbuild_obj=nrnbuild_obj, cell=self)
+
     def build_mod(self, modfile_set):
         mechanisms = set([mta.mechanism for mta in
                          self.get_biophysics().appliedmechanisms])
@@ -36,6 +36,7 @@ from morphforge.simulation.neuron.simulationdatacontainers import MHocFileData
 from morphforge.core.quantities import unit
 from morphforge.simulation.neuron.hocmodbuilders.hocmodutils import HocModUtils
 from morphforge.simulation.neuron.hocmodbuilders import HocBuilder
+from morphforge.simulation.neuron.hocmodbuilders import NrnBuilder
 from morphforge.simulation.neuron.objects.neuronrecordable import NEURONRecordable
 from morphforge.constants.standardtags import StandardTags
 from morphforge.simulation.neuron.core.neuronsimulationenvironment import NEURONEnvironment
@@ -59,6 +60,13 @@ class VoltageClampCurrentRecord(NEURONRecordable):
                 vecname='RecVec%s' % self.name, objname=obj_name_hoc,
                 objvar='i', recordobj=self)
 
+    def supports_nrn_build(self):
+        return True
+
+    def build_nrn(self, nrnbuild_obj):
+        stim = nrnbuild_obj[MHocFileData.VoltageClamps][self.vclamp]['stim']
+        nrnbuild_obj.create_record_from_object(recordobj=self, obj=stim, objvar='i')
+
     def build_mod(self, modfile_set):
         pass
 
@@ -72,6 +80,13 @@ class NEURONVoltageClampStepChange(VoltageClampStepChange, NEURONObject):
         HocBuilder.VoltageClamp(hocfile_obj=hocfile_obj,
                                 voltageclamp=self)
 
+    def supports_nrn_build(self):
+        return True
+
+    def build_nrn(self, nrnbuild_obj):
+        NrnBuilder.VoltageClamp(nrnbuild_obj=nrnbuild_obj,
+                                voltageclamp=self)
+
     def build_mod(self, modfile_set):
         pass
 
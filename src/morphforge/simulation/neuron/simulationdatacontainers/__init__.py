@@ -32,5 +32,6 @@
 from mhocfile import MHOCSections, MHocFileData, MHocFile
 
 from mmodfileset import MModFileSet
+from mnrnbuild import MNrnBuild
 
-__all__ = ['MHOCSections', 'MHocFileData', 'MHocFile', 'MModFileSet']
+__all__ = ['MHOCSections', 'MHocFileData', 'MHocFile', 'MModFileSet', 'MNrnBuild']
@@ -69,6 +69,7 @@ class MHocFileData(object):
     VoltageClamps = 'VoltageClamps'
     Synapses = 'Synapses'
     GapJunctions = 'GapJunctions'
+    CellTemplates = 'CellTemplates'
     root_infos = [
         Cells,
         Recordables,
@@ -76,6 +77,7 @@ class MHocFileData(object):
         VoltageClamps,
         Synapses,
         GapJunctions,
+        CellTemplates,
         ]
 
 
@@ -30,6 +30,14 @@
 # ----------------------------------------------------------------------
 
 
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+
+
+def _ensure_built(modfile):
+    modfile.ensure_built()
+
+
 class MModFileSet(object):
 
     def __init__(self):
@@ -41,8 +49,20 @@ class MModFileSet(object):
             self._modfiles[md5] = modfile
 
     def build_all(self):
-        for m in self._modfiles.values():
-            m.ensure_built()
+        # Modfiles are compiled in parallel; most of the time is spent in
+        # nocmodl, modlunit and libtool subprocesses, so threads are enough:
+        modfiles = self._modfiles.values()
+        if len(modfiles) < 2:
+            for m in modfiles:
+                m.ensure_built()
+            return
+
+        pool = ThreadPool(processes=min(len(modfiles), multiprocessing.cpu_count()))
+        try:
+            pool.map(_ensure_built, modfiles)
+        finally:
+            pool.close()
+            pool.join()
 
     def __iter__(self):
         return iter(self._modfiles.values())
@@ -0,0 +1,118 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+from morphforge.simulation.neuron.simulationdatacontainers.mhocfile import MHocFileData
+
+
+class MNrnBuild(object):
+
+    """ The NEURON objects of a simulation, built directly through ``neuron.h``.
+
+    This is the counterpart of MHocFile, for simulation objects which
+    implement ``build_nrn()``. The information is stored under the same
+    MHocFileData keys, and references to the sections, point-processes and
+    vectors are held here, so they are not garbage collected by NEURON
+    before the simulation has run.
+    """
+
+    initial_buffer_size = 50000
+
+    def __setitem__(self, key, value):
+        self.info[key] = value
+
+    def __getitem__(self, key):
+        if not key in self.info:
+            return None
+        return self.info[key]
+
+    def __init__(self, h):
+        self.h = h
+        _info = [(inf, {}) for inf in MHocFileData.root_infos]
+        self.info = dict(_info)
+        self.time_vector = None
+
+    def get_segment(self, cell_location):
+        cell_nrn = self.info[MHocFileData.Cells][cell_location.cell]
+        section = cell_location.morphlocation.section
+        nrn_section = cell_nrn['sections'][cell_nrn['section_indexer'][section]]
+        return nrn_section(cell_location.morphlocation.sectionpos)
+
+    def get_section(self, cell, section):
+        cell_nrn = self.info[MHocFileData.Cells][cell]
+        return cell_nrn['sections'][cell_nrn['section_indexer'][section]]
+
+    def create_record_vector(self, ref):
+        vec = self.h.Vector()
+        vec.buffer_size(MNrnBuild.initial_buffer_size)
+        vec.record(ref)
+        return vec
+
+    def create_record(self, recordobj, ref):
+        sampling = recordobj.sampling
+        if sampling is None or sampling.is_every_step():
+            vec = self.create_record_vector(ref)
+            self.info[MHocFileData.Recordables][recordobj] = {'vector': vec}
+            return vec
+
+        # Let NEURON sample the variable; either at given times in a window,
+        # or with a fixed interval:
+        simsettings = recordobj.simulation.simsettings
+        vec = self.h.Vector()
+        vec.buffer_size(sampling.get_n_samples(simsettings['tstop'], simsettings['dt']))
+        details = {'vector': vec}
+        record_times = sampling.get_record_times(simsettings['dt'])
+        if record_times is not None:
+            record_times_vec = self.h.Vector(record_times)
+            vec.record(ref, record_times_vec)
+            details['record_times'] = record_times_vec
+        else:
+            vec.record(ref, float(sampling.get_simulator_interval().rescale('ms').magnitude))
+        self.info[MHocFileData.Recordables][recordobj] = details
+        return vec
+
+    def create_record_from_modfile(self, recordobj, cell_location, modvariable, mod_neuronsuffix):
+        segment = self.get_segment(cell_location)
+        ref = getattr(segment, '_ref_%s_%s' % (modvariable, mod_neuronsuffix))
+        return self.create_record(recordobj, ref)
+
+    def create_record_from_object(self, recordobj, obj, objvar):
+        return self.create_record(recordobj, getattr(obj, '_ref_%s' % objvar))
+
+    def insert_mechanism(self, cell, section, mta, neuron_suffix, units):
+        nrn_section = self.get_section(cell, section)
+        nrn_section.insert(neuron_suffix)
+
+        # (Setting a range variable on the section sets it in every segment,
+        # as the HOC assignment does):
+        for variable_name in mta.mechanism.get_variables():
+            variable_value_with_unit = mta.applicator.get_variable_value_for_section(variable_name=variable_name, section=section)
+            variable_value_nounit = variable_value_with_unit.rescale(units[variable_name]).magnitude
+            setattr(nrn_section, '%s_%s' % (variable_name, neuron_suffix), float(variable_value_nounit))
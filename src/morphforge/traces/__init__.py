@@ -30,6 +30,7 @@
 # ----------------------------------------------------------------------
 
 from tracetypes import TraceFixedDT
+from tracetypes import TraceFixedDTChunked
 from tracetypes import TraceVariableDT
 from tracetypes import TracePointBased
 from tracetypes import TracePiecewise
@@ -43,11 +44,13 @@ import morphforge.traces.operators
 
 from morphforge.traces.traceobjpluginctrl import TraceOperatorCtrl
 from morphforge.traces.traceobjpluginctrl import TraceMethodCtrl
+from morphforge.traces.operators.trace_expression import TraceExpression
 
 from tags import TagSelector
 
 __all__ = [
     'TraceFixedDT',
+    'TraceFixedDTChunked',
     'TraceVariableDT',
     'TracePointBased',
     'TracePiecewise',
@@ -57,5 +60,6 @@ __all__ = [
     'TagSelector',
     'TraceOperatorCtrl',
     'TraceMethodCtrl',
+    'TraceExpression',
     ]
 
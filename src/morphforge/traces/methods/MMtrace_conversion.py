@@ -33,6 +33,7 @@ from morphforge.traces.tracetypes.tracevariabledt import TraceVariableDT
 
 from morphforge.traces.tracetypes import TracePointBased
 from morphforge.core.quantities.fromcore import unit
+from morphforge.core.mgrs.logmgr import LogMgr
 
 import numpy as np
 
@@ -56,9 +57,17 @@ class TraceConverter(object):
 
 
     @classmethod
-    def reduce_to_variable_dt_trace(cls, original_trace, epsilon):
+    def reduce_to_variable_dt_trace(cls, original_trace, epsilon, chunk_size=None):
+        """ Simplify a trace with the Douglas-Peucker algorithm, keeping the
+        points needed so that no point is further than 'epsilon' from the
+        new trace, (measured on the magnitudes of the time and data).
+
+        If 'chunk_size' is given, the trace is simplified in chunks of that
+        many points, (the ends of each chunk are always kept), which limits
+        the memory and time used for very long traces.
+        """
         assert isinstance(original_trace, TracePointBased)
-        epsilon = unit(epsilon)
+        tolerance = _get_tolerance(epsilon, original_trace.data_unit)
 
         time_units = original_trace.time_unit
         time_data = original_trace.time_pts_np
@@ -66,85 +75,89 @@ class TraceConverter(object):
         data_units = original_trace.data_unit
         data_data = original_trace.data_pts_np
 
+        if chunk_size is None:
+            keep = _simplify_indices(time_data, data_data, tolerance)
+        else:
+            keep = _simplify_indices_chunked(time_data, data_data, tolerance, chunk_size)
 
-        pts = zip(time_data.tolist(), data_data.tolist())
-
-        newpts = _simplify_points(pts, epsilon)
-        (new_time, new_data) = zip(*newpts)
-
-        new_trace = TraceVariableDT(np.array(new_time) * time_units,
-                                    np.array(new_data) * data_units,
+        new_trace = TraceVariableDT(time_data[keep] * time_units,
+                                    data_data[keep] * data_units,
                                     name=original_trace.name,
                                     comment=original_trace.comment,
                                     tags=original_trace.tags)
 
-        print 'Simplified from N=%d to N=%d' % (original_trace.get_n(),
-                new_trace.get_n())
+        LogMgr.info('Simplified %s from N=%d to N=%d' % (original_trace.name,
+                    original_trace.get_n(), new_trace.get_n()))
         return new_trace
 
 
-import math
+def _get_tolerance(epsilon, data_units):
+    # Epsilons with the same dimensions as the data are rescaled into the
+    # data units; otherwise the magnitude is used as it is:
+    if isinstance(epsilon, (int, float)):
+        return float(epsilon)
+    epsilon = unit(epsilon)
+    if epsilon.dimensionality.simplified == data_units.dimensionality.simplified:
+        epsilon = epsilon.rescale(data_units)
+    return float(epsilon.magnitude)
+
+
+def _simplify_indices(x, y, tolerance):
+    """ The indices of the points kept by Douglas-Peucker simplification of
+    the points (x,y). The distances of all the points of a segment to the
+    line between its ends are calculated as a single array operation."""
 
-def _simplify_points (pts, tolerance):
-    anchor = 0
-    floater = len(pts) - 1
-    stack = []
-    keep = set()
+    n = len(x)
+    tolerance_sq = tolerance ** 2
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[n - 1] = True
 
-    stack.append((anchor, floater))
+    stack = [(0, n - 1)]
     while stack:
         (anchor, floater) = stack.pop()
-
-        # initialize line segment
-        if pts[floater] != pts[anchor]:
-            anchor_x = float(pts[floater][0] - pts[anchor][0])
-            anchor_y = float(pts[floater][1] - pts[anchor][1])
-            seg_len = math.sqrt(anchor_x ** 2 + anchor_y ** 2)
-            # get the unit vector
-            anchor_x /= seg_len
-            anchor_y /= seg_len
-        else:
-            anchor_x = anchor_y = seg_len = 0.0
-
-        # inner loop:
-        max_dist = 0.0
-        farthest = anchor + 1
-        for i in range(anchor + 1, floater):
-            dist_to_seg = 0.0
-            # compare to anchor
-            vec_x = float(pts[i][0] - pts[anchor][0])
-            vec_y = float(pts[i][1] - pts[anchor][1])
-            seg_len = math.sqrt(vec_x ** 2 + vec_y ** 2)
-            # dot product:
-            proj = vec_x * anchor_x + vec_y * anchor_y
-            if proj < 0.0:
-                dist_to_seg = seg_len
-            else:
-                # compare to floater
-                vec_x = float(pts[i][0] - pts[floater][0])
-                vec_y = float(pts[i][1] - pts[floater][1])
-                seg_len = math.sqrt(vec_x ** 2 + vec_y ** 2)
-                # dot product:
-                proj = vec_x * -anchor_x + vec_y * -anchor_y
-                if proj < 0.0:
-                    dist_to_seg = seg_len
-                else:
-                    # calculate perpendicular distance to line (pythagorean theorem):
-                    dist_to_seg = math.sqrt(abs(seg_len ** 2 - proj ** 2))
-                if max_dist < dist_to_seg:
-                    max_dist = dist_to_seg
-                    farthest = i
-
-        if max_dist <= tolerance:  # use line segment
-            keep.add(anchor)
-            keep.add(floater)
-        else:
+        if floater - anchor < 2:
+            continue
+
+        seg_x = x[floater] - x[anchor]
+        seg_y = y[floater] - y[anchor]
+        seg_len_sq = seg_x ** 2 + seg_y ** 2
+
+        vec_x = x[anchor + 1:floater] - x[anchor]
+        vec_y = y[anchor + 1:floater] - y[anchor]
+
+        # (Squared) distance to the nearest point on the segment:
+        if seg_len_sq > 0.0:
+            proj = vec_x * seg_x
+            proj += vec_y * seg_y
+            proj /= seg_len_sq
+            np.clip(proj, 0.0, 1.0, out=proj)
+            vec_x -= proj * seg_x
+            vec_y -= proj * seg_y
+        vec_x *= vec_x
+        vec_y *= vec_y
+        vec_x += vec_y
+        dists_sq = vec_x
+
+        i_max = np.argmax(dists_sq)
+        if dists_sq[i_max] > tolerance_sq:
+            farthest = anchor + 1 + i_max
+            keep[farthest] = True
             stack.append((anchor, farthest))
             stack.append((farthest, floater))
 
-    keep = list(keep)
-    keep.sort()
-    return [pts[i] for i in keep]
+    return np.nonzero(keep)[0]
+
+
+def _simplify_indices_chunked(x, y, tolerance, chunk_size):
+    # Consecutive chunks share their end points:
+    assert chunk_size >= 2
+    n = len(x)
+    indices = []
+    for start in range(0, n - 1, chunk_size - 1):
+        stop = min(start + chunk_size, n)
+        chunk_keep = _simplify_indices(x[start:stop], y[start:stop], tolerance) + start
+        indices.append(chunk_keep if not indices else chunk_keep[1:])
+    return np.concatenate(indices)
 
 
 class TraceApproximator(object):
@@ -36,6 +36,7 @@ import trace_methods_std_splicing
 import trace_methods_std_filters
 import trace_methods_std_conversions
 import trace_methods_std_fft
-#import trace_methods_std_integrate
+import trace_methods_std_integrate
+import trace_methods_std_spikes
 
 from MMtrace_conversion import TraceApproximator, TraceConverter
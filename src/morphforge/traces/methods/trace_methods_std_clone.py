@@ -39,16 +39,16 @@ from morphforge.traces.tracetypes import TraceFixedDT
 import copy
 
 def _clone_fixed(tr):
-    tr_new = TraceFixedDT( 
-            time = np.copy( tr.time_pts_np) * tr.time_units,
-            data = np.copy( tr.data_pts_np) * tr.data_units )
+    tr_new = TraceFixedDT.from_magnitudes(
+            time=np.copy(tr.time_pts_np), time_unit=tr.time_unit,
+            data=np.copy(tr.data_pts_np), data_unit=tr.data_unit)
     copy_trace_attrs(tr, tr_new, comment='+(cloned)')
     return tr_new
 
 def _clone_variable(tr):
-    tr_new = TraceVariableDT(
-            time = np.copy( tr.time_pts_np) * tr.time_units,
-            data = np.copy( tr.data_pts_np) * tr.data_units )
+    tr_new = TraceVariableDT.from_magnitudes(
+            time=np.copy(tr.time_pts_np), time_unit=tr.time_unit,
+            data=np.copy(tr.data_pts_np), data_unit=tr.data_unit)
     copy_trace_attrs(tr, tr_new, comment='+(cloned)')
     return tr_new
 
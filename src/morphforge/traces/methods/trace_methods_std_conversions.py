@@ -50,12 +50,12 @@ TraceMethodCtrl.register(TracePiecewise, 'convert_to_fixed', lambda tr, dt: copy
 TraceMethodCtrl.register(
         TraceFixedDT,
         'convert_to_variable', 
-        lambda tr, eps: copy_trace_attrs(tr_old=tr, tr_new=TraceConverter.reduce_to_variable_dt_trace(original_trace=tr, epsilon=eps)))
+        lambda tr, eps, chunk_size=None: copy_trace_attrs(tr_old=tr, tr_new=TraceConverter.reduce_to_variable_dt_trace(original_trace=tr, epsilon=eps, chunk_size=chunk_size)))
 
 TraceMethodCtrl.register(
         TraceVariableDT,
         'convert_to_variable', 
-        lambda tr, eps: copy_trace_attrs(tr_old=tr, tr_new=TraceConverter.reduce_to_variable_dt_trace(original_trace=tr, epsilon=eps)))
+        lambda tr, eps, chunk_size=None: copy_trace_attrs(tr_old=tr, tr_new=TraceConverter.reduce_to_variable_dt_trace(original_trace=tr, epsilon=eps, chunk_size=chunk_size)))
 # MISSING: PIECEWISE
 
 
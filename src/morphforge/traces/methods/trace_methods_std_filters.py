@@ -32,70 +32,126 @@
 from morphforge.traces.traceobjpluginctrl import copy_trace_attrs
 from morphforge.traces.traceobjpluginctrl import TraceMethodCtrl
 from morphforge.traces import TraceFixedDT
+from morphforge.traces import TraceFixedDTChunked
 
 import quantities as pq
 import numpy as np
 
-        
-def _butterworthfilter(tr, filterorder, cutoff_frequency):
+
+def _lfilter_chunked(tr, coeff_num, coeff_denom, time_shift=None):
+    # Filter the trace a chunk at a time, carrying the state of the filter
+    # across the chunks, into a new file:
+    import scipy.signal
+    filteredsignal = TraceFixedDTChunked.create_data_file(tr.get_n())
+    zi = np.zeros(max(len(coeff_num), len(coeff_denom)) - 1)
+    for (start, _time, data) in tr.iter_chunks():
+        (filteredsignal[start:start + len(data)], zi) = scipy.signal.lfilter(coeff_num, coeff_denom, data, zi=zi)
+    filteredsignal.flush()
+
+    t0 = tr.get_min_time() if time_shift is None else tr.get_min_time() - time_shift
+    return TraceFixedDTChunked(data=filteredsignal, data_unit=tr.data_unit,
+                               t0=t0, dt=tr.get_dt_new())
+
+
+def _butterworth_coefficients(tr, filterorder, cutoff_frequency):
     cutoff_frequency.rescale('Hz')
     import scipy.signal
     frequency_hz = 1 / float(tr.get_dt_new().rescale('s'))
     n_frq_hz = frequency_hz / 2.0
 
     cuttoff_norm = cutoff_frequency / n_frq_hz
-    (coeff_num, coeff_denom) = scipy.signal.filter_design.butter(filterorder, cuttoff_norm)
+    return scipy.signal.filter_design.butter(filterorder, cuttoff_norm)
+
+
+def _butterworthfilter(tr, filterorder, cutoff_frequency):
+    import scipy.signal
+    (coeff_num, coeff_denom) = _butterworth_coefficients(tr, filterorder, cutoff_frequency)
     filteredsignal = scipy.signal.lfilter(coeff_num, coeff_denom, tr.data_pts_np)
 
-    tr_new = TraceFixedDT(time=tr.time_pts, data=filteredsignal * tr.data_unit,)
+    tr_new = TraceFixedDT.from_magnitudes(time=tr.time_pts_np, time_unit=tr.time_unit,
+                                          data=filteredsignal, data_unit=tr.data_unit)
+    copy_trace_attrs(tr, tr_new, comment="+(Butterworth Filtered)" )
+    return tr_new
+
+
+def _butterworthfilter_chunked(tr, filterorder, cutoff_frequency):
+    (coeff_num, coeff_denom) = _butterworth_coefficients(tr, filterorder, cutoff_frequency)
+    tr_new = _lfilter_chunked(tr, coeff_num, coeff_denom)
     copy_trace_attrs(tr, tr_new, comment="+(Butterworth Filtered)" )
     return tr_new
 
 
 TraceMethodCtrl.register(TraceFixedDT, 'filterbutterworth', _butterworthfilter, can_fallback_to_fixed_trace=True)
+TraceMethodCtrl.register(TraceFixedDTChunked, 'filterbutterworth', _butterworthfilter_chunked)
 
 
 
 
-def _besselfilter(tr, filterorder, cutoff_frequency):
+def _bessel_coefficients(tr, filterorder, cutoff_frequency):
     cutoff_frequency.rescale('Hz')
     import scipy.signal
     frequency_hz = 1 / float(tr.get_dt_new().rescale('s'))
     n_frq_hz = frequency_hz / 2.0
 
     cuttoff_norm = cutoff_frequency / n_frq_hz
-    (coeff_num, coeff_denom) = scipy.signal.filter_design.bessel(filterorder, cuttoff_norm)
+    return scipy.signal.filter_design.bessel(filterorder, cuttoff_norm)
+
+
+def _besselfilter(tr, filterorder, cutoff_frequency):
+    import scipy.signal
+    (coeff_num, coeff_denom) = _bessel_coefficients(tr, filterorder, cutoff_frequency)
     filteredsignal = scipy.signal.lfilter(coeff_num, coeff_denom, tr.data_pts_np)
 
     time_shift = tr.get_dt_new() * max(len(coeff_denom), len(coeff_num))
 
-    tr_new = TraceFixedDT(time=tr.time_pts - time_shift,
-                          data=filteredsignal * tr.data_unit,
-                         )
+    time_shift = float(time_shift.rescale(tr.time_unit).magnitude)
+    tr_new = TraceFixedDT.from_magnitudes(time=tr.time_pts_np - time_shift, time_unit=tr.time_unit,
+                                          data=filteredsignal, data_unit=tr.data_unit)
+    copy_trace_attrs(tr, tr_new, comment="+(Bessel Filtered)" )
+    return tr_new
+
+
+def _besselfilter_chunked(tr, filterorder, cutoff_frequency):
+    (coeff_num, coeff_denom) = _bessel_coefficients(tr, filterorder, cutoff_frequency)
+    time_shift = tr.get_dt_new() * max(len(coeff_denom), len(coeff_num))
+    tr_new = _lfilter_chunked(tr, coeff_num, coeff_denom, time_shift=time_shift)
     copy_trace_attrs(tr, tr_new, comment="+(Bessel Filtered)" )
     return tr_new
 
 
 TraceMethodCtrl.register(TraceFixedDT, 'filterbessel', _besselfilter, can_fallback_to_fixed_trace=True)
+TraceMethodCtrl.register(TraceFixedDTChunked, 'filterbessel', _besselfilter_chunked)
 
 
-def _filterlowpassrc(tr, tau):
-    import scipy.signal
-    assert isinstance(tr, TraceFixedDT)
+def _lowpassrc_coefficients(tr, tau):
     dt = tr.get_dt_new()
     k = 1. / tau * dt
     k = float(k.rescale(pq.dimensionless))
 
     coeff_denom = np.array([1, k - 1])
     coeff_num = np.array([0, k])
+    return (coeff_num, coeff_denom)
+
+
+def _filterlowpassrc(tr, tau):
+    import scipy.signal
+    assert isinstance(tr, TraceFixedDT)
+    (coeff_num, coeff_denom) = _lowpassrc_coefficients(tr, tau)
 
     xp = scipy.signal.lfilter(coeff_num, coeff_denom, tr.data_pts_np)
-    tr_new = TraceFixedDT(time=tr.time_pts,
-                          data=xp * tr.data_unit,
-                         )
+    tr_new = TraceFixedDT.from_magnitudes(time=tr.time_pts_np, time_unit=tr.time_unit,
+                                          data=xp, data_unit=tr.data_unit)
+    copy_trace_attrs(tr, tr_new, comment="+(LP RC Filtered)" )
+    return tr_new
+
+
+def _filterlowpassrc_chunked(tr, tau):
+    (coeff_num, coeff_denom) = _lowpassrc_coefficients(tr, tau)
+    tr_new = _lfilter_chunked(tr, coeff_num, coeff_denom)
     copy_trace_attrs(tr, tr_new, comment="+(LP RC Filtered)" )
     return tr_new
 
 
 TraceMethodCtrl.register(TraceFixedDT, 'filterlowpassrc', _filterlowpassrc, can_fallback_to_fixed_trace=True)
+TraceMethodCtrl.register(TraceFixedDTChunked, 'filterlowpassrc', _filterlowpassrc_chunked)
 
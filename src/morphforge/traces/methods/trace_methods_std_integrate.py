@@ -31,7 +31,8 @@
 
 from morphforge.traces.traceobjpluginctrl import TraceMethodCtrl
 from morphforge.traces import TraceFixedDT
-#import numpy as np
+from morphforge.traces import TraceFixedDTChunked
+import numpy as np
 #import quantities as pq
 #import operator
 from morphforge.traces.tracetypes import TracePiecewise, PieceWiseComponentVisitor
@@ -46,6 +47,26 @@ def _integrate_pointbased(tr, ):
 TraceMethodCtrl.register(TraceFixedDT, 'integrate', _integrate_pointbased)
 
 
+def _integrate_chunked(tr):
+    # Simpson's rule over chunks which share their end points; (each chunk
+    # but the last has an even number of intervals, so the chunk boundaries
+    # fall between Simpson's panels):
+    import scipy.integrate
+    from morphforge.core.mgrs import SettingsMgr
+    chunk_intervals = max(2, SettingsMgr.get_trace_chunk_size() // 2 * 2)
+    dt = float(tr.get_dt_new().magnitude)
+    data = tr.data_pts_np
+    n = tr.get_n()
+
+    total = 0.0
+    for start in range(0, n - 1, chunk_intervals):
+        stop = min(start + chunk_intervals, n - 1)
+        total += scipy.integrate.simps(y=np.asarray(data[start:stop + 1]), dx=dt)
+    return total * tr.data_unit * tr.time_unit
+
+TraceMethodCtrl.register(TraceFixedDTChunked, 'integrate', _integrate_chunked)
+
+
 
 
 
@@ -53,7 +74,7 @@ class PiecewiseIntegrator(PieceWiseComponentVisitor):
 
     @classmethod
     def visit_linear(cls, o):
-        return 0.5 * (o.time_window[1]-o.time_window[0]) * (o.x1-o.x0)
+        return 0.5 * (o.time_window[1]-o.time_window[0]) * (o.x0+o.x1)
 
     @classmethod
     def visit_flat(cls, o ):
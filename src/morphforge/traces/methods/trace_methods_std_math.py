@@ -37,11 +37,12 @@ import numpy as np
 # Mean, rms, stddev, variance functions:
 ##############################
 
-# For FixedDT traces, these are simple:
-TraceMethodCtrl.register(TraceFixedDT, 'mean',   lambda tr: np.mean(tr.data_pts))
-TraceMethodCtrl.register(TraceFixedDT, 'stddev', lambda tr: np.std(tr.data_pts))
-TraceMethodCtrl.register(TraceFixedDT, 'var',    lambda tr: np.var(tr.data_pts))
-TraceMethodCtrl.register(TraceFixedDT, 'rms',    lambda tr: np.sqrt(np.mean(tr.data_pts**2)))
+# For FixedDT traces, these are simple. (They are calculated on the
+# magnitudes, and the units attached to the result):
+TraceMethodCtrl.register(TraceFixedDT, 'mean',   lambda tr: np.mean(tr.data_pts_np) * tr.data_unit)
+TraceMethodCtrl.register(TraceFixedDT, 'stddev', lambda tr: np.std(tr.data_pts_np) * tr.data_unit)
+TraceMethodCtrl.register(TraceFixedDT, 'var',    lambda tr: np.var(tr.data_pts_np) * tr.data_unit ** 2)
+TraceMethodCtrl.register(TraceFixedDT, 'rms',    lambda tr: np.sqrt(np.mean(tr.data_pts_np ** 2)) * tr.data_unit)
 
 # For VariableDT traces
 
@@ -65,8 +66,8 @@ TraceMethodCtrl.register(TraceVariableDT, 'mean', _variabledt_mean)
 
 # PTP Functions:
 ################
-TraceMethodCtrl.register(TraceFixedDT,    'ptp',  lambda tr: np.ptp(tr.data_pts))
-TraceMethodCtrl.register(TraceVariableDT, 'ptp',  lambda tr: np.ptp(tr.data_pts))
+TraceMethodCtrl.register(TraceFixedDT,    'ptp',  lambda tr: np.ptp(tr.data_pts_np) * tr.data_unit)
+TraceMethodCtrl.register(TraceVariableDT, 'ptp',  lambda tr: np.ptp(tr.data_pts_np) * tr.data_unit)
 TraceMethodCtrl.register(TracePiecewise,  'ptp',  lambda tr: tr.max[1] - tr.min[1])
 
 
@@ -77,12 +78,12 @@ TraceMethodCtrl.register(TracePiecewise,  'ptp',  lambda tr: tr.max[1] - tr.min[
 # These also return the times of min/max:
 
 def _get_max(tr):
-    ind_max = np.argmax(tr.data_pts)
+    ind_max = np.argmax(tr.data_pts_np)
     return (tr.time_pts[ind_max], tr.data_pts[ind_max])
 
 
 def _get_min(tr):
-    ind_min = np.argmin(tr.data_pts)
+    ind_min = np.argmin(tr.data_pts_np)
     return (tr.time_pts[ind_min], tr.data_pts[ind_min])
 
 
@@ -100,10 +101,13 @@ TraceMethodCtrl.register(TraceVariableDT, 'min', _get_min)
 
 def _fixeddt_gradient(self, *args):
     # assert False, 'ToCheck'
-    tr_new = TraceFixedDT( 
-            time = self.time_pts,
-            data = np.gradient(self.data_pts_np, *args) * self.data_unit / self.get_dt_new()
-            )
+    dt = self.get_dt_new()
+    data_unit = (self.data_unit / dt).units
+    scale = float((self.data_unit / dt).magnitude)
+    tr_new = TraceFixedDT.from_magnitudes(
+            time=self.time_pts_np, time_unit=self.time_unit,
+            data=np.gradient(self.data_pts_np, *args) * scale,
+            data_unit=data_unit)
     copy_trace_attrs(self, tr_new, comment="+gradient")
     return tr_new
                             
@@ -0,0 +1,79 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+import numpy as np
+
+from morphforge.traces.traceobjpluginctrl import TraceMethodCtrl
+from morphforge.traces import TraceFixedDT
+from morphforge.traces import TraceVariableDT
+from morphforge.traces import TraceFixedDTChunked
+from morphforge.traces.eventset import EventSet
+
+
+def _find_upward_crossings(time, data, threshold):
+    # The (linearly interpolated) times at which 'data' rises through
+    # 'threshold':
+    indices = np.nonzero((data[:-1] < threshold) & (data[1:] >= threshold))[0]
+    frac = (threshold - data[indices]) / (data[indices + 1] - data[indices])
+    return time[indices] + frac * (time[indices + 1] - time[indices])
+
+
+def _build_spike_eventset(tr, times):
+    return EventSet([t * tr.time_unit for t in times],
+                    name='Spikes: %s' % tr.name,
+                    comment='Threshold crossings in %s' % tr.name)
+
+
+def _find_spikes_pointbased(tr, threshold):
+    threshold = float(threshold.rescale(tr.data_unit).magnitude)
+    times = _find_upward_crossings(tr.time_pts_np, tr.data_pts_np, threshold)
+    return _build_spike_eventset(tr, times)
+
+
+def _find_spikes_chunked(tr, threshold):
+    # Each chunk is joined to the last point of the previous one, so
+    # crossings at the boundaries are found:
+    threshold = float(threshold.rescale(tr.data_unit).magnitude)
+    times = []
+    last = None
+    for (_start, time, data) in tr.iter_chunks():
+        if last is not None:
+            time = np.concatenate(([last[0]], time))
+            data = np.concatenate(([last[1]], data))
+        times.extend(_find_upward_crossings(time, data, threshold))
+        last = (time[-1], data[-1])
+    return _build_spike_eventset(tr, times)
+
+
+TraceMethodCtrl.register(TraceFixedDT, 'find_spikes', _find_spikes_pointbased)
+TraceMethodCtrl.register(TraceVariableDT, 'find_spikes', _find_spikes_pointbased)
+TraceMethodCtrl.register(TraceFixedDTChunked, 'find_spikes', _find_spikes_chunked)
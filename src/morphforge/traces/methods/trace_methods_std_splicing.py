@@ -32,6 +32,7 @@
 from morphforge.traces import TraceFixedDT
 from morphforge.traces import TraceVariableDT
 from morphforge.traces import TracePointBased
+from morphforge.traces import TraceFixedDTChunked
 
 import numpy
 import numpy as np
@@ -45,9 +46,10 @@ from morphforge.traces.traceobjpluginctrl import copy_trace_attrs
 
 def _shift_pt_trace(trace, offset):
     tr_type = type(trace)
-    tr_new = tr_type(
-                time=trace.time_pts + offset,
-                data=trace.data_pts,)
+    offset_mag = float(offset.rescale(trace.time_unit).magnitude)
+    tr_new = tr_type.from_magnitudes(
+                time=trace.time_pts_np + offset_mag, time_unit=trace.time_unit,
+                data=trace.data_pts_np, data_unit=trace.data_unit)
     copy_trace_attrs(trace, tr_new, comment='+(Shifted %2.2f)' % offset)
     return tr_new
 
@@ -138,6 +140,35 @@ def _window_fixed_trace(trace, time_window):
 TraceMethodCtrl.register(TraceFixedDT, 'window', _window_fixed_trace)
 TraceMethodCtrl.register(TraceVariableDT, 'window', _window_fixed_trace)
 
+
+def _window_chunked_trace(trace, time_window):
+    # The window shares the data of the trace, (no data is read):
+    if isinstance(time_window, Quantity):
+        assert len(time_window) == 2
+        time_window = (time_window[0], time_window[1])
+    assert isinstance(time_window, tuple)
+    assert len(time_window) == 2
+
+    if time_window[0] is None:
+        time_window = (trace.get_min_time(), time_window[1])
+    if time_window[1] is None:
+        time_window = (time_window[0], trace.get_max_time())
+
+    if time_window[0] - trace.get_min_time() < 0:
+        raise ValueError('Windowing outside of trace (min)')
+    if time_window[1] - trace.get_max_time() > 0:
+        raise ValueError('Windowing outside of trace (max)')
+
+    # The points strictly inside the window:
+    i_start = trace.searchsorted(time_window[0], side='right')
+    i_stop = trace.searchsorted(time_window[1], side='left')
+    if i_stop - i_start < 2:
+        raise ValueError('Window contains less than 2 points')
+    return trace.get_chunk(i_start, i_stop, tags=trace.tags)
+
+
+TraceMethodCtrl.register(TraceFixedDTChunked, 'window', _window_chunked_trace)
+
 # WindowAndShift:
 #################
 TraceMethodCtrl.register(TraceFixedDT, 'windowshift', lambda tr, window: tr.window(window).shift(-1.0*window[0]))
@@ -36,3 +36,4 @@ import op_fixeddt_quantity
 import op_fixeddt_fixeddt
 import op_variabledt_scalar
 
+import trace_expression
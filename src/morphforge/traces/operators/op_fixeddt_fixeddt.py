@@ -33,6 +33,7 @@ import operator
 from morphforge.traces.tracetypes import TraceFixedDT
 from morphforge.core.quantities import NpPqWrappers
 from morphforge.traces.traceobjpluginctrl import TraceOperatorCtrl
+from morphforge.traces.operators.trace_unit_kernel import TraceUnitKernel
 
 
 class TraceOperator_TraceFixedDT_TraceFixedDT(object):
@@ -50,26 +51,36 @@ class TraceOperator_TraceFixedDT_TraceFixedDT(object):
         return NpPqWrappers.arange(min_time, max_time, new_dt)
 
     @classmethod
-    def do_add(cls, lhs, rhs):
+    def operate(cls, operator_type, lhs, rhs):
+        # Traces on the same time axis, (e.g. from the same simulation),
+        # can be combined point by point:
+        if TraceUnitKernel.have_same_time_axis(lhs, rhs):
+            return TraceUnitKernel.operate_traces(operator_type, lhs, rhs)
+
         time_axis = cls.get_new_time_axis(lhs, rhs)
-        return TraceFixedDT(time_axis, 
-                            lhs.get_values(time_axis) + rhs.get_values(time_axis))
+        lhs_values = lhs.get_values(time_axis)
+        rhs_values = rhs.get_values(time_axis)
+        (data, data_unit) = TraceUnitKernel.operate(operator_type,
+                lhs_values.magnitude, lhs_values.units,
+                rhs_values.magnitude, rhs_values.units)
+        return TraceFixedDT.from_magnitudes(time=time_axis.magnitude, time_unit=time_axis.units,
+                                            data=data, data_unit=data_unit)
+
+    @classmethod
+    def do_add(cls, lhs, rhs):
+        return cls.operate(operator.__add__, lhs, rhs)
 
     @classmethod
     def do_sub(cls, lhs, rhs):
-        time_axis = cls.get_new_time_axis(lhs, rhs)
-        return TraceFixedDT(time_axis, 
-                            lhs.get_values(time_axis) - rhs.get_values(time_axis))
+        return cls.operate(operator.__sub__, lhs, rhs)
 
     @classmethod
     def do_mul(cls, lhs, rhs):
-        time_axis = cls.get_new_time_axis(lhs, rhs)
-        return TraceFixedDT(time_axis, 
-                            lhs.get_values(time_axis) * rhs.get_values(time_axis))
+        return cls.operate(operator.__mul__, lhs, rhs)
+
     @classmethod
     def do_div(cls, lhs, rhs):
-        time_axis = cls.get_new_time_axis(lhs, rhs)
-        return TraceFixedDT(time_axis, lhs.get_values(time_axis) / rhs.get_values(time_axis))
+        return cls.operate(operator.__div__, lhs, rhs)
 
 
 # FixedDT (+-*/) FixedDT
@@ -35,6 +35,7 @@ import operator
 from morphforge.traces.tracetypes import TraceFixedDT
 
 from morphforge.traces.traceobjpluginctrl import TraceOperatorCtrl
+from morphforge.traces.operators.trace_unit_kernel import TraceUnitKernel
 
 
 class TraceOperator_TraceFixedDT_Quantity(object):
@@ -42,22 +43,22 @@ class TraceOperator_TraceFixedDT_Quantity(object):
     @classmethod
     def do_add(cls, lhs, rhs):
         assert (type(lhs) == TraceFixedDT and type(rhs) == pq.Quantity)
-        return TraceFixedDT(lhs.time_pts, lhs.data_pts + rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__add__, lhs, rhs.magnitude, rhs.units)
         
     @classmethod
     def do_sub(cls, lhs, rhs):
         assert (type(lhs) == TraceFixedDT and type(rhs) == pq.Quantity)
-        return TraceFixedDT(lhs.time_pts, lhs.data_pts - rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__sub__, lhs, rhs.magnitude, rhs.units)
         
     @classmethod
     def do_mul(cls, lhs, rhs):
         assert (type(lhs) == TraceFixedDT and type(rhs) == pq.Quantity) 
-        return TraceFixedDT(lhs.time_pts, lhs.data_pts * rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__mul__, lhs, rhs.magnitude, rhs.units)
         
     @classmethod
     def do_div(cls, lhs, rhs):
         assert (type(lhs) == TraceFixedDT and type(rhs) == pq.Quantity)
-        return TraceFixedDT(lhs.time_pts, lhs.data_pts / rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__div__, lhs, rhs.magnitude, rhs.units)
         
         
 
@@ -66,22 +67,22 @@ class TraceOperator_Quantity_TraceFixedDT(object):
     @classmethod
     def do_add(cls, lhs, rhs):
         assert type(rhs) == TraceFixedDT and type(lhs) == pq.Quantity
-        return TraceFixedDT(rhs.time_pts, lhs + rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__add__, rhs, lhs.magnitude, lhs.units, trace_is_lhs=False)
 
     @classmethod
     def do_sub(cls, lhs, rhs):
         assert type(rhs) == TraceFixedDT and type(lhs) == pq.Quantity
-        return TraceFixedDT(rhs.time_pts, lhs - rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__sub__, rhs, lhs.magnitude, lhs.units, trace_is_lhs=False)
         
     @classmethod
     def do_mul(cls, lhs, rhs):
         assert type(rhs) == TraceFixedDT and type(lhs) == pq.Quantity
-        return TraceFixedDT(rhs.time_pts, lhs * rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__mul__, rhs, lhs.magnitude, lhs.units, trace_is_lhs=False)
 
     @classmethod
     def do_div(cls, lhs, rhs):
         assert type(rhs) == TraceFixedDT and type(lhs) == pq.Quantity
-        return TraceFixedDT(rhs.time_pts, lhs / rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__div__, rhs, lhs.magnitude, lhs.units, trace_is_lhs=False)
 
 
 TraceOperatorCtrl.add_trace_operator(
@@ -35,6 +35,7 @@ import operator
 from morphforge.traces.tracetypes import TraceFixedDT
 
 from morphforge.traces.traceobjpluginctrl import TraceOperatorCtrl
+from morphforge.traces.operators.trace_unit_kernel import TraceUnitKernel
 
 
 
@@ -45,29 +46,27 @@ class TraceOperator_TraceFixedDT_Scalar(object):
     @classmethod
     def do_add(cls, lhs, rhs):
         assert (type(lhs) == TraceFixedDT and type(rhs) == float)
-        assert isinstance(lhs.data_pts, pq.Dimensionless)
-        return TraceFixedDT(lhs.time_pts, lhs.data_pts + rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__add__, lhs, rhs, pq.dimensionless)
         
     @classmethod
     def do_sub(cls, lhs, rhs):
         assert (type(lhs) == TraceFixedDT and type(rhs) == float)
-        assert isinstance(lhs.data_pts, pq.Dimensionless)
-        return TraceFixedDT(lhs.time_pts, lhs.data_pts - rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__sub__, lhs, rhs, pq.dimensionless)
         
     @classmethod
     def do_mul(cls, lhs, rhs):
         assert (type(lhs) == TraceFixedDT and type(rhs) == float) 
-        return TraceFixedDT(lhs.time_pts, lhs.data_pts * rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__mul__, lhs, rhs, pq.dimensionless)
         
     @classmethod
     def do_div(cls, lhs, rhs):
         assert (type(lhs) == TraceFixedDT and type(rhs) == float) 
-        return TraceFixedDT(lhs.time_pts, lhs.data_pts / rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__div__, lhs, rhs, pq.dimensionless)
         
     @classmethod
     def do_pow(cls, lhs, rhs):
         assert (type(lhs) == TraceFixedDT and (type(rhs) == float or type(rhs) == int))
-        return TraceFixedDT(lhs.time_pts, lhs.data_pts ** rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__pow__, lhs, rhs, pq.dimensionless)
 
 
 class TraceOperator_Scalar_TraceFixedDT(object):
@@ -75,24 +74,22 @@ class TraceOperator_Scalar_TraceFixedDT(object):
     @classmethod
     def do_add(cls, lhs, rhs):
         assert type(rhs) == TraceFixedDT and type(lhs) == float
-        assert isinstance(rhs.data_pts, pq.Dimensionless)
-        return TraceFixedDT(rhs.time_pts, lhs + rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__add__, rhs, lhs, pq.dimensionless, trace_is_lhs=False)
 
     @classmethod
     def do_sub(cls, lhs, rhs):
         assert type(rhs) == TraceFixedDT and type(lhs) == float
-        assert isinstance(rhs.data_pts, pq.Dimensionless)
-        return TraceFixedDT(rhs.time_pts, lhs - rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__sub__, rhs, lhs, pq.dimensionless, trace_is_lhs=False)
 
     @classmethod
     def do_mul(cls, lhs, rhs):
         assert type(rhs) == TraceFixedDT and type(lhs) == float
-        return TraceFixedDT(rhs.time_pts, lhs * rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__mul__, rhs, lhs, pq.dimensionless, trace_is_lhs=False)
 
     @classmethod
     def do_div(cls, lhs, rhs):
         assert type(rhs) == TraceFixedDT and type(lhs) == float
-        return TraceFixedDT(rhs.time_pts, lhs / rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__div__, rhs, lhs, pq.dimensionless, trace_is_lhs=False)
 
 
 
@@ -35,6 +35,7 @@ import operator
 from morphforge.traces.tracetypes import TraceVariableDT
 
 from morphforge.traces.traceobjpluginctrl import TraceOperatorCtrl
+from morphforge.traces.operators.trace_unit_kernel import TraceUnitKernel
 
 
 class TraceOperator_TraceVariableDT_Quantity(object):
@@ -42,22 +43,22 @@ class TraceOperator_TraceVariableDT_Quantity(object):
     @classmethod
     def do_add(cls, lhs, rhs):
         assert (type(lhs) == TraceVariableDT and type(rhs) == pq.Quantity)
-        return TraceVariableDT(lhs.time_pts, lhs.data_pts + rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__add__, lhs, rhs.magnitude, rhs.units)
         
     @classmethod
     def do_sub(cls, lhs, rhs):
         assert (type(lhs) == TraceVariableDT and type(rhs) == pq.Quantity)
-        return TraceVariableDT(lhs.time_pts, lhs.data_pts - rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__sub__, lhs, rhs.magnitude, rhs.units)
         
     @classmethod
     def do_mul(cls, lhs, rhs):
         assert (type(lhs) == TraceVariableDT and type(rhs) == pq.Quantity) 
-        return TraceVariableDT(lhs.time_pts, lhs.data_pts * rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__mul__, lhs, rhs.magnitude, rhs.units)
         
     @classmethod
     def do_div(cls, lhs, rhs):
         assert (type(lhs) == TraceVariableDT and type(rhs) == pq.Quantity)
-        return TraceVariableDT(lhs.time_pts, lhs.data_pts / rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__div__, lhs, rhs.magnitude, rhs.units)
         
         
 
@@ -66,22 +67,22 @@ class TraceOperator_Quantity_TraceVariableDT(object):
     @classmethod
     def do_add(cls, lhs, rhs):
         assert type(rhs) == TraceVariableDT and type(lhs) == pq.Quantity
-        return TraceVariableDT(rhs.time_pts, lhs + rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__add__, rhs, lhs.magnitude, lhs.units, trace_is_lhs=False)
 
     @classmethod
     def do_sub(cls, lhs, rhs):
         assert type(rhs) == TraceVariableDT and type(lhs) == pq.Quantity
-        return TraceVariableDT(rhs.time_pts, lhs - rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__sub__, rhs, lhs.magnitude, lhs.units, trace_is_lhs=False)
         
     @classmethod
     def do_mul(cls, lhs, rhs):
         assert type(rhs) == TraceVariableDT and type(lhs) == pq.Quantity
-        return TraceVariableDT(rhs.time_pts, lhs * rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__mul__, rhs, lhs.magnitude, lhs.units, trace_is_lhs=False)
 
     @classmethod
     def do_div(cls, lhs, rhs):
         assert type(rhs) == TraceVariableDT and type(lhs) == pq.Quantity
-        return TraceVariableDT(rhs.time_pts, lhs / rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__div__, rhs, lhs.magnitude, lhs.units, trace_is_lhs=False)
 
 
 TraceOperatorCtrl.add_trace_operator(
@@ -144,29 +145,27 @@ class TraceOperator_TraceVariableDT_Scalar(object):
     @classmethod
     def do_add(cls, lhs, rhs):
         assert (type(lhs) == TraceVariableDT and type(rhs) == float)
-        assert isinstance(lhs.data_pts, pq.Dimensionless)
-        return TraceVariableDT(lhs.time_pts, lhs.data_pts + rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__add__, lhs, rhs, pq.dimensionless)
         
     @classmethod
     def do_sub(cls, lhs, rhs):
         assert (type(lhs) == TraceVariableDT and type(rhs) == float)
-        assert isinstance(lhs.data_pts, pq.Dimensionless)
-        return TraceVariableDT(lhs.time_pts, lhs.data_pts - rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__sub__, lhs, rhs, pq.dimensionless)
         
     @classmethod
     def do_mul(cls, lhs, rhs):
         assert (type(lhs) == TraceVariableDT and type(rhs) == float) 
-        return TraceVariableDT(lhs.time_pts, lhs.data_pts * rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__mul__, lhs, rhs, pq.dimensionless)
         
     @classmethod
     def do_div(cls, lhs, rhs):
         assert (type(lhs) == TraceVariableDT and type(rhs) == float) 
-        return TraceVariableDT(lhs.time_pts, lhs.data_pts / rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__div__, lhs, rhs, pq.dimensionless)
         
     @classmethod
     def do_pow(cls, lhs, rhs):
         assert (type(lhs) == TraceVariableDT and (type(rhs) == float or type(rhs) == int))
-        return TraceVariableDT(lhs.time_pts, lhs.data_pts ** rhs)
+        return TraceUnitKernel.operate_trace_value(operator.__pow__, lhs, rhs, pq.dimensionless)
 
 
 class TraceOperator_Scalar_TraceVariableDT(object):
@@ -174,24 +173,22 @@ class TraceOperator_Scalar_TraceVariableDT(object):
     @classmethod
     def do_add(cls, lhs, rhs):
         assert type(rhs) == TraceVariableDT and type(lhs) == float
-        assert isinstance(rhs.data_pts, pq.Dimensionless)
-        return TraceVariableDT(rhs.time_pts, lhs + rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__add__, rhs, lhs, pq.dimensionless, trace_is_lhs=False)
 
     @classmethod
     def do_sub(cls, lhs, rhs):
         assert type(rhs) == TraceVariableDT and type(lhs) == float
-        assert isinstance(rhs.data_pts, pq.Dimensionless)
-        return TraceVariableDT(rhs.time_pts, lhs - rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__sub__, rhs, lhs, pq.dimensionless, trace_is_lhs=False)
 
     @classmethod
     def do_mul(cls, lhs, rhs):
         assert type(rhs) == TraceVariableDT and type(lhs) == float
-        return TraceVariableDT(rhs.time_pts, lhs * rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__mul__, rhs, lhs, pq.dimensionless, trace_is_lhs=False)
 
     @classmethod
     def do_div(cls, lhs, rhs):
         assert type(rhs) == TraceVariableDT and type(lhs) == float
-        return TraceVariableDT(rhs.time_pts, lhs / rhs.data_pts)
+        return TraceUnitKernel.operate_trace_value(operator.__div__, rhs, lhs, pq.dimensionless, trace_is_lhs=False)
 
 
 
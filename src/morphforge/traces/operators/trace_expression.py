@@ -0,0 +1,231 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+import operator
+
+import numpy as np
+import quantities as pq
+
+from morphforge.traces.tracetypes import Trace
+from morphforge.traces.tracetypes import TracePointBased
+from morphforge.traces.tracetypes import TraceFixedDT
+from morphforge.traces.tracetypes import TraceVariableDT
+from morphforge.traces.traceobjpluginctrl import TraceMethodCtrl
+from morphforge.traces.operators.trace_unit_kernel import TraceUnitKernel
+
+
+class TraceExpression(object):
+
+    """ A lazily evaluated expression of traces, scalars and quantities.
+
+    Operators on a TraceExpression build up the expression, rather than
+    creating a trace for each step. When evaluate() is called, a single
+    time axis is found for all the traces in the expression, each trace
+    is resampled onto it once, and the expression is calculated with
+    numpy, reusing the intermediate arrays.
+
+        tr = (tr1.lazy() + tr2 + tr3 * 2.0).evaluate()
+
+    If all the traces share a time axis, it is used directly. Otherwise,
+    the traces are resampled over the time window that they all cover;
+    every 'dt' if they are all TraceFixedDT, (using the smallest dt), or
+    at all their time points.
+    """
+
+    def __init__(self, operator_type=None, lhs=None, rhs=None, value=None):
+        self.operator_type = operator_type
+        self.lhs = lhs
+        self.rhs = rhs
+        self.value = value
+
+    @classmethod
+    def from_trace(cls, trace):
+        return TraceExpression(value=trace)
+
+    @classmethod
+    def _as_expression(cls, obj):
+        if isinstance(obj, TraceExpression):
+            return obj
+        if isinstance(obj, int):
+            obj = float(obj)
+        if not isinstance(obj, (TracePointBased, float, pq.Quantity)):
+            raise ValueError('Unable to use %s in a trace expression' % type(obj))
+        return TraceExpression(value=obj)
+
+    def _operate(self, operator_type, lhs, rhs):
+        return TraceExpression(operator_type=operator_type,
+                               lhs=TraceExpression._as_expression(lhs),
+                               rhs=TraceExpression._as_expression(rhs))
+
+    def __add__(self, rhs):
+        return self._operate(operator.__add__, self, rhs)
+    def __sub__(self, rhs):
+        return self._operate(operator.__sub__, self, rhs)
+    def __mul__(self, rhs):
+        return self._operate(operator.__mul__, self, rhs)
+    def __div__(self, rhs):
+        return self._operate(operator.__div__, self, rhs)
+    def __pow__(self, rhs):
+        if not isinstance(rhs, (int, float)):
+            raise ValueError('Exponents must be numbers')
+        return self._operate(operator.__pow__, self, rhs)
+    def __radd__(self, lhs):
+        return self._operate(operator.__add__, lhs, self)
+    def __rsub__(self, lhs):
+        return self._operate(operator.__sub__, lhs, self)
+    def __rmul__(self, lhs):
+        return self._operate(operator.__mul__, lhs, self)
+    def __rdiv__(self, lhs):
+        return self._operate(operator.__div__, lhs, self)
+
+    # So numpy/quantities scalars defer to the reflected operators:
+    __array_priority__ = Trace.__array_priority__ + 1
+
+    def is_leaf(self):
+        return self.operator_type is None
+
+    def get_leaf_traces(self):
+        # (Including repeats, if a trace is used more than once):
+        if self.is_leaf():
+            return ([self.value] if isinstance(self.value, Trace) else [])
+        return self.lhs.get_leaf_traces() + self.rhs.get_leaf_traces()
+
+    def get_traces(self):
+        traces = []
+        for trace in self.get_leaf_traces():
+            if not any(trace is tr for tr in traces):
+                traces.append(trace)
+        return traces
+
+    # Evaluation:
+    # #############
+    @classmethod
+    def get_time_axis(cls, traces):
+        """ Returns (time_axis (in ms), trace_type, resample) for combining
+        'traces'."""
+        trace0 = traces[0]
+        if all([TraceUnitKernel.have_same_time_axis(trace0, tr) for tr in traces[1:]]):
+            return (trace0.time_pts_ms, type(trace0), False)
+
+        time_arrays = [tr.time_pts_ms for tr in traces]
+        min_time = max([t[0] for t in time_arrays])
+        max_time = min([t[-1] for t in time_arrays])
+
+        if all([type(tr) == TraceFixedDT for tr in traces]):
+            new_dt = min([t[1] - t[0] for t in time_arrays])
+            if not max_time - min_time > new_dt * 2:
+                raise ValueError('The new trace will only have a single point')
+            return (np.arange(min_time, max_time, new_dt), TraceFixedDT, True)
+
+        time_axis = np.unique(np.hstack(time_arrays))
+        time_axis = time_axis[(time_axis >= min_time) & (time_axis <= max_time)]
+        if len(time_axis) < 2:
+            raise ValueError('The traces do not overlap')
+        return (time_axis, TraceVariableDT, True)
+
+    def evaluate(self, name=None, comment=None, tags=None):
+        traces = self.get_traces()
+        if not traces:
+            raise ValueError('Expression contains no traces')
+
+        (time_axis, trace_type, resample) = TraceExpression.get_time_axis(traces)
+
+        # The data of each trace on the time axis, (as magnitudes). Resampled
+        # arrays can be overwritten, if the trace is only used once:
+        leaf_traces = self.get_leaf_traces()
+        trace_data = {}
+        for tr in traces:
+            if resample:
+                is_temporary = len([t for t in leaf_traces if t is tr]) == 1
+                trace_data[id(tr)] = (np.interp(time_axis, tr.time_pts_ms, tr.data_pts_np), is_temporary)
+            else:
+                trace_data[id(tr)] = (tr.data_pts_np, False)
+
+        (data, data_unit, _is_temporary) = self._evaluate(trace_data)
+        return trace_type.from_magnitudes(time=time_axis, time_unit=pq.ms,
+                                          data=data, data_unit=data_unit,
+                                          name=name, comment=comment, tags=tags)
+
+    def _evaluate(self, trace_data):
+        # Returns (magnitudes, unit, is_temporary); arrays which are
+        # temporary can be overwritten with the result of an operation:
+        if self.is_leaf():
+            if isinstance(self.value, Trace):
+                (data, is_temporary) = trace_data[id(self.value)]
+                return (data, self.value.data_unit, is_temporary)
+            if isinstance(self.value, pq.Quantity):
+                return (self.value.magnitude, self.value.units, False)
+            return (self.value, pq.dimensionless, False)
+
+        (lhs, lhs_unit, lhs_tmp) = self.lhs._evaluate(trace_data)
+        (rhs, rhs_unit, rhs_tmp) = self.rhs._evaluate(trace_data)
+
+        if self.operator_type == operator.__pow__:
+            (values, unit) = TraceUnitKernel.operate(self.operator_type, lhs, lhs_unit, rhs, rhs_unit)
+            return (values, unit, True)
+
+        (factor, unit) = TraceUnitKernel.get_unit_result(self.operator_type, lhs_unit, rhs_unit)
+
+        # Reuse a temporary array for the result, if there is one:
+        lhs_is_array = isinstance(lhs, np.ndarray) and lhs.ndim > 0
+        rhs_is_array = isinstance(rhs, np.ndarray) and rhs.ndim > 0
+        if lhs_is_array and lhs_tmp:
+            out = lhs
+        elif rhs_is_array and rhs_tmp:
+            out = rhs
+        else:
+            out = None
+
+        if self.operator_type in (operator.__add__, operator.__sub__):
+            # (The rhs is converted into the units of the lhs):
+            if factor != 1.0:
+                rhs = np.multiply(rhs, factor, out=(rhs if out is rhs else None))
+            values = self.operator_type(lhs, rhs) if out is None else \
+                     _inplace_operators[self.operator_type](lhs, rhs, out=out)
+        else:
+            values = self.operator_type(lhs, rhs) if out is None else \
+                     _inplace_operators[self.operator_type](lhs, rhs, out=out)
+            if factor != 1.0:
+                values = np.multiply(values, factor, out=(values if isinstance(values, np.ndarray) and values.ndim > 0 else None))
+
+        return (values, unit, True)
+
+
+_inplace_operators = {
+    operator.__add__: np.add,
+    operator.__sub__: np.subtract,
+    operator.__mul__: np.multiply,
+    operator.__div__: np.divide,
+    }
+
+
+TraceMethodCtrl.register(TraceFixedDT, 'lazy', TraceExpression.from_trace)
+TraceMethodCtrl.register(TraceVariableDT, 'lazy', TraceExpression.from_trace)
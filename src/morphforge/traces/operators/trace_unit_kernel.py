@@ -0,0 +1,126 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+import operator
+
+import numpy as np
+import quantities as pq
+
+
+class TraceUnitKernel(object):
+
+    """ Arithmetic on the data of traces, as plain float arrays.
+
+    The units of the result are worked out once per operation, (on
+    scalars), and the arrays are combined with numpy, rather than going
+    through 'quantities' for every element.
+    """
+
+    # {(operator, lhs-unit, rhs-unit): (factor, result-unit)}:
+    _unit_results = {}
+
+    @classmethod
+    def get_unit_result(cls, operator_type, lhs_unit, rhs_unit):
+        """ Returns (factor, unit) for 'lhs <op> rhs'. For addition and
+        subtraction, 'factor' converts the rhs to the units of the lhs;
+        otherwise, it scales the result."""
+        key = (operator_type, lhs_unit.dimensionality.string, rhs_unit.dimensionality.string)
+        if not key in cls._unit_results:
+            cls._unit_results[key] = cls._get_unit_result(operator_type, lhs_unit, rhs_unit)
+        return cls._unit_results[key]
+
+    @classmethod
+    def _get_unit_result(cls, operator_type, lhs_unit, rhs_unit):
+        if operator_type in (operator.__add__, operator.__sub__):
+            factor = float(pq.Quantity(1.0, rhs_unit).rescale(lhs_unit).magnitude)
+            return (factor, lhs_unit)
+
+        if operator_type in (operator.__mul__, operator.__div__):
+            result = operator_type(pq.Quantity(1.0, lhs_unit), pq.Quantity(1.0, rhs_unit))
+            return (float(result.magnitude), result.units)
+
+        assert False, 'Unknown operator: %s' % operator_type
+
+    @classmethod
+    def operate(cls, operator_type, lhs, lhs_unit, rhs, rhs_unit):
+        """ Returns (values, unit) for 'lhs <op> rhs', where 'lhs' and
+        'rhs' are magnitudes, (arrays or scalars)."""
+
+        if operator_type == operator.__pow__:
+            if not rhs_unit.dimensionality == pq.dimensionless.dimensionality:
+                raise ValueError('Exponent must be dimensionless')
+            result_unit = pq.Quantity(1.0, lhs_unit) ** rhs
+            return (lhs ** rhs, result_unit.units)
+
+        (factor, result_unit) = cls.get_unit_result(operator_type, lhs_unit, rhs_unit)
+
+        if operator_type in (operator.__add__, operator.__sub__):
+            if factor != 1.0:
+                rhs = rhs * factor
+            return (operator_type(lhs, rhs), result_unit)
+
+        values = operator_type(lhs, rhs)
+        if factor != 1.0:
+            values = values * factor
+        return (values, result_unit)
+
+    @classmethod
+    def operate_trace_value(cls, operator_type, trace, value, value_unit, trace_is_lhs=True):
+        # Combine a trace with a scalar, keeping the time axis of the trace:
+        if trace_is_lhs:
+            (data, data_unit) = cls.operate(operator_type, trace.data_pts_np, trace.data_unit, value, value_unit)
+        else:
+            (data, data_unit) = cls.operate(operator_type, value, value_unit, trace.data_pts_np, trace.data_unit)
+        return type(trace).from_magnitudes(time=trace.time_pts_np, time_unit=trace.time_unit,
+                                           data=data, data_unit=data_unit)
+
+    @classmethod
+    def have_same_time_axis(cls, lhs, rhs):
+        lhs_time = lhs.time_pts_np
+        rhs_time = rhs.time_pts_np
+        if lhs_time.shape != rhs_time.shape:
+            return False
+        if lhs.time_unit.dimensionality.string != rhs.time_unit.dimensionality.string:
+            return False
+        # (Views of the same memory, such as traces from one simulation, or
+        # results of operations on them):
+        if lhs_time.__array_interface__['data'] == rhs_time.__array_interface__['data'] and \
+           lhs_time.strides == rhs_time.strides:
+            return True
+        return np.array_equal(lhs_time, rhs_time)
+
+    @classmethod
+    def operate_traces(cls, operator_type, lhs, rhs):
+        # Combine two traces with the same time axis, point by point:
+        assert cls.have_same_time_axis(lhs, rhs)
+        (data, data_unit) = cls.operate(operator_type, lhs.data_pts_np, lhs.data_unit, rhs.data_pts_np, rhs.data_unit)
+        return type(lhs).from_magnitudes(time=lhs.time_pts_np, time_unit=lhs.time_unit,
+                                         data=data, data_unit=data_unit)
@@ -31,6 +31,7 @@
 
 from trace import Trace
 from tracefixeddt import TraceFixedDT
+from tracefixeddtchunked import TraceFixedDTChunked
 from tracepointbased import TracePointBased
 from tracevariabledt import TraceVariableDT
 from tracepiecewise import TracePiecewise
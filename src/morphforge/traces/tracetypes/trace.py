@@ -36,6 +36,10 @@ import numpy as np
 
 class Trace(object):
 
+    # So numpy/quantities scalars on the left of an operator defer to the
+    # reflected operators below:
+    __array_priority__ = 100
+
     def __init__(self, name, comment, tags):
         self.tags = ([] if tags == None else tags)
         self.name = (name if name else '<Unnamed Trace>')
@@ -58,6 +62,19 @@ class Trace(object):
         from morphforge.traces.traceobjpluginctrl import TraceOperatorCtrl
         return TraceOperatorCtrl.operate(operator.__pow__, lhs=self, rhs=rhs)
 
+    def __radd__(self, lhs):
+        from morphforge.traces.traceobjpluginctrl import TraceOperatorCtrl
+        return TraceOperatorCtrl.operate(operator.__add__, lhs=lhs, rhs=self)
+    def __rsub__(self, lhs):
+        from morphforge.traces.traceobjpluginctrl import TraceOperatorCtrl
+        return TraceOperatorCtrl.operate(operator.__sub__, lhs=lhs, rhs=self)
+    def __rdiv__(self, lhs):
+        from morphforge.traces.traceobjpluginctrl import TraceOperatorCtrl
+        return TraceOperatorCtrl.operate(operator.__div__, lhs=lhs, rhs=self)
+    def __rmul__(self, lhs):
+        from morphforge.traces.traceobjpluginctrl import TraceOperatorCtrl
+        return TraceOperatorCtrl.operate(operator.__mul__, lhs=lhs, rhs=self)
+
 
     # Forward method lookup
     def __getattr__(self, name):
@@ -0,0 +1,196 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+import os
+
+import numpy as np
+import quantities as pq
+
+from morphforge.core.mgrs import LocMgr, SettingsMgr
+from morphforge.traces.tracetypes.trace import Trace
+
+
+class TraceFixedDTChunked(Trace):
+
+    """ A fixed-dt trace whose data is held in a (normally memory-mapped)
+    .npy file, rather than in memory.
+
+    The time points are not stored; they are calculated from 't0' and 'dt'.
+    The methods of this trace, (filtering, windowing, integration, finding
+    spikes), work through the data in chunks of
+    ``SettingsMgr.get_trace_chunk_size()`` points, and the results of
+    filtering are written to temporary files, (see create_data_file()). ::
+
+        tr = TraceFixedDTChunked.from_file('recording.npy', data_unit='mV',
+                                           t0='0:ms', dt='0.1:ms')
+        tr_filt = tr.filterlowpassrc(tau=unit('2:ms'))
+    """
+
+    def __init__(self, data, data_unit, t0, dt, name=None, comment=None, tags=None):
+        super(TraceFixedDTChunked, self).__init__(name=name, comment=comment, tags=tags)
+
+        if not isinstance(t0, pq.Quantity) or not isinstance(dt, pq.Quantity):
+            raise ValueError("'t0' and 'dt' should be 'unit'ed quantities")
+        if data.ndim != 1:
+            raise ValueError('Data should be 1-dimensional')
+
+        self._data = data
+        self._data_unit = pq.Quantity(1.0, data_unit).units
+        self._dt = dt
+        self._t0 = t0.rescale(dt.units)
+
+        assert self.get_n() >= 2, 'Chunked Trace has less than 2 points: %d' % self.get_n()
+
+    @classmethod
+    def from_file(cls, filename, data_unit, t0, dt, name=None, comment=None, tags=None):
+        from morphforge.core.quantities import unit
+        data = np.load(filename, mmap_mode='r')
+        return cls(data=data, data_unit=data_unit, t0=unit(t0), dt=unit(dt),
+                   name=name, comment=comment, tags=tags)
+
+    @classmethod
+    def from_trace(cls, trace):
+        """ Wraps the data of a TraceFixedDT, (for example one loaded with
+        SimulationResult.load_from_directory(), which is memory-mapped),
+        without copying it."""
+        return cls(data=trace.data_pts_np, data_unit=trace.data_unit,
+                   t0=trace.get_min_time(), dt=trace.get_dt_new(),
+                   name=trace.name, comment=trace.comment, tags=list(trace.tags))
+
+    @classmethod
+    def create_data_file(cls, n):
+        """ Returns a writable memory-mapped array of 'n' points, backed by
+        a new .npy file in ``LocMgr.get_tmp_path()``.
+
+        The file is unlinked as soon as it is mapped, so its space is freed
+        when the last array using the mapping, (including windows of it),
+        is garbage collected."""
+        filename = LocMgr.get_temporary_filename(suffix='.npy')
+        data = np.lib.format.open_memmap(filename, mode='w+', dtype=np.float64, shape=(n,))
+        os.remove(filename)
+        return data
+
+    def to_fixed_dt(self):
+        """ Loads the whole trace into memory, as a TraceFixedDT. """
+        from morphforge.traces.tracetypes.tracefixeddt import TraceFixedDT
+        return TraceFixedDT.from_magnitudes(time=self.time_pts_np, time_unit=self.time_unit,
+                                            data=np.array(self._data), data_unit=self._data_unit,
+                                            name=self.name, comment=self.comment, tags=list(self.tags))
+
+    # Chunks:
+    # ##########
+    def iter_chunks(self, chunk_size=None):
+        """ Yields (start_index, time, data) for consecutive chunks of the
+        trace, where 'time' and 'data' are arrays of magnitudes in
+        'time_unit' and 'data_unit'."""
+        chunk_size = chunk_size or SettingsMgr.get_trace_chunk_size()
+        n = self.get_n()
+        for start in range(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            yield (start, self._get_time_mag(start, stop), np.asarray(self._data[start:stop]))
+
+    def _get_time_mag(self, start, stop):
+        return self._t0.magnitude + np.arange(start, stop) * self._dt.magnitude
+
+    def searchsorted(self, time, side='left'):
+        """ The equivalent of np.searchsorted() on the time points of the
+        trace, for a single time."""
+        t = float(time.rescale(self._dt.units).magnitude)
+        (t0, dt, n) = (float(self._t0.magnitude), float(self._dt.magnitude), self.get_n())
+        index = int(min(max(np.ceil((t - t0) / dt), 0), n))
+
+        # Correct for rounding, against the actual time points:
+        def before(i):
+            return (t0 + i * dt < t) if side == 'left' else (t0 + i * dt <= t)
+        while index < n and before(index):
+            index += 1
+        while index > 0 and not before(index - 1):
+            index -= 1
+        return index
+
+    def get_chunk(self, start, stop, name=None, comment=None, tags=None):
+        """ The points [start, stop) as a new TraceFixedDTChunked, sharing
+        the data of this trace."""
+        return TraceFixedDTChunked(data=self._data[start:stop], data_unit=self._data_unit,
+                                   t0=self._t0 + start * self._dt, dt=self._dt,
+                                   name=name, comment=comment, tags=tags)
+
+    # Conform to interface:
+    # #########################
+    @property
+    def data_unit(self):
+        return self._data_unit
+
+    @property
+    def time_unit(self):
+        return self._dt.units
+
+    @property
+    def data_pts_np(self):
+        return self._data
+
+    @property
+    def time_pts_np(self):
+        # (Note: this creates an array of all the time points):
+        return self._get_time_mag(0, self.get_n())
+
+    @property
+    def time_pts_ms(self):
+        return (self.time_pts_np * self.time_unit).rescale('ms').magnitude
+
+    def get_n(self):
+        return len(self._data)
+
+    def get_dt_new(self):
+        return self._dt
+
+    def get_min_time(self):
+        return self._t0
+
+    def get_max_time(self):
+        return self._t0 + (self.get_n() - 1) * self._dt
+
+    def get_values(self, time_array):
+        # Linear interpolation between the neighbouring points, (so only
+        # those points are read from the file):
+        time_mag = np.asarray(time_array.rescale(self._dt.units).magnitude)
+        index = (time_mag - self._t0.magnitude) / self._dt.magnitude
+        if index.size and (index.min() < -1e-9 or index.max() > self.get_n() - 1 + 1e-9):
+            raise ValueError('Time out of bounds of the trace: %s' % time_array)
+        i_low = np.clip(np.floor(index).astype(int), 0, self.get_n() - 2)
+        frac = index - i_low
+        d_low = np.asarray(self._data[i_low])
+        d_high = np.asarray(self._data[i_low + 1])
+        return (d_low + frac * (d_high - d_low)) * self._data_unit
+
+    def __str__(self):
+        return 'TraceFixedDTChunked: ' + self.name + ' Shape:' + str(self._data.shape)
@@ -32,7 +32,6 @@
 from morphforge.traces.tracetypes.trace import Trace
 
 import numpy as np
-import itertools
 
 
 class PieceWiseComponentVisitor(object):
@@ -127,6 +126,7 @@ class TracePiecewise(Trace):
     def __init__(self, pieces, name=None, comment=None, tags=None):
         super(TracePiecewise, self).__init__(name=name, comment=comment, tags=tags)
         self._pieces = pieces
+        self._piece_arrays = None
 
         # Check we link up:
         for i in range(len(pieces) - 1):
@@ -151,27 +151,33 @@ class TracePiecewise(Trace):
     def n_pieces_longer_than(self, t):
         return len([piece for piece in self._pieces if piece.get_duration() > t])
 
-    def get_values(self, times):
-
-        _datas = []
-        _times = []
-        assert (times <= self.get_max_time()).all()
-        assert (times >= self.get_min_time()).all()
-        done_times = np.ones(len(times)) > 0.0
-        for piece in self._pieces:
-            ind1 = (times.rescale('ms') < float(piece.get_max_time().rescale('ms').magnitude))
-            ind = np.logical_and(ind1, done_times)
-            ind_locs = np.where(ind)
+    def _get_piece_arrays(self):
+        # Each piece (flat or linear) is a line between its start and end
+        # values; these are built once and cached, as (start times (ms),
+        # start values, slopes (per ms), data unit, end time (ms)):
+        if self._piece_arrays is None:
+            unit = self._pieces[0].get_start_value().units
+            starts = np.array([float(piece.get_min_time().rescale('ms').magnitude) for piece in self._pieces])
+            durations = np.array([float(piece.get_duration().rescale('ms').magnitude) for piece in self._pieces])
+            x0 = np.array([float(piece.get_start_value().rescale(unit).magnitude) for piece in self._pieces])
+            x1 = np.array([float(piece.get_end_value().rescale(unit).magnitude) for piece in self._pieces])
+            slopes = np.zeros(len(self._pieces))
+            nonzero = durations > 0.0
+            slopes[nonzero] = (x1[nonzero] - x0[nonzero]) / durations[nonzero]
+            end = float(self.get_max_time().rescale('ms').magnitude)
+            self._piece_arrays = (starts, x0, slopes, unit, end)
+        return self._piece_arrays
 
-            _time = times[ind_locs]
-            _data = piece.get_values(_time)
-            _datas.append(_data)
-            _times.append(_time)
-
-            # Only visit these times once:
-            done_times = np.logical_and(done_times, np.logical_not(ind))
+    def get_values(self, times):
+        (starts, x0, slopes, unit, end) = self._get_piece_arrays()
 
-        unit = _data[0].units
-        return np.fromiter(itertools.chain(*[list(datum.rescale(unit).magnitude) for datum in _datas]), dtype=np.float) * unit
+        times_ms = np.asarray(times.rescale('ms').magnitude)
+        assert (times_ms <= end).all()
+        assert (times_ms >= starts[0]).all()
 
+        # The piece for each time; (times on a boundary belong to the later piece):
+        piece_indices = np.searchsorted(starts, times_ms, side='right') - 1
+        piece_indices = np.clip(piece_indices, 0, len(starts) - 1)
 
+        values = x0[piece_indices] + slopes[piece_indices] * (times_ms - starts[piece_indices])
+        return values * unit
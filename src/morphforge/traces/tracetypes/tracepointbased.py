@@ -57,6 +57,20 @@ class TracePointBased(Trace):
 
         assert self.get_n() >= 2, 'Points Based Trace has less than 2 points: %d' % self.get_n()
 
+    @classmethod
+    def from_magnitudes(cls, time, time_unit, data, data_unit, name=None, comment=None, tags=None):
+        """ Create a trace from plain float arrays and their units.
+
+        The arrays are used directly, (the quantities are views of them),
+        and are not checked, so this is for building traces from the
+        results of operations on existing traces.
+        """
+        tr = cls.__new__(cls)
+        Trace.__init__(tr, name=name, comment=comment, tags=tags)
+        tr._time = pq.Quantity(time, time_unit, copy=False)
+        tr._data = pq.Quantity(data, data_unit, copy=False)
+        return tr
+
 
     @property
     def time_pts(self):
@@ -113,18 +127,20 @@ class TracePointBased(Trace):
         return self._time[-1]
 
     def get_values(self, time_array):
-        from scipy.interpolate.interpolate import interp1d
-        time_units = self._time.units
-        data_units = self._data.units
-        interpolator = interp1d(self._time.magnitude,
-                                self._data.magnitude)
-        return interpolator(time_array.rescale(time_units).magnitude) \
-            * data_units
+        return self._interpolate(time_array)
+
+    def _interpolate(self, time_array):
+        # Linear interpolation directly on the magnitudes; (np.interp does
+        # not need an interpolator to be built for each call):
+        time_mag = np.asarray(time_array.rescale(self._time.units).magnitude)
+        time_pts = self._time.magnitude
+        if time_mag.size and (time_mag.min() < time_pts[0] or time_mag.max() > time_pts[-1]):
+            raise ValueError('Time out of bounds of the trace: %s' % time_array)
+        return np.interp(time_mag, time_pts, self._data.magnitude) * self._data.units
     # ##############################
 
 
     def __getitem__(self, time):
-        from scipy.interpolate import interp1d
         from morphforge.traces.tracetypes.tracefixeddt import TraceFixedDT
 
         if isinstance(time, tuple):
@@ -137,19 +153,17 @@ class TracePointBased(Trace):
             if stop > self._time[-1]:
                 assert False, 'Time out of bounds'
 
-            mask = np.logical_and(start < self.time_pts, self._time < stop)
+            # The points strictly inside (start, stop), found by bisection:
+            time_pts = self._time.magnitude
+            i_start = np.searchsorted(time_pts, float(start.rescale(self._time.units).magnitude), side='right')
+            i_stop = np.searchsorted(time_pts, float(stop.rescale(self._time.units).magnitude), side='left')
 
-            if len(np.nonzero(mask)[0]) < 2:
+            if i_stop - i_start < 2:
                 assert False
-            return TraceFixedDT(time=self._time[np.nonzero(mask)[0]],
-                                data=self.data_pts[np.nonzero(mask)[0]])
+            return TraceFixedDT(time=self._time[i_start:i_stop],
+                                data=self.data_pts[i_start:i_stop])
 
 
         assert isinstance(time, pq.quantity.Quantity), "Times should be quantity. Found: %s %s"%(time, type(time))
-        # Rebase the Time:
-        time.rescale(self._time.units)
-        interpolator = interp1d(self.time_pts_np,
-                                self.data_pts_np)
-        d_mag = interpolator(time.magnitude)
-        return d_mag * self.data_unit
+        return self._interpolate(time)
 
@@ -0,0 +1,272 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+"""Streaming MorphML/NeuroML importer.
+
+The document is read with ``iterparse``, so only the cell currently being
+loaded is held in memory: each ``<segment>``, ``<cable>`` and
+``<cablegroup>`` element is converted to plain tuples as soon as it has been
+parsed, and then removed from the document. When a ``<cell>`` element ends,
+a :py:class:`~morphforge.morphology.core.MorphologyArray` is built directly
+from these tuples.
+
+Each segment becomes a vertex at its distal end; the proximal point of the
+root segment becomes the dummy vertex. A child segment normally starts at
+the distal point of its parent, but if it has its own ``<proximal>`` point
+which differs from this (for example, a change in diameter at a branch
+point), an extra vertex is added at the proximal point, so that the
+geometry is the same as described in the file. Regions are taken from the
+cable groups: each cable must belong to at most one group, unless a
+`regions` dictionary is given, which maps the group names to use onto
+region names.
+"""
+
+import string
+import numpy as np
+
+try:
+    import xml.etree.cElementTree as ElementTree
+except ImportError:
+    import xml.etree.ElementTree as ElementTree
+
+from morphforge.morphology.core import MorphologyArray, MorphologyTree
+from morphforge.morphology.errors import MorphologyImportError
+from morphforge.morphology.conversion.region_to_int_bimap import RegionToIntMapBiMap
+from morphforge.morphology.importer.morphologyimporter import MorphologyImporter
+
+
+def _clean_name(name):
+    return ''.join([c for c in name if c in string.ascii_letters + string.digits])
+
+
+def _local_tag(elem):
+    # Remove namespaces, e.g. '{http://morphml.org/morphml/schema}segment':
+    return elem.tag.rsplit('}', 1)[-1]
+
+
+def _xyzd(elem):
+    return (float(elem.get('x')), float(elem.get('y')), float(elem.get('z')), float(elem.get('diameter')))
+
+
+class _MorphMLCellData(object):
+    """The information gathered from the children of a single <cell>"""
+
+    def __init__(self, name):
+        self.name = name
+
+        # segment-id -> (name, cable-id, parent-id, proximal, distal)
+        self.segments = {}
+        self.segment_order = []
+
+        # cable-id -> list of group names
+        self.cable_groups = {}
+
+    def add_segment(self, elem):
+        segment_id = elem.get('id')
+        if segment_id in self.segments:
+            raise MorphologyImportError('Duplicate segment id: %s' % segment_id)
+
+        (proximal, distal) = (None, None)
+        for child in elem:
+            tag = _local_tag(child)
+            if tag == 'distal':
+                distal = _xyzd(child)
+            elif tag == 'proximal':
+                proximal = _xyzd(child)
+        if distal is None:
+            raise MorphologyImportError('Segment without a distal point: %s' % segment_id)
+
+        self.segments[segment_id] = (elem.get('name'), elem.get('cable'), elem.get('parent'), proximal, distal)
+        self.segment_order.append(segment_id)
+
+    def add_cable(self, elem):
+        groups = self.cable_groups.setdefault(elem.get('id'), [])
+        for child in elem:
+            if _local_tag(child) == 'group':
+                groups.append((child.text or '').strip())
+
+    def add_cablegroup(self, elem):
+        group_name = elem.get('name')
+        for child in elem:
+            if _local_tag(child) == 'cable':
+                self.cable_groups.setdefault(child.get('id'), []).append(group_name)
+
+    def get_cable_region_name(self, cable_id, regions):
+        groups = self.cable_groups.get(cable_id, [])
+        if regions:
+            region_names = set([regions[g] for g in groups if g in regions])
+        else:
+            region_names = set(groups)
+
+        if not region_names:
+            return None
+        if len(region_names) > 1:
+            raise MorphologyImportError('Cable %s is in multiple regions: %s (Perhaps use the "regions" parameter?)' % (cable_id, sorted(region_names)))
+        return _clean_name(str(region_names.pop()))
+
+    def to_array(self, regions=None):
+        """Returns a (MorphologyArray, vertex_idtags) tuple"""
+
+        roots = [seg_id for seg_id in self.segment_order if not self.segments[seg_id][2]]
+        if len(roots) != 1:
+            raise MorphologyImportError('Expected a single root segment, found %d' % len(roots))
+        root_proximal = self.segments[roots[0]][3]
+        if root_proximal is None:
+            raise MorphologyImportError('Root segment has no proximal point')
+
+        # Vertex 0 is the proximal end of the root, then each segment's
+        # distal end, in document order. Child segments with their own
+        # proximal point get an extra vertex after all of these:
+        n_segments = len(self.segment_order)
+        segment_to_vertex = dict([(seg_id, index + 1) for (index, seg_id) in enumerate(self.segment_order)])
+
+        vertices = [root_proximal]
+        connectivity = []
+        section_types = []
+
+        bidict = RegionToIntMapBiMap()
+        bidict.add_mapping(regionname=None, _int=0)
+        cable_to_type = {}
+        vertex_idtags = {}
+        extra_vertices = []
+
+        for seg_id in self.segment_order:
+            (seg_name, cable_id, parent_id, proximal, distal) = self.segments[seg_id]
+            vertex_index = segment_to_vertex[seg_id]
+            vertices.append(distal)
+
+            if not cable_id in cable_to_type:
+                region_name = self.get_cable_region_name(cable_id, regions=regions)
+                if not region_name in bidict.regionname2int:
+                    bidict.add_mapping(regionname=region_name, _int=len(bidict.int2regionname))
+                cable_to_type[cable_id] = bidict.region_name_to_int(region_name)
+            section_type = cable_to_type[cable_id]
+
+            if parent_id:
+                if not parent_id in segment_to_vertex:
+                    raise MorphologyImportError('Unknown parent segment: %s' % parent_id)
+                parent_vertex_index = segment_to_vertex[parent_id]
+                if proximal is not None and proximal != self.segments[parent_id][4]:
+                    extra_vertices.append(proximal)
+                    extra_vertex_index = n_segments + len(extra_vertices)
+                    connectivity.append((extra_vertex_index, parent_vertex_index))
+                    section_types.append(section_type)
+                    parent_vertex_index = extra_vertex_index
+                connectivity.append((vertex_index, parent_vertex_index))
+            else:
+                connectivity.append((vertex_index, 0))
+            section_types.append(section_type)
+
+            if seg_name:
+                vertex_idtags[vertex_index] = str(seg_name)
+
+        vertices = np.array(vertices + extra_vertices, dtype=float)
+
+        # Diameters -> radii:
+        vertices[:, 3] *= 0.5
+
+        array = MorphologyArray(vertices=vertices,
+                                connectivity=connectivity,
+                                section_types=section_types,
+                                dummy_vertex_index=0,
+                                region_number_to_name_bidict=bidict)
+        return (array, vertex_idtags)
+
+
+class MorphMLStreamLoader(object):
+
+    @classmethod
+    def iter_cells(cls, src, regions=None):
+        """Yields a (cell-name, MorphologyArray, vertex_idtags) tuple for each
+        <cell> in the document. 'src' is a filename or file-object."""
+
+        stack = []
+        cell = None
+        for (event, elem) in ElementTree.iterparse(src, events=('start', 'end')):
+            if event == 'start':
+                stack.append(elem)
+                if _local_tag(elem) == 'cell':
+                    cell = _MorphMLCellData(name=elem.get('name'))
+                continue
+
+            stack.pop()
+            tag = _local_tag(elem)
+            if cell is None:
+                # Nothing outside of a <cell> is used:
+                pass
+            elif tag == 'segment':
+                cell.add_segment(elem)
+            elif tag == 'cable' and len(stack) and _local_tag(stack[-1]) == 'cables':
+                cell.add_cable(elem)
+            elif tag == 'cablegroup':
+                cell.add_cablegroup(elem)
+            elif tag == 'cell':
+                (array, vertex_idtags) = cell.to_array(regions=regions)
+                yield (cell.name, array, vertex_idtags)
+                cell = None
+            else:
+                continue
+
+            # Free the element once it has been processed, or straight away
+            # if it is outside of a cell, (<cable> elements inside
+            # <cablegroup>s are freed with their parent):
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+    @classmethod
+    def load_array(cls, src, regions=None):
+        """Loads a document containing a single cell as a MorphologyArray"""
+
+        cells = list(cls.iter_cells(src, regions=regions))
+        if len(cells) != 1:
+            raise MorphologyImportError('Expected a single cell, found %d' % len(cells))
+        return cells[0][1]
+
+    @classmethod
+    def load_tree(cls, src, regions=None):
+        """Loads a document containing a single cell as a MorphologyTree.
+        Segment names are used as the idtags of the sections."""
+
+        cells = list(cls.iter_cells(src, regions=regions))
+        if len(cells) != 1:
+            raise MorphologyImportError('Expected a single cell, found %d' % len(cells))
+        (_name, array, vertex_idtags) = cells[0]
+        return array.to_tree(vertex_idtags=vertex_idtags)
+
+
+MorphologyImporter.register('fromMorphML', MorphMLStreamLoader.load_array, as_type=MorphologyArray, use_cache=True)
+
+# Don't replace a tree importer that has already been registered, (for
+# example, by import_tree_morphml):
+if not hasattr(MorphologyTree, 'fromMorphML'):
+    MorphologyImporter.register('fromMorphML', MorphMLStreamLoader.load_tree, as_type=MorphologyTree, use_cache=True)
@@ -433,5 +433,7 @@ class MorphMLLoader(object):
 
 MorphologyImporter.register(method_name='fromMorphML',
                             import_functor=MorphMLLoader.load,
-                            as_type=MorphologyTree)
+                            as_type=MorphologyTree,
+                            use_cache=True,
+                            cache_src_arg='neuroMLFileObj')
 
@@ -29,7 +29,7 @@
 #  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------
 
-from Cheetah.Template import Template
+from morphforge.core import TemplateCache
 
 
 from morphforge.simulation.neuron.simulationdatacontainers.mhocfile import MHocFileData
@@ -65,50 +65,61 @@ class NEURONChl_GeneralRecordFromModBasedChannel(NEURONRecordableOnLocation):
             recordobj=self,
            )
 
+    def supports_nrn_build(self):
+        return True
 
+    def build_nrn(self, nrnbuild_obj):
+        nrnbuild_obj.create_record_from_modfile(
+            recordobj=self,
+            cell_location=self.cell_location,
+            modvariable=self.modvar,
+            mod_neuronsuffix=self.nrnsuffix,
+            )
 
 
 
 
 
 
-chlHoc = """
 
-$(cell_name).internalsections [$section_index] {
+
+chlHoc = """
+#for setup, selector, variables in $section_groups:
+$setup
+$selector {
     // Eqnset Channels
     insert $neuron_suffix
     #for variable_name, variable_value_nounit, variable_value_with_unit, variable_unit in $variables:
     $(variable_name)_$(neuron_suffix) = $variable_value_nounit //(in $variable_unit, converted from $variable_value_with_unit)
     #end for
 }
+#end for
 """
 
 
 
 def build_hoc_default(cell, section, hocfile_obj, mta,  units, nrnsuffix):
+    build_hoc_default_sections(cell=cell, sections=[section], hocfile_obj=hocfile_obj, mta=mta, units=units, nrnsuffix=nrnsuffix)
+
+
+def build_hoc_default_sections(cell, sections, hocfile_obj, mta, units, nrnsuffix):
 
     cell_hoc = hocfile_obj[MHocFileData.Cells][cell]
-    cell_name = cell_hoc['cell_name']
-    section_index = cell_hoc['section_indexer'][section]
 
-    # Calculate the values of the variables for the section:
-    variables = []
-    for variable_name in mta.mechanism.get_variables():
-        variable_value_with_unit = mta.applicator.get_variable_value_for_section(variable_name=variable_name, section=section)
-        variable_unit = units[variable_name]
-        variable_value_nounit = variable_value_with_unit.rescale(variable_unit).magnitude
-        variables.append([variable_name, variable_value_nounit, variable_value_with_unit, variable_unit])
+    # Sections with the same values are written as one block:
+    section_groups = HocModUtils.get_mechanism_section_groups(cell_hoc=cell_hoc, sections=sections, mta=mta, units=units)
 
     tmpl_dict = {
-        'cell_name': cell_name,
-        'section_index': section_index,
         'neuron_suffix': nrnsuffix,
-        'variables': variables,
+        'section_groups': section_groups,
         }
 
-    # Add the data to the HOC file
-    hoc_text = Template(chlHoc, tmpl_dict).respond()
+    # Add the data to the HOC file:
+    hoc_text = TemplateCache.render(chlHoc, tmpl_dict)
     hocfile_obj.add_to_section(MHOCSections.InitCellMembranes,
                                hoc_text)
 
 
+def build_nrn_default(cell, section, nrnbuild_obj, mta, units, nrnsuffix):
+    nrnbuild_obj.insert_mechanism(cell=cell, section=section, mta=mta,
+                                  neuron_suffix=nrnsuffix, units=units)
@@ -34,6 +34,8 @@ from morphforge.simulation.neuron.biophysics.mm_neuron import NEURONChl_Base
 from morphforge.simulation.neuron.biophysics.modfile import ModFile
 from morphforge.simulation.neuron.core.neuronsimulationenvironment import NEURONEnvironment
 from morphforgecontrib.simulation.membranemechanisms.common.neuron import build_hoc_default 
+from morphforgecontrib.simulation.membranemechanisms.common.neuron import build_hoc_default_sections
+from morphforgecontrib.simulation.membranemechanisms.common.neuron import build_nrn_default
 from morphforgecontrib.simulation.membranemechanisms.exisitingmodfile.core import SimulatorSpecificChannel
 
 import re
@@ -68,6 +70,15 @@ class NEURONChl_SimulatorSpecificChannel(NEURONChl_Base, SimulatorSpecificChanne
         #Units = dict([(p.symbol, pq.Quantity(1., p.get_dimension().simplified)) for p in self.eqnset.parameters])
         build_hoc_default(cell=cell, section=section, hocfile_obj=hocfile_obj, mta=mta , units={}, nrnsuffix=self.nrnsuffix)
 
+    def build_hoc_sections(self, cell, sections, hocfile_obj, mta):
+        build_hoc_default_sections(cell=cell, sections=sections, hocfile_obj=hocfile_obj, mta=mta, units={}, nrnsuffix=self.nrnsuffix)
+
+    def supports_nrn_build(self):
+        return True
+
+    def build_nrn_section(self, cell, section, nrnbuild_obj, mta):
+        build_nrn_default(cell=cell, section=section, nrnbuild_obj=nrnbuild_obj, mta=mta, units={}, nrnsuffix=self.nrnsuffix)
+
     def create_modfile(self, modfile_set):
         mod_file = ModFile(name='EqnSetModfile', modtxt=self.mod_text)
         modfile_set.append(mod_file)
@@ -29,11 +29,12 @@
 #  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------
 
-from Cheetah.Template import Template
+from morphforge.core import TemplateCache
 from morphforge.simulation.neuron import ModFile
 from morphforge.simulation.neuron.simulationdatacontainers import MHocFileData
 from morphforge.simulation.neuron.simulationdatacontainers import MHOCSections
 from morphforge.simulation.neuron.hocmodbuilders import MM_ModFileWriterBase
+from morphforge.simulation.neuron.hocmodbuilders import HocModUtils
 
 
 class NEURONChlWriterAlphaBetaBeta(object):
@@ -41,46 +42,47 @@ class NEURONChlWriterAlphaBetaBeta(object):
 
 
     chlHoc = """
-
-$(cell_name).internalsections [$section_index] {
+#for setup, selector, variables in $section_groups:
+$setup
+$selector {
     // AlphaBetaBeta Channels
     insert $neuron_suffix
     #for variable_name, variable_value_nounit, variable_value_with_unit, variable_unit in $variables:
     $(variable_name)_$(neuron_suffix) = $variable_value_nounit //(in $variable_unit, converted from $variable_value_with_unit)
     #end for
 }
+#end for
 """
 
     Units = {'gBar': 'S/cm2', 'e_rev': 'mV', 'gScale': ''}
 
     @classmethod
-    def build_hoc_section(self, cell, section, hocfile_obj, mta):
+    def build_hoc_section(cls, cell, section, hocfile_obj, mta):
+        cls.build_hoc_sections(cell=cell, sections=[section], hocfile_obj=hocfile_obj, mta=mta)
 
-        cell_hoc = hocfile_obj[MHocFileData.Cells][cell]
-        cell_name = cell_hoc['cell_name']
-        section_index = cell_hoc['section_indexer'][section]
+    @classmethod
+    def build_hoc_sections(cls, cell, sections, hocfile_obj, mta):
 
+        cell_hoc = hocfile_obj[MHocFileData.Cells][cell]
         neuron_suffix = mta.mechanism.get_neuron_suffix()
 
-        # Calculate the values of the variables for the section:
-        variables = []
-        for variable_name in mta.mechanism.get_variables():
-            variable_value_with_unit = mta.applicator.get_variable_value_for_section(variable_name=variable_name, section=section)
-            variable_unit = NEURONChlWriterAlphaBetaBeta.Units[variable_name]
-            variable_value_nounit = variable_value_with_unit.rescale(variable_unit).magnitude
-            variables.append([variable_name, variable_value_nounit, variable_value_with_unit, variable_unit])
+        # Sections with the same values are written as one block:
+        section_groups = HocModUtils.get_mechanism_section_groups(cell_hoc=cell_hoc, sections=sections, mta=mta, units=NEURONChlWriterAlphaBetaBeta.Units)
 
         tmpl_dict = {
-            'cell_name': cell_name,
-            'section_index': section_index,
             'neuron_suffix': neuron_suffix,
-            'variables': variables,
+            'section_groups': section_groups,
             }
 
-        # Add the data to the HOC file
-        hocfile_obj.add_to_section(MHOCSections.InitCellMembranes,  Template(NEURONChlWriterAlphaBetaBeta.chlHoc, tmpl_dict).respond())
-
+        # Add the data to the HOC file:
+        hoc_text = TemplateCache.render(NEURONChlWriterAlphaBetaBeta.chlHoc, tmpl_dict)
+        hocfile_obj.add_to_section(MHOCSections.InitCellMembranes, hoc_text)
 
+    @classmethod
+    def build_nrn_section(cls, cell, section, nrnbuild_obj, mta):
+        nrnbuild_obj.insert_mechanism(cell=cell, section=section, mta=mta,
+                neuron_suffix=mta.mechanism.get_neuron_suffix(),
+                units=NEURONChlWriterAlphaBetaBeta.Units)
 
     @classmethod
     def build_mod(cls, alphabeta_beta_chl, modfile_set):
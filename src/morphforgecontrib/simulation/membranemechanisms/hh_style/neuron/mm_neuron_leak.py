@@ -61,6 +61,17 @@ class NEURONChl_Leak_Record(NEURONRecordableOnLocation):
             recordobj=self,
             )
 
+    def supports_nrn_build(self):
+        return True
+
+    def build_nrn(self, nrnbuild_obj):
+        nrnbuild_obj.create_record_from_modfile(
+            recordobj=self,
+            cell_location=self.cell_location,
+            modvariable=self.modvar,
+            mod_neuronsuffix=self.leak_chl.get_neuron_suffix(),
+            )
+
 
 class NEURONChl_Leak_ConductanceDensityRecord(NEURONChl_Leak_Record):
 
@@ -120,6 +131,15 @@ class NEURONChl_Leak(StdChlLeak, NEURONChl_Base):
     def build_hoc_section(self, cell, section, hocfile_obj, mta):
         return NEURONChlWriterLeak.build_hoc_section(cell=cell, section=section, hocfile_obj=hocfile_obj, mta=mta)
 
+    def build_hoc_sections(self, cell, sections, hocfile_obj, mta):
+        return NEURONChlWriterLeak.build_hoc_sections(cell=cell, sections=sections, hocfile_obj=hocfile_obj, mta=mta)
+
+    def supports_nrn_build(self):
+        return True
+
+    def build_nrn_section(self, cell, section, nrnbuild_obj, mta):
+        return NEURONChlWriterLeak.build_nrn_section(cell=cell, section=section, nrnbuild_obj=nrnbuild_obj, mta=mta)
+
     def create_modfile(self, modfile_set):
         m = NEURONChlWriterLeak.build_mod(leak_chl=self,
                                     modfile_set=modfile_set)
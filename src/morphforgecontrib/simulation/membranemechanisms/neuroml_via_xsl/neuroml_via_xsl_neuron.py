@@ -34,6 +34,7 @@ from morphforge.simulation.neuron.biophysics.mm_neuron import NEURONChl_Base
 from morphforge.simulation.neuron.biophysics.modfile import ModFile
 from morphforge.simulation.neuron.core.neuronsimulationenvironment import NEURONEnvironment
 from morphforgecontrib.simulation.membranemechanisms.common.neuron import build_hoc_default
+from morphforgecontrib.simulation.membranemechanisms.common.neuron import build_hoc_default_sections
 
 from morphforgecontrib.simulation.membranemechanisms.neuroml_via_xsl.neuroml_via_xsl_core import NeuroML_Via_XSL_Channel
 
@@ -68,31 +69,37 @@ class NeuroML_Via_XSL_ChannelNEURON(NEURONChl_Base, NeuroML_Via_XSL_Channel):
 
     def build_hoc_section(self, cell, section, hocfile_obj, mta):
         build_hoc_default(cell=cell, section=section, hocfile_obj=hocfile_obj, mta=mta , units={}, nrnsuffix=self.nrnsuffix)
+        self._build_hoc_erev(cell=cell, sections=[section], hocfile_obj=hocfile_obj)
 
+    def build_hoc_sections(self, cell, sections, hocfile_obj, mta):
+        build_hoc_default_sections(cell=cell, sections=sections, hocfile_obj=hocfile_obj, mta=mta, units={}, nrnsuffix=self.nrnsuffix)
+        self._build_hoc_erev(cell=cell, sections=sections, hocfile_obj=hocfile_obj)
 
+    def _build_hoc_erev(self, cell, sections, hocfile_obj):
         # ISSUE 'A': Hack around the reversal potential initialisation issue:
-        if self.chlData.iv_default_erev:
-
-            # Get the reversal potential out, takling care of the
-            # units (expected in 'mV') :
-            vrev = float(self.chlData.iv_default_erev)
-            if self.chlData.units == 'Physiological Units':
-                pass
-            elif self.chlData.units == 'SI Units':
-                vrev = vrev * 1000.
-            else:
-                assert False
-
-            tmpl_dict = hocfile_obj[MHocFileData.Cells][cell]
-            cell_name = tmpl_dict['cell_name']
-            section_indexer = tmpl_dict['section_indexer']
-            d = []
-            for s in cell.morphology:
-                d.append("""%s.internalsections [%d] { e%s=%f
-                        }"""%(cell_name, section_indexer[s],
-                            self.chlData.iv_ion,
-                            vrev))
-            hocfile_obj.add_to_section(MHOCSections.InitCellMembranes, "\n".join(d))
+        if not self.chlData.iv_default_erev:
+            return
+
+        # Get the reversal potential out, takling care of the
+        # units (expected in 'mV') :
+        vrev = float(self.chlData.iv_default_erev)
+        if self.chlData.units == 'Physiological Units':
+            pass
+        elif self.chlData.units == 'SI Units':
+            vrev = vrev * 1000.
+        else:
+            assert False
+
+        tmpl_dict = hocfile_obj[MHocFileData.Cells][cell]
+        cell_name = tmpl_dict['cell_name']
+        section_indexer = tmpl_dict['section_indexer']
+        d = []
+        for s in sections:
+            d.append("""%s.internalsections [%d] { e%s=%f
+                    }"""%(cell_name, section_indexer[s],
+                        self.chlData.iv_ion,
+                        vrev))
+        hocfile_obj.add_to_section(MHOCSections.InitCellMembranes, "\n".join(d))
 
 
 
@@ -37,6 +37,7 @@ from morphforge.simulation.neuron.biophysics.modfile import ModFile
 from morphforge.simulation.neuron.objects.neuronrecordable import NEURONRecordableOnLocation
 from morphforge.simulation.neuron.hocmodbuilders.hocmodutils import HocModUtils
 from morphforgecontrib.simulation.membranemechanisms.common.neuron import build_hoc_default
+from morphforgecontrib.simulation.membranemechanisms.common.neuron import build_hoc_default_sections
 from neurounits.neurounitparser import NeuroUnitParser
 from morphforge.core import ObjectLabeller
 
@@ -160,6 +161,9 @@ class Neuron_NeuroUnitEqnsetMechanism(NEURONChl_Base, NeuroUnitEqnsetMechanism):
     def build_hoc_section(self, cell, section, hocfile_obj, mta):
         build_hoc_default(cell=cell, section=section, hocfile_obj=hocfile_obj, mta=mta , units=self.units, nrnsuffix=self.buildparameters.suffix)
 
+    def build_hoc_sections(self, cell, sections, hocfile_obj, mta):
+        build_hoc_default_sections(cell=cell, sections=sections, hocfile_obj=hocfile_obj, mta=mta, units=self.units, nrnsuffix=self.buildparameters.suffix)
+
     def create_modfile(self, modfile_set):
         modfile_set.append(ModFile(name=self.name, modtxt=self.nmodl_txt))
 
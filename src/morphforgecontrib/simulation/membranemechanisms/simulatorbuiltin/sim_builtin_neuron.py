@@ -35,6 +35,8 @@ from morphforge.simulation.neuron.biophysics.mm_neuron import NEURONChl_Base
 from morphforge.simulation.neuron.biophysics.modfile import ModFile
 from morphforge.simulation.neuron.core.neuronsimulationenvironment import NEURONEnvironment
 from morphforgecontrib.simulation.membranemechanisms.common.neuron import build_hoc_default 
+from morphforgecontrib.simulation.membranemechanisms.common.neuron import build_hoc_default_sections
+from morphforgecontrib.simulation.membranemechanisms.common.neuron import build_nrn_default
 from morphforgecontrib.simulation.membranemechanisms.exisitingmodfile.core import SimulatorSpecificChannel
 from morphforgecontrib.simulation.membranemechanisms.simulatorbuiltin.sim_builtin_core import BuiltinChannel
 
@@ -55,6 +57,15 @@ class BuiltinChannelNEURON(NEURONChl_Base, BuiltinChannel):
     def build_hoc_section(self, cell, section, hocfile_obj, mta):
         build_hoc_default(cell=cell, section=section, hocfile_obj=hocfile_obj, mta=mta , units={}, nrnsuffix=self.sim_chl_name)
 
+    def build_hoc_sections(self, cell, sections, hocfile_obj, mta):
+        build_hoc_default_sections(cell=cell, sections=sections, hocfile_obj=hocfile_obj, mta=mta, units={}, nrnsuffix=self.sim_chl_name)
+
+    def supports_nrn_build(self):
+        return True
+
+    def build_nrn_section(self, cell, section, nrnbuild_obj, mta):
+        build_nrn_default(cell=cell, section=section, nrnbuild_obj=nrnbuild_obj, mta=mta, units={}, nrnsuffix=self.sim_chl_name)
+
     def create_modfile(self, modfile_set):
         pass
 
@@ -29,7 +29,7 @@
 #  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------
 
-from Cheetah.Template import Template
+from morphforge.core import TemplateCache
 
 from morphforge.simulation.neuron.simulationdatacontainers.mhocfile import MHocFileData
 from morphforge.simulation.neuron.simulationdatacontainers.mhocfile import MHOCSections
@@ -68,7 +68,7 @@ class NeuronSynapseTriggerVoltageThreshold(PreSynapticMech_VoltageThreshold):
             }
 
         hocfile_obj.add_to_section(MHOCSections.InitSynapsesChemPre,
-                                   Template(preTmpl, data).respond())
+                                   TemplateCache.render(preTmpl, data))
 
         hocfile_obj[MHocFileData.Synapses][self.synapse]['PRE'] = data
 
@@ -111,8 +111,7 @@ class NeuronSynapseTriggerTimeList(PreSynapticMech_TimeList):
             }
 
         hocfile_obj.add_to_section(MHOCSections.InitSynapsesChemPre,
-                                   Template(preTmplList,
-                                   data).respond())
+                                   TemplateCache.render(preTmplList, data))
         hocfile_obj[MHocFileData.Synapses][self.synapse]['PRE'] = data
 
     def build_mod(self, modfile_set):
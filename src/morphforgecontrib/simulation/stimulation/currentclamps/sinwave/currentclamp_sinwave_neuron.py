@@ -38,7 +38,7 @@ from morphforgecontrib.simulation.stimulation.currentclamps.sinwave.currentclamp
 from morphforge.simulation.neuron.objects.neuronobject import NEURONObject
 from morphforge.core.quantities.fromcore import unit
 from morphforge.simulation.neuron.biophysics.modfile import ModFile
-from Cheetah.Template import Template
+from morphforge.core import TemplateCache
 from morphforge.core import ObjectLabeller
 
 
@@ -144,7 +144,7 @@ class NEURONCurrentClampSinwave(CurrentClampSinwave, NEURONObject):
             'bias': self.bias,
             }
 
-        hoc_txt = Template(ccSinWaveHOCTmpl, data).respond()
+        hoc_txt = TemplateCache.render(ccSinWaveHOCTmpl, data)
         hocfile_obj.add_to_section(MHOCSections.InitCurrentClamps, hoc_txt)
         hocfile_obj[MHocFileData.CurrentClamps][self] = data
 
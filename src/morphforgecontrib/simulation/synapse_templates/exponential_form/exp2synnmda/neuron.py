@@ -46,7 +46,7 @@ from neurounits.neurounitparser import NeuroUnitParser
 
 from morphforge.core import ObjectLabeller
 from morphforge.simulation.base.networks import PostSynapticMech
-from Cheetah.Template import Template
+from morphforge.core import TemplateCache
 
 from morphforge.simulation.base import PostSynapticMechTemplate
 from morphforge.simulation.base import PostSynapticMechInstantiation
@@ -135,7 +135,7 @@ class NEURONPostSynapticMechTemplate_Exp2SynNMDA(PostSynapticMech_Exp2SynNMDA_Ba
                }
 
         hocfile_obj.add_to_section(MHOCSections.InitSynapsesChemPost,
-                                   Template(exp2HOCTmpl, data).respond())
+                                   TemplateCache.render(exp2HOCTmpl, data))
 
         hocfile_obj[MHocFileData.Synapses][instance.synapse] = {}
         hocfile_obj[MHocFileData.Synapses][instance.synapse]['POST'] = data
@@ -32,7 +32,7 @@
 from morphforge.simulation.neuron.simulationdatacontainers.mhocfile import MHOCSections
 from morphforge.simulation.neuron.simulationdatacontainers.mhocfile import MHocFileData
 from morphforgecontrib.simulation.synapses.core import PostSynapticMech_Exp2SynNMDA
-from Cheetah.Template import Template
+from morphforge.core import TemplateCache
 
 from morphforge.simulation.neuron.networks import Synapse
 from morphforge.simulation.neuron.core.neuronsimulationenvironment import NEURONEnvironment
@@ -118,7 +118,7 @@ class Neuron_PSM_Exp2SynNMDA(PostSynapticMech_Exp2SynNMDA):
             'random_seed': MFRandom.get_seed(),
                }
 
-        hocfile_obj.add_to_section(MHOCSections.InitSynapsesChemPost,  Template(exp2HOCTmpl, data).respond())
+        hocfile_obj.add_to_section(MHOCSections.InitSynapsesChemPost,  TemplateCache.render(exp2HOCTmpl, data))
 
         hocfile_obj[MHocFileData.Synapses][self.synapse] = {}
         hocfile_obj[MHocFileData.Synapses][self.synapse]['POST'] = data
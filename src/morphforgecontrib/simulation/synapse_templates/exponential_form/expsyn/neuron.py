@@ -47,7 +47,7 @@ from neurounits.neurounitparser import NeuroUnitParser
 
 from morphforge.core import ObjectLabeller
 from morphforge.simulation.base.networks import PostSynapticMech
-from Cheetah.Template import Template
+from morphforge.core import TemplateCache
 
 
 from morphforge.simulation.base import PostSynapticMechTemplate
@@ -113,7 +113,7 @@ class NEURONPostSynapticMechTemplate_ExpSyn(PostSynapticMech_ExpSyn_Base, NEURON
 
 
         hocfile_obj.add_to_section(MHOCSections.InitSynapsesChemPost,
-                                   Template(_expr_tmpl, data).respond())
+                                   TemplateCache.render(_expr_tmpl, data))
 
         hocfile_obj[MHocFileData.Synapses][instance.synapse] = {}
         hocfile_obj[MHocFileData.Synapses][instance.synapse]['POST'] = data
@@ -46,7 +46,7 @@ from neurounits.neurounitparser import NeuroUnitParser
 
 from morphforge.core import ObjectLabeller
 from morphforge.simulation.base.networks import PostSynapticMech
-from Cheetah.Template import Template
+from morphforge.core import TemplateCache
 
 
 from morphforge.simulation.base import PostSynapticMechTemplate
@@ -199,7 +199,7 @@ class NEURONPostSynapticTemplate_NeuroUnitEquationSetPostSynaptic(NeuroUnitEqnse
             'parameters': [(k, float(v/instance.src_tmpl.units[k])) for (k, v) in params.iteritems()]
                }
 
-        hocfile_obj.add_to_section(MHOCSections.InitSynapsesChemPost,  Template(exp2HOCTmpl, data).respond())
+        hocfile_obj.add_to_section(MHOCSections.InitSynapsesChemPost,  TemplateCache.render(exp2HOCTmpl, data))
 
         hocfile_obj[MHocFileData.Synapses][instance.synapse] = {}
         hocfile_obj[MHocFileData.Synapses][instance.synapse]['POST'] = data
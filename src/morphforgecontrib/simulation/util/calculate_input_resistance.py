@@ -73,9 +73,11 @@ class CellAnalysis_StepInputResponse(object):
             self.plot()
 
     def simulate_all(self):
-        for c in self.currents:
-            (tr_v, tr_i) = self.simulate(c)
-            self.result_traces[c] = (tr_v, tr_i)
+        batch = self.env.SimulationBatch(builder=self.build_simulation,
+                parameters=[{'current': c} for c in self.currents])
+        for (task, res) in batch.iter_results():
+            current = task.parameters['current']
+            self.result_traces[current] = self.get_result_traces(res)
 
     def plot(self):
         trs = list(itertools.chain(*self.result_traces.values()))
@@ -86,6 +88,10 @@ class CellAnalysis_StepInputResponse(object):
                   **self.tagviewer_kwargs)
 
     def simulate(self, current):
+        res = self.build_simulation(current).run()
+        return self.get_result_traces(res)
+
+    def build_simulation(self, current):
 
         sim = self.env.Simulation(**self.sim_kwargs)
         cell = self.cell_functor(sim=sim)
@@ -101,9 +107,9 @@ class CellAnalysis_StepInputResponse(object):
         sim.record(cell, name='SomaVoltage', cell_location=soma_loc,
                    what=Cell.Recordables.MembraneVoltage,
                    description='Response to i_inj=%s ' % current)
+        return sim
 
-        res = sim.run()
-
+    def get_result_traces(self, res):
         return (res.get_trace('SomaVoltage'), res.get_trace('Current'))
 
 
@@ -137,11 +143,13 @@ class CellAnalysis_ReboundResponse(object):
             self.plot()
 
     def simulate_all(self):
-        for current1 in self.currents_base:
-            for current2 in self.currents_rebound:
-                (tr_v, tr_i) = self.simulate(current1, current2)
-                key = (int(current1.rescale('pA').magnitude), int(current2.rescale('pA').magnitude))
-                self.result_traces[key] = (tr_v, tr_i)
+        batch = self.env.SimulationBatch(builder=self.build_simulation,
+                parameters=[{'current_base': current1, 'current_rebound': current2} for current1 in self.currents_base for current2 in self.currents_rebound])
+        for (task, res) in batch.iter_results():
+            current1 = task.parameters['current_base']
+            current2 = task.parameters['current_rebound']
+            key = (int(current1.rescale('pA').magnitude), int(current2.rescale('pA').magnitude))
+            self.result_traces[key] = self.get_result_traces(res)
 
 
     def plot(self):
@@ -188,6 +196,10 @@ class CellAnalysis_ReboundResponse(object):
 
 
     def simulate(self, current_base, current_rebound):
+        res = self.build_simulation(current_base, current_rebound).run()
+        return self.get_result_traces(res)
+
+    def build_simulation(self, current_base, current_rebound):
 
         sim = self.env.Simulation(**self.sim_kwargs)
         cell = self.cell_functor(sim=sim)
@@ -203,9 +215,9 @@ class CellAnalysis_ReboundResponse(object):
         sim.record(cc3, name="Current3",      what=CurrentClamp.Recordables.Current,  description="CurrentClampCurrent")
 
         sim.record(cell, name="SomaVoltage", cell_location=soma_loc,  what=Cell.Recordables.MembraneVoltage,  description="Response to iInj1=%s iInj2=%s"%(current_base, current_rebound))
+        return sim
 
-        res = sim.run()
-
+    def get_result_traces(self, res):
 
         #SimulationSummariser(res, "/home/michael/Desktop/ForRoman.pdf")
 
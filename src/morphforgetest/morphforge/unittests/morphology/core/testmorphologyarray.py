@@ -59,6 +59,14 @@ class TestMorphologyArray(object):
         assert len(m) == 2
 
 
+    def testConnectionIndex(self):
+        m = MorphologyArray(vertices= ([0,0,0,1],[0,0,1,1],[0,0,2,1],[0,1,0,1]) , connectivity = ([1,0],[2,1],[3,0]))
+        assert m.index_of_connection(0, 1) == 0
+        assert m.index_of_connection(1, 0) == 0
+        assert m.index_of_connection(2, 1) == 1
+        assert m.index_of_connection(0, 3) == 2
+        assert set(m.get_leaf_vertices_indices()) == set([2, 3])
+
     def testConstruction2(self):
         pass
 
@@ -30,11 +30,37 @@
 # ----------------------------------------------------------------------
 
 
+import numpy as np
+from morphforge.morphology.core import MorphologyTree, Section, Region
+from morphforge.morphology.core import MorphLocation, MorphPath
+
 
 class TestMorphologyTree(object):
 
     def testConstruction1(self):
         pass
+
+    def testSectionCache(self):
+        soma = Region('soma')
+        dummy = Section(region=None, x=0, y=0, z=0, r=1)
+        s1 = dummy.create_distal_section(region=soma, x=1, y=0, z=0, r=1, idtag='s1')
+        s2 = s1.create_distal_section(region=None, x=2, y=0, z=0, r=1)
+        s3 = dummy.create_distal_section(region=soma, x=0, y=1, z=0, r=1)
+        m = MorphologyTree(dummysection=dummy)
+
+        assert len(m) == 3
+        assert list(m) == [s1, s2, s3]
+        assert m.get_section_indexer()[s3] == 2
+        assert m.get_section('s1') is s1
+        assert m.get_regions() == [soma]
+        assert m.get_sections_in_region(soma) == [s1, s3]
+
+        # Adding a section should invalidate the cache:
+        s4 = s2.create_distal_section(region=None, x=3, y=0, z=0, r=1, idtag='s4')
+        assert len(m) == 4
+        assert list(m) == [s1, s2, s4, s3]
+        assert m.get_section('s4') is s4
+
     def testConstruction2(self):
         pass
     def testConstruction3(self):
@@ -42,3 +68,62 @@ class TestMorphologyTree(object):
     def testConstruction4(self):
         pass
 
+
+    def testVectorisedGeometry(self):
+        dummy = Section(region=None, x=0, y=0, z=0, r=1)
+        s1 = dummy.create_distal_section(region=None, x=3, y=4, z=0, r=2)
+        s1.create_distal_section(region=None, x=3, y=4, z=10, r=1)
+        dummy.create_distal_section(region=None, x=0, y=0, z=-2, r=1)
+        m = MorphologyTree(dummysection=dummy)
+
+        assert np.allclose(m.lengths(), [5, 10, 2])
+        assert np.allclose(m.lengths(), [s.get_length() for s in m])
+        assert np.allclose(m.areas(), [s.get_area() for s in m])
+        assert np.allclose(m.areas(include_end_if_terminal=True), [s.get_area(include_end_if_terminal=True) for s in m])
+        assert np.allclose(m.volumes(), [s.get_volume() for s in m])
+
+    def testFingerprint(self):
+        from morphforge.simulation.base.core.simulationfingerprint import SimulationFingerprint
+
+        def build(z):
+            dummy = Section(region=None, x=0, y=0, z=0, r=1)
+            s1 = dummy.create_distal_section(region=Region('soma'), x=3, y=4, z=0, r=2, idtag='s1')
+            s1.create_distal_section(region=None, x=3, y=4, z=z, r=1)
+            return MorphologyTree(dummysection=dummy)
+
+        # The (automatic) name should not change the fingerprint, but the
+        # geometry should:
+        assert SimulationFingerprint.get_md5(build(10)) == SimulationFingerprint.get_md5(build(10))
+        assert SimulationFingerprint.get_md5(build(10)) != SimulationFingerprint.get_md5(build(11))
+
+        # Dictionaries keyed on Sections are ordered by their position in
+        # the morphology:
+        def section_dict(z):
+            return dict([(section, i) for (i, section) in enumerate(build(z))])
+        assert SimulationFingerprint.get_md5(section_dict(10)) == SimulationFingerprint.get_md5(section_dict(10))
+        assert SimulationFingerprint.get_md5(section_dict(10)) != SimulationFingerprint.get_md5(section_dict(11))
+
+    def testMetricsAndPaths(self):
+        dummy = Section(region=None, x=0, y=0, z=0, r=1)
+        s1 = dummy.create_distal_section(region=None, x=10, y=0, z=0, r=1)
+        s2 = s1.create_distal_section(region=None, x=10, y=5, z=0, r=1)
+        s3 = s1.create_distal_section(region=None, x=10, y=-7, z=0, r=1)
+        s4 = s3.create_distal_section(region=None, x=10, y=-10, z=0, r=1)
+        s5 = dummy.create_distal_section(region=None, x=-2, y=0, z=0, r=1)
+        m = MorphologyTree(dummysection=dummy)
+
+        metrics = m.get_metrics()
+        assert metrics.get_distal_path_length(s4) == 20
+        assert metrics.get_proximal_path_length(s4) == 17
+        assert metrics.branch_orders[s1._index] == 0
+        assert metrics.branch_orders[s4._index] == 1
+        assert metrics.subtree_sizes[s1._index] == 4
+
+        # Parent-child, siblings and different root sections:
+        assert np.fabs(MorphPath(MorphLocation(s1, 0.5), MorphLocation(s4, 1.0)).get_length() - 15) < 1e-9
+        assert np.fabs(MorphPath(MorphLocation(s2, 1.0), MorphLocation(s4, 0.0)).get_length() - 12) < 1e-9
+        assert np.fabs(MorphPath(MorphLocation(s5, 1.0), MorphLocation(s2, 0.0)).get_length() - 12) < 1e-9
+
+        # Adding sections should update the metrics:
+        s6 = s5.create_distal_section(region=None, x=-5, y=0, z=0, r=1)
+        assert m.get_metrics().get_distal_path_length(s6) == 5
@@ -0,0 +1,143 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+from StringIO import StringIO
+import xml.dom.minidom
+
+import numpy as np
+from morphforgecontrib.morphology.importers.import_array_morphml import MorphMLStreamLoader
+
+
+morphml_src = """<?xml version="1.0" encoding="UTF-8"?>
+<morphml xmlns="http://morphml.org/morphml/schema" xmlns:meta="http://morphml.org/metadata/schema" length_units="micrometer">
+  <meta:notes>A sample cell</meta:notes>
+  <cells>
+    <cell name="SampleCell">
+      <segments>
+        <segment id="0" name="Soma" cable="0">
+          <proximal x="0" y="0" z="0" diameter="10"/>
+          <distal x="10" y="0" z="0" diameter="10"/>
+        </segment>
+        <segment id="1" name="Dend1" parent="0" cable="1">
+          <proximal x="10" y="0" z="0" diameter="10"/>
+          <distal x="20" y="0" z="0" diameter="3"/>
+        </segment>
+        <segment id="2" name="Dend2" parent="1" cable="1">
+          <distal x="30" y="0" z="0" diameter="2"/>
+        </segment>
+        <segment id="3" name="Dend3" parent="0" cable="2">
+          <proximal x="10" y="0" z="0" diameter="4"/>
+          <distal x="10" y="15" z="0" diameter="2"/>
+        </segment>
+        <segment id="4" name="Dend4" parent="3" cable="2">
+          <proximal x="10" y="16" z="0" diameter="2"/>
+          <distal x="10" y="25" z="0" diameter="1"/>
+        </segment>
+      </segments>
+      <cables>
+        <cable id="0" name="SomaCable">
+          <meta:group>soma_group</meta:group>
+        </cable>
+        <cable id="1" name="Dendrite1"/>
+        <cable id="2" name="Dendrite2"/>
+        <cablegroup name="dendrite_group">
+          <cable id="1"/>
+          <cable id="2"/>
+        </cablegroup>
+      </cables>
+    </cell>
+  </cells>
+</morphml>
+"""
+
+
+def _load_reference(src):
+    """Reads the segments with a DOM, using the same rules as the minidom
+    importer in import_tree_morphml: a child's proximal point is its own
+    <proximal> if it has one, otherwise its parent's distal point. Returns
+    {segment-name: (region-name, proximal, distal)}"""
+
+    def children(node, tag):
+        return [n for n in node.childNodes if n.nodeType == n.ELEMENT_NODE and n.tagName.split(':')[-1] == tag]
+
+    def xyzd(node):
+        return tuple([float(node.getAttribute(a)) for a in ('x', 'y', 'z', 'diameter')])
+
+    cell = xml.dom.minidom.parseString(src).getElementsByTagName('cell')[0]
+    cables = children(cell, 'cables')[0]
+    cable_regions = {}
+    for cable in children(cables, 'cable'):
+        for group in children(cable, 'group'):
+            cable_regions[cable.getAttribute('id')] = group.firstChild.data.strip()
+    for cablegroup in children(cables, 'cablegroup'):
+        for cable in children(cablegroup, 'cable'):
+            cable_regions[cable.getAttribute('id')] = cablegroup.getAttribute('name')
+
+    segments = {}
+    distals = {}
+    for segment in children(children(cell, 'segments')[0], 'segment'):
+        distal = xyzd(children(segment, 'distal')[0])
+        proximal_nodes = children(segment, 'proximal')
+        proximal = (xyzd(proximal_nodes[0]) if proximal_nodes else distals[segment.getAttribute('parent')])
+        distals[segment.getAttribute('id')] = distal
+        segments[segment.getAttribute('name')] = (cable_regions.get(segment.getAttribute('cable')), proximal, distal)
+    return segments
+
+
+class TestImportMorphML(object):
+
+    def testMatchesDOMImporter(self):
+        reference = _load_reference(morphml_src)
+        tree = MorphMLStreamLoader.load_tree(StringIO(morphml_src))
+
+        sections = dict([(section.idtag, section) for section in tree if section.idtag])
+        assert set(sections.keys()) == set(reference.keys())
+        for (name, (region_name, proximal, distal)) in reference.items():
+            section = sections[name]
+            (x, y, z, d) = distal
+            assert np.allclose(section.get_distal_npa4(), (x, y, z, d / 2.0))
+            (x, y, z, d) = proximal
+            assert np.allclose(section.get_proximal_npa4(), (x, y, z, d / 2.0))
+            assert section.region.name == region_name.replace('_', '')
+
+        # Only the segments with a proximal point that differs from their
+        # parent's distal point need an extra section:
+        assert len(tree) == len(reference) + 2
+
+    def testArray(self):
+        array = MorphMLStreamLoader.load_array(StringIO(morphml_src))
+        assert len(array) == 7
+        assert np.allclose(array._vertices[0], (0, 0, 0, 5))
+
+    def testCells(self):
+        cells = list(MorphMLStreamLoader.iter_cells(StringIO(morphml_src)))
+        assert [name for (name, _array, _idtags) in cells] == ['SampleCell']
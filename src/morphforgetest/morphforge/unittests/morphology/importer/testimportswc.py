@@ -0,0 +1,86 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+from StringIO import StringIO
+
+import numpy as np
+from morphforge.morphology.importer.import_array_swc import NewSWCLoader
+from morphforge.morphology.errors import MorphologyImportError
+
+
+swc_cell = """
+# A comment line
+1 1 0.0 0.0 0.0 1.0 -1
+
+2 1 1.0 0.0 0.0 1.0 1   # Trailing comment
+5 3 2.0 0.0 0.0 0.5 2
+4 3 1.0 1.0 0.0 0.5 2
+"""
+
+
+class TestImportSWC(object):
+
+    def testCommentsAndBlankLines(self):
+        m = NewSWCLoader.load_swc_single(StringIO(swc_cell))
+        assert len(m) == 3
+        assert np.allclose(m._vertices[2], [2.0, 0.0, 0.0, 0.5])
+        assert list(m._section_types) == [1, 3, 3]
+        assert set(m.connections_to_index(1)) == set([0, 2, 3])
+
+    def testSmallChunks(self):
+        rows = list(NewSWCLoader.iter_swc_rows(StringIO(swc_cell), chunk_size=5))
+        assert np.vstack(rows).shape == (4, 7)
+
+    def testMalformedRows(self):
+        for bad_line in ['3 3 2.0 0.0 0.0 0.5', '3 3 2.0 0.0 0.0 0.5 2 7', '3 3 2.0 abc 0.0 0.5 2']:
+            src = StringIO(swc_cell + bad_line + '\n')
+            try:
+                NewSWCLoader.load_swc_single(src)
+                assert False, 'Malformed line was not rejected: %s' % bad_line
+            except MorphologyImportError:
+                pass
+
+    def testMultipleRoots(self):
+        src = StringIO(swc_cell + '10 1 5.0 0.0 0.0 1.0 -1\n11 1 6.0 0.0 0.0 1.0 10\n')
+        try:
+            NewSWCLoader.load_swc_single(src)
+            assert False, 'Multiple roots were not rejected'
+        except MorphologyImportError:
+            pass
+
+    def testSet(self):
+        text = '7 1 9.0 9.0 9.0 1.0 6\n' + swc_cell + '10 1 5.0 0.0 0.0 1.0 -1\n11 1 6.0 0.0 0.0 1.0 10\n'
+        for chunk_size in (None, 16):
+            morphs = list(NewSWCLoader.iter_swc_set(StringIO(text), chunk_size=chunk_size))
+            # The line before the first root is dropped:
+            assert [len(m) for m in morphs] == [3, 1]
+            assert np.allclose(morphs[1]._vertices, [[5, 0, 0, 1], [6, 0, 0, 1]])
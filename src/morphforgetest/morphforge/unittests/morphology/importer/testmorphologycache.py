@@ -0,0 +1,169 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+import os
+import shutil
+import tempfile
+from StringIO import StringIO
+
+import numpy as np
+from morphforge.core.mgrs import LocMgr, SettingsMgr
+from morphforge.morphology.core import MorphologyArray, MorphologyTree, Section, Region
+from morphforge.morphology.importer.morphologycache import MorphologyCache
+
+
+swc_src = """
+1 1 0.0 0.0 0.0 1.0 -1
+2 1 1.0 0.0 0.0 1.0 1
+3 3 2.0 0.0 0.0 0.5 2
+4 3 1.0 1.0 0.0 0.5 2
+5 4 1.0 2.0 0.0 0.5 4
+"""
+
+
+def _build_tree(src, name=None):
+    """A test importer, that produces a tree with idtags, metadata and a
+    child order that is not the order of the vertices in the file"""
+
+    soma = Region('soma')
+    dend = Region('dend')
+    dummy = Section(region=None, x=0, y=0, z=0, r=1)
+    s1 = dummy.create_distal_section(region=soma, x=1, y=0, z=0, r=1, idtag='s1')
+    s1.create_distal_section(region=dend, x=1, y=5, z=0, r=0.5, idtag='d2')
+    d1 = s1.create_distal_section(region=dend, x=2, y=0, z=0, r=0.5, idtag='d1')
+    d1.create_distal_section(region=None, x=3, y=0, z=0, r=0.5)
+    dummy.create_distal_section(region=soma, x=-1, y=0, z=0, r=1)
+    return MorphologyTree(name=name or 'Generated%s' % src.read().strip(), dummysection=dummy, metadata={'src': 'test', 'values': (1, 2)})
+
+
+class TestMorphologyCache(object):
+
+    def setup_method(self, method):
+        self.cache_dir = tempfile.mkdtemp()
+        self.old_get_dir = LocMgr.__dict__['get_morphology_cache_dir']
+        self.old_max_bytes = SettingsMgr._morphology_cache_max_bytes
+        LocMgr.get_morphology_cache_dir = classmethod(lambda cls: self.cache_dir)
+        MorphologyCache._estimated_size = None
+
+        self.n_loads = 0
+        def counting_import_functor(*args, **kwargs):
+            self.n_loads += 1
+            return _build_tree(*args, **kwargs)
+        self.import_tree = MorphologyCache.wrap_import_functor('fromTest', counting_import_functor, as_type=MorphologyTree)
+
+    def teardown_method(self, method):
+        LocMgr.get_morphology_cache_dir = self.old_get_dir
+        SettingsMgr._morphology_cache_max_bytes = self.old_max_bytes
+        MorphologyCache._estimated_size = None
+        shutil.rmtree(self.cache_dir)
+
+    def testHitAndMiss(self):
+        self.import_tree(StringIO('A'))
+        self.import_tree(StringIO('A'))
+        assert self.n_loads == 1
+
+        # Different contents or options are different entries:
+        self.import_tree(StringIO('B'))
+        self.import_tree(StringIO('A'), 'Named')
+        assert self.n_loads == 3
+
+        MorphologyCache.invalidate(StringIO('A'))
+        self.import_tree(StringIO('A'))
+        assert self.n_loads == 4
+
+    def testTreeEquivalence(self):
+        for args in [(), ('Named',)]:
+            cold = self.import_tree(StringIO('A'), *args)
+            hit = self.import_tree(StringIO('A'), *args)
+            assert hit is not cold
+
+            assert hit.name == cold.name
+            assert hit.metadata == cold.metadata
+            assert len(hit) == len(cold)
+            for (s_hit, s_cold) in zip(hit, cold):
+                assert np.allclose(s_hit.get_distal_npa4(), s_cold.get_distal_npa4())
+                assert s_hit.idtag == s_cold.idtag
+                assert (s_hit.region.name if s_hit.region else None) == (s_cold.region.name if s_cold.region else None)
+                assert len(s_hit.children) == len(s_cold.children)
+            assert [rgn.name for rgn in hit.get_regions()] == [rgn.name for rgn in cold.get_regions()]
+
+    def testArrayEquivalence(self):
+        cold = MorphologyArray.fromSWC(StringIO(swc_src), name='CellA')
+        hit = MorphologyArray.fromSWC(StringIO(swc_src), name='CellA')
+        assert hit is not cold
+        assert hit.name == cold.name == 'CellA'
+        assert np.allclose(hit._vertices, cold._vertices)
+        assert np.all(hit._connectivity == cold._connectivity)
+        assert np.all(hit._section_types == cold._section_types)
+
+        cold_tree = MorphologyTree.fromSWC(StringIO(swc_src))
+        hit_tree = MorphologyTree.fromSWC(StringIO(swc_src))
+        assert hit_tree.has_generated_name()
+        assert [s.get_distal_npa4().tolist() for s in hit_tree] == [s.get_distal_npa4().tolist() for s in cold_tree]
+
+    def testHitsAreWritable(self):
+        # (The arrays of a hit are not shared with the cache, or with the
+        # arrays passed to MorphologyArray):
+        MorphologyArray.fromSWC(StringIO(swc_src), name='CellA')
+        hit = MorphologyArray.fromSWC(StringIO(swc_src), name='CellA')
+        hit._vertices[0, 0] += 1.0
+        reloaded = MorphologyArray.fromSWC(StringIO(swc_src), name='CellA')
+        assert reloaded._vertices[0, 0] == hit._vertices[0, 0] - 1.0
+
+        vertices = np.array(reloaded._vertices)
+        morph = MorphologyArray(vertices=vertices, connectivity=reloaded._connectivity)
+        assert not np.may_share_memory(morph._vertices, vertices)
+
+    def testGeneratedNamesAreNotStored(self):
+        cold = MorphologyArray.fromSWC(StringIO(swc_src))
+        hit = MorphologyArray.fromSWC(StringIO(swc_src))
+        assert cold.has_generated_name() and hit.has_generated_name()
+        assert hit.name != cold.name
+
+    def testEviction(self):
+        self.import_tree(StringIO('A'))
+        entry_size = MorphologyCache._estimated_size
+        assert entry_size > 0
+
+        # Allow room for two entries; the least recently used is removed:
+        SettingsMgr._morphology_cache_max_bytes = 2 * entry_size + entry_size // 2
+        self.import_tree(StringIO('B'))
+        self.import_tree(StringIO('C'))
+        assert len(os.listdir(self.cache_dir)) == 2
+        self.import_tree(StringIO('B'))
+        self.import_tree(StringIO('C'))
+        assert self.n_loads == 3
+        self.import_tree(StringIO('A'))
+        assert self.n_loads == 4
+
+        MorphologyCache.clear()
+        assert os.listdir(self.cache_dir) == []
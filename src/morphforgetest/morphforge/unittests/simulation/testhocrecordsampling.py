@@ -0,0 +1,102 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+
+import quantities as pq
+from morphforge.simulation.base import RecordSampling
+from morphforge.simulation.neuron.hocmodbuilders.hocmodutils import HocModUtils
+from morphforge.simulation.neuron.simulationdatacontainers.mhocfile import MHocFile
+from morphforge.simulation.neuron.simulationdatacontainers.mhocfile import MHocFileData
+from morphforge.simulation.neuron.simulationdatacontainers.mhocfile import MHOCSections
+
+
+class _DummySimulation(object):
+
+    def __init__(self):
+        self.simsettings = {'dt': 0.025 * pq.ms, 'tstop': 100.0 * pq.ms}
+
+
+class _DummyRecordable(object):
+
+    def __init__(self, sampling):
+        self.name = 'Recordable'
+        self.sampling = sampling
+        self.simulation = _DummySimulation()
+
+
+class TestHocRecordSampling(object):
+
+    def testEveryStep(self):
+        data = HocModUtils.get_record_sampling(_DummyRecordable(None), 'vec')
+        assert data['buffer_size'] == HocModUtils.initial_buffer_size
+        assert data['record_setup'] == ''
+        assert data['record_args'] == ''
+        assert data['record_times_name'] is None
+
+    def testInterval(self):
+        sampling = RecordSampling(interval=0.5 * pq.ms)
+        data = HocModUtils.get_record_sampling(_DummyRecordable(sampling), 'vec')
+        assert data['buffer_size'] == 202
+        assert data['record_setup'] == ''
+        assert data['record_args'] == ', 0.5'
+        assert data['record_times_name'] is None
+
+    def testEnvelopeRecordsEveryStep(self):
+        sampling = RecordSampling(interval=0.5 * pq.ms, envelope=True)
+        data = HocModUtils.get_record_sampling(_DummyRecordable(sampling), 'vec')
+        assert data['record_args'] == ''
+        assert data['record_times_name'] is None
+
+    def testWindow(self):
+        sampling = RecordSampling(interval=0.5 * pq.ms, window=(10 * pq.ms, 20 * pq.ms))
+        data = HocModUtils.get_record_sampling(_DummyRecordable(sampling), 'vec')
+        assert data['buffer_size'] == 21
+        assert data['record_times_name'] == 'vec_times'
+        assert data['record_args'] == ', vec_times'
+        assert 'vec_times = new Vector()' in data['record_setup']
+        assert 'vec_times.indgen(10.0, 20.0, 0.5)' in data['record_setup']
+
+    def testWindowTimesVectorsAreDistinct(self):
+        # Two vectors recording the same object each get their own times
+        # vector, named from the hoc vector rather than the recordable:
+        sampling = RecordSampling(window=(10 * pq.ms, 20 * pq.ms))
+        hocfile_obj = MHocFile()
+        rec1 = _DummyRecordable(sampling)
+        rec2 = _DummyRecordable(sampling)
+        HocModUtils.create_record_from_object(hocfile_obj, 'vec1', 'obj', 'v', rec1)
+        HocModUtils.create_record_from_object(hocfile_obj, 'vec2', 'obj', 'v', rec2)
+
+        assert hocfile_obj[MHocFileData.Recordables][rec1]['record_times_name'] == 'vec1_times'
+        assert hocfile_obj[MHocFileData.Recordables][rec2]['record_times_name'] == 'vec2_times'
+        hoc = '\n'.join(hocfile_obj.sections[MHOCSections.InitRecords])
+        assert 'vec1.record(& obj.v, vec1_times)' in hoc
+        assert 'vec2.record(& obj.v, vec2_times)' in hoc
@@ -0,0 +1,68 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+
+import os
+import shutil
+import tempfile
+
+from morphforge.simulation.neuron.biophysics import modfilecompiler
+from morphforge.simulation.neuron.biophysics.modfilecompiler import ModBuilderParams
+
+
+class TestModFileCompiler(object):
+
+    def setup_method(self, method):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.build_dir = os.path.join(self.tmp_dir, 'build')
+        self.output_dir = os.path.join(self.tmp_dir, 'output')
+        os.makedirs(self.build_dir)
+        os.makedirs(self.output_dir)
+        self.modfilename = os.path.join(self.tmp_dir, 'chl.mod')
+        with open(self.modfilename, 'w') as fobj:
+            fobj.write('NEURON { SUFFIX chl }\n')
+        self.old_nocmodlpath = ModBuilderParams.nocmodlpath
+
+    def teardown_method(self, method):
+        ModBuilderParams.nocmodlpath = self.old_nocmodlpath
+        shutil.rmtree(self.tmp_dir)
+
+    def testFailedBuildRemovesBuildDir(self):
+        # (nocmodl 'succeeds' without writing the .c file):
+        ModBuilderParams.nocmodlpath = 'true'
+        try:
+            modfilecompiler._build_mod_file(self.modfilename, output_dir=self.output_dir, build_dir=self.build_dir)
+            assert False, 'Expected the build to fail'
+        except AssertionError, e:
+            assert str(e) != 'Expected the build to fail'
+        assert os.listdir(self.build_dir) == []
+        assert os.listdir(self.output_dir) == []
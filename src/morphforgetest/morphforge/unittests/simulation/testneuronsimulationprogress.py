@@ -0,0 +1,103 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import quantities as pq
+from morphforge.simulation.neuron.core.neuronsimulationprogress import NEURONSimulationProgressChannel
+
+
+class _DummyRecordable(object):
+
+    def __init__(self, name, unit):
+        self.name = name
+        self.unit = unit
+
+    def get_description(self):
+        return 'Description of %s' % self.name
+
+    def get_tags(self):
+        return ['Tag', self.name]
+
+    def get_unit(self):
+        return self.unit
+
+
+class TestNEURONSimulationProgressChannel(object):
+
+    def setup_method(self, method):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.channel = NEURONSimulationProgressChannel(os.path.join(self.tmp_dir, 'progress'))
+        os.mkdir(self.channel.dirname)
+
+    def teardown_method(self, method):
+        shutil.rmtree(self.tmp_dir)
+
+    def testEmptyChannel(self):
+        assert self.channel.read_progress() is None
+        assert self.channel.get_partial_traces() == []
+        assert not self.channel.is_cancelled()
+
+    def testProgressAndPartialTraces(self):
+        # The simulation side, (in the real case, in another process):
+        writer = NEURONSimulationProgressChannel(self.channel.dirname)
+        writer.write_manifest([_DummyRecordable('Vm', 1.0 * pq.mV), _DummyRecordable('I', 1000.0 * pq.pA)])
+        writer.write_chunk(np.array([[0.0, 0.1, 0.2], [-60, -61, -62], [1, 2, 3]]))
+        writer.write_chunk(np.array([[0.3, 0.4], [-63, -64], [4, 5]]))
+        writer.write_progress(t=0.4, tstop=1.6, wall_time=2.0)
+
+        # No partially written files should be left:
+        assert sorted(os.listdir(self.channel.dirname)) == ['chunk00000.npy', 'chunk00001.npy', 'manifest.json', 'progress.json']
+
+        progress = self.channel.read_progress()
+        assert progress.get_fraction_complete() == 0.25
+        assert float(progress.wall_time.rescale('s').magnitude) == 2.0
+
+        (vm, current) = progress.get_partial_traces()
+        assert (vm.name, current.name) == ('Vm', 'I')
+        assert vm.comment == 'Description of Vm'
+        assert vm.tags == ['Tag', 'Vm']
+        assert np.allclose(vm.data_pts.rescale('mV').magnitude, [-60, -61, -62, -63, -64])
+        assert np.allclose(current.data_pts.rescale('nA').magnitude, [1, 2, 3, 4, 5])
+        assert np.allclose(vm.time_pts.rescale('ms').magnitude, [0.0, 0.1, 0.2, 0.3, 0.4])
+        assert vm.get_n() == 5
+
+    def testCancelAndRemove(self):
+        progress_writer = NEURONSimulationProgressChannel(self.channel.dirname)
+        self.channel.cancel()
+        assert progress_writer.is_cancelled()
+
+        self.channel.remove()
+        assert not os.path.exists(self.channel.dirname)
@@ -0,0 +1,115 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+
+import shutil
+import tempfile
+
+import numpy as np
+import quantities as pq
+from morphforge.core.mgrs import LocMgr, SettingsMgr
+from morphforge.traces import TraceFixedDT
+from morphforge.simulation.base import SimulationResult
+from morphforge.simulation.base.simulationmetadatabundle.builders import MetaDataBundleBuilder
+from morphforge.simulation.neuron import NEURONEnvironment
+from morphforge.simulation.neuron.core import neuronsimulation
+
+
+class _StubSubprocess(object):
+
+    # Instead of simulating, write a result where the bundle would have
+    # written it:
+    def __init__(self):
+        self.resfilenames = []
+        self.n_calls = 0
+
+    def call(self, sim_cmd, shell):
+        self.n_calls += 1
+        time = np.linspace(0, 10, 11) * pq.ms
+        result = SimulationResult(traces=[TraceFixedDT(time, time.magnitude * pq.mV, name='Vm')], simulation=None)
+        result.set_simulation_time(0.0, 10.0)
+        result.save_to_directory(self.resfilenames[-1])
+        return 1
+
+
+class TestNEURONSimulationSpawn(object):
+
+    def setup_method(self, method):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.old_get_tmp_path = LocMgr.__dict__['get_tmp_path']
+        self.old_worker_pool_enabled = SettingsMgr._simulation_worker_pool_enabled
+        self.old_build_std_pickler = MetaDataBundleBuilder.__dict__['build_std_pickler']
+        self.old_subprocess = neuronsimulation.subprocess
+        LocMgr.get_tmp_path = classmethod(lambda cls: self.tmp_dir)
+        SettingsMgr._simulation_worker_pool_enabled = False
+
+        self.stub = _StubSubprocess()
+        neuronsimulation.subprocess = self.stub
+        old_build_std_pickler = self.old_build_std_pickler.__func__
+        def build_std_pickler(cls, *args, **kwargs):
+            (bundle, resfilename) = old_build_std_pickler(cls, *args, **kwargs)
+            self.stub.resfilenames.append(resfilename)
+            return (bundle, resfilename)
+        MetaDataBundleBuilder.build_std_pickler = classmethod(build_std_pickler)
+
+    def teardown_method(self, method):
+        LocMgr.get_tmp_path = self.old_get_tmp_path
+        SettingsMgr._simulation_worker_pool_enabled = self.old_worker_pool_enabled
+        MetaDataBundleBuilder.build_std_pickler = self.old_build_std_pickler
+        neuronsimulation.subprocess = self.old_subprocess
+        shutil.rmtree(self.tmp_dir)
+
+    def testSecondRunLoadsFromCache(self):
+        sim = NEURONEnvironment().Simulation(name='Sim')
+        result1 = sim.run(random_seed=1)
+        result2 = sim.run(random_seed=1)
+        assert self.stub.n_calls == 1
+        assert result2.simulation is sim
+        assert np.array_equal(result2.get_trace('Vm').data_pts_np, result1.get_trace('Vm').data_pts_np)
+
+    def testRandomSeedIsPartOfTheKey(self):
+        sim = NEURONEnvironment().Simulation(name='Sim')
+        sim.run(random_seed=1)
+        sim.run(random_seed=2)
+        assert self.stub.n_calls == 2
+        assert self.stub.resfilenames[0] != self.stub.resfilenames[1]
+        sim.run(random_seed=2)
+        assert self.stub.n_calls == 2
+
+    def testBundleIsKeyedOnFingerprint(self):
+        from morphforge.simulation.base.core.simulationfingerprint import SimulationFingerprint
+        sim = NEURONEnvironment().Simulation(name='Sim')
+        fingerprint = SimulationFingerprint.get_md5(sim, random_seed=3)
+        (bundle, _resfilename) = MetaDataBundleBuilder.build_std_pickler(sim, random_seed=3)
+        assert bundle.get_sim_md5sum() == fingerprint
+        (bundle, _resfilename) = MetaDataBundleBuilder.build_std_pickler(sim, random_seed=3, simmd5sum='0123')
+        assert bundle.get_sim_md5sum() == '0123'
@@ -0,0 +1,121 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+
+from morphforge.simulation.neuron.core import neuronsimulationworkerpool
+from morphforge.simulation.neuron.core.neuronsimulationworkerpool import NEURONSimulationWorkerPool
+
+
+class _DummyFile(object):
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class _DummyProcess(object):
+
+    def __init__(self):
+        self.returncode = None
+        self.stdin = _DummyFile()
+
+    def poll(self):
+        return self.returncode
+
+    def kill(self):
+        self.returncode = -9
+
+    def wait(self):
+        return self.returncode
+
+
+class _DummyWorker(object):
+
+    # Stands in for _SimulationWorker, without starting a process:
+    def __init__(self):
+        self.process = _DummyProcess()
+        self.result_file = _DummyFile()
+        self.bundles = []
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def run_bundle(self, bundle_filename):
+        if not self.is_alive():
+            raise EOFError()
+        self.bundles.append(bundle_filename)
+        return True
+
+
+class TestNEURONSimulationWorkerPool(object):
+
+    def setup_method(self, method):
+        self.old_worker_class = neuronsimulationworkerpool._SimulationWorker
+        neuronsimulationworkerpool._SimulationWorker = _DummyWorker
+
+    def teardown_method(self, method):
+        neuronsimulationworkerpool._SimulationWorker = self.old_worker_class
+
+    def testIdleWorkersAreReused(self):
+        pool = NEURONSimulationWorkerPool(n_workers=2)
+        assert pool.run_bundle('a.bundle')
+        assert pool.run_bundle('b.bundle')
+        assert len(pool._workers) == 1
+        assert pool._workers[0].bundles == ['a.bundle', 'b.bundle']
+
+    def testDeadIdleWorkerIsReplaced(self):
+        pool = NEURONSimulationWorkerPool(n_workers=1)
+        assert pool.run_bundle('a.bundle')
+        dead_worker = pool._workers[0]
+        dead_worker.process.returncode = 1
+
+        assert pool.run_bundle('b.bundle')
+        assert len(pool._workers) == 1
+        assert pool._workers[0] is not dead_worker
+        assert pool._workers[0].bundles == ['b.bundle']
+        assert dead_worker.process.stdin.closed and dead_worker.result_file.closed
+
+    def testWorkerDyingDuringRun(self):
+        pool = NEURONSimulationWorkerPool(n_workers=1)
+        assert pool.run_bundle('a.bundle')
+        worker = pool._workers[0]
+
+        def run_bundle(bundle_filename):
+            worker.process.kill()
+            raise EOFError()
+        worker.run_bundle = run_bundle
+
+        assert not pool.run_bundle('b.bundle')
+        assert pool._workers == []
+        assert worker.process.stdin.closed and worker.result_file.closed
@@ -0,0 +1,174 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+import pytest
+import quantities as pq
+
+from morphforge.core import FileIO
+from morphforge.morphology.core import MorphologyTree
+
+
+def _build_simulation():
+    from morphforge.simulation.neuron.core.neuronsimulationenvironment import NEURONEnvironment
+    from morphforgecontrib.simulation.membranemechanisms.simulatorbuiltin.sim_builtin_core import BuiltinChannel
+
+    env = NEURONEnvironment()
+    sim = env.Simulation()
+    morph = MorphologyTree.fromDictionary({'root': {'length': 20, 'diam': 20, 'id': 'soma',
+                                                    'sections': [{'length': 300, 'diam': 2, 'id': 'dend'}]}})
+    cell = sim.create_cell(name='Cell1', morphology=morph)
+    cell.apply_channel(env.Channel(BuiltinChannel, sim_chl_name='hh', name='HHChl'))
+    sim.create_currentclamp(name='Stim1', amp=0.2 * pq.nA, dur=100 * pq.ms, delay=10 * pq.ms, cell_location=cell.soma)
+    return sim
+
+
+def _build_passive_simulation():
+    # (This needs neither NEURON, nor the mechanisms in morphforgecontrib):
+    from morphforge.simulation.neuron import NEURONEnvironment
+
+    sim = NEURONEnvironment().Simulation()
+    morph = MorphologyTree.fromDictionary({'root': {'length': 20, 'diam': 20, 'id': 'soma'}})
+    sim.create_cell(name='Cell1', morphology=morph)
+    return sim
+
+
+def _describe_sections(h, sections):
+    """Returns a sorted list, with the geometry, passive properties and
+    mechanisms of each section, (and not its name, which differs between
+    the two ways of building)."""
+
+    descriptions = []
+    for section in sections:
+        segments = list(section)
+        descriptions.append((round(section.L, 6),
+                             int(section.nseg),
+                             round(section.cm, 6),
+                             round(section.Ra, 6),
+                             tuple([round(seg.diam, 6) for seg in segments]),
+                             tuple(sorted([mech.name() for mech in segments[0]])),
+                             (h.SectionRef(sec=section).has_parent() == 1)))
+    return sorted(descriptions)
+
+
+class _NoH(object):
+    """Stands in for 'neuron.h', where nothing should be built."""
+
+    def __getattr__(self, name):
+        raise AssertionError('neuron.h.%s was used' % name)
+
+    def __setattr__(self, name, value):
+        raise AssertionError('neuron.h.%s was set' % name)
+
+
+def _make_object(sim, supports_nrn_build, build_nrn):
+    from morphforge.simulation.neuron.objects.neuronobject import NEURONObject
+
+    class _Object(NEURONObject):
+
+        def supports_nrn_build(self):
+            return supports_nrn_build
+
+        def build_nrn(self, nrnbuild_obj):
+            build_nrn()
+
+    return _Object(simulation=sim)
+
+
+class _MTA(object):
+
+    def __init__(self, mechanism):
+        self.mechanism = mechanism
+
+
+class TestNrnBuilder(object):
+
+    def testUnsupportedObjectBuildsFromHoc(self):
+        sim = _build_passive_simulation()
+        assert all([sim_obj.supports_nrn_build() for sim_obj in sim.simulation_objects])
+
+        def build_nrn():
+            raise AssertionError('build_nrn() should not be called')
+        sim.simulation_objects.append(_make_object(sim, False, build_nrn))
+
+        # Nothing is built before the unsupported object is found:
+        assert sim._build_nrn(_NoH()) is None
+
+    def testUnsupportedMechanismBuildsFromHoc(self):
+        from morphforge.simulation.neuron.biophysics.mm_neuron import NEURONChl_Base
+
+        class _Biophysics(object):
+            appliedmechanisms = [_MTA(NEURONChl_Base())]
+
+        sim = _build_passive_simulation()
+        cell = [sim_obj for sim_obj in sim.simulation_objects if sim_obj.name == 'Cell1'][0]
+        assert cell.supports_nrn_build()
+
+        cell.get_biophysics = lambda: _Biophysics()
+        assert not cell.supports_nrn_build()
+        assert sim._build_nrn(_NoH()) is None
+
+    def testErrorsFromDirectBuildsAreRaised(self):
+        sim = _build_passive_simulation()
+
+        def build_nrn():
+            raise NotImplementedError()
+        sim.simulation_objects = [_make_object(sim, True, build_nrn)]
+
+        with pytest.raises(NotImplementedError):
+            sim._build_nrn(_NoH())
+
+    def testDirectAndHocBuildsAreEquivalent(self):
+        neuron = pytest.importorskip('neuron')
+        from morphforge.simulation.neuron.simulationdatacontainers import MHocFile
+        h = neuron.h
+
+        # Build directly:
+        sim = _build_simulation()
+        nrn_data = sim._build_nrn(h)
+        assert nrn_data is not None, 'The simulation should not need HOC'
+        direct_names = set([section.name() for section in h.allsec()])
+        direct = _describe_sections(h, list(h.allsec()))
+
+        # Build from HOC, in the same NEURON instance:
+        hoc_data = MHocFile()
+        for sim_obj in sim.simulation_objects:
+            sim_obj.build_hoc(hoc_data)
+        hoc_filename = FileIO.write_to_file(str(hoc_data), suffix='.hoc')
+        assert h.load_file(hoc_filename) == 1
+        from_hoc = _describe_sections(h, [section for section in h.allsec() if not section.name() in direct_names])
+
+        assert len(direct) == 2
+        assert direct == from_hoc
+        assert ('hh' in direct[0][5]) and ('hh' in direct[1][5])
+
+        # No HOC file is written for the direct build:
+        assert sim.hocfilename is None
@@ -0,0 +1,93 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import quantities as pq
+from morphforge.traces import TraceFixedDT, TraceVariableDT
+from morphforge.simulation.base.result.simulationresult import SimulationResult
+
+
+def _build_result(names=('Vm', 'I', 'g')):
+    time = np.linspace(0, 10, 101) * pq.ms
+    traces = [TraceFixedDT(time, np.sin(time.magnitude) * pq.mV, name=names[0], comment='Soma', tags=['Voltage']),
+              TraceFixedDT(time, np.cos(time.magnitude) * pq.nA, name=names[1], tags=['Current', 'CC']),
+              TraceVariableDT(np.array([0, 1, 5, 10]) * pq.ms, np.array([1, 2, 3, 4]) * pq.uA, name=names[2])]
+    result = SimulationResult(traces=traces, simulation=None)
+    result.set_simulation_time(0.0, 10.0)
+    return result
+
+
+class TestSimulationResult(object):
+
+    def setup_method(self, method):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.dirname = os.path.join(self.tmp_dir, 'result')
+
+    def teardown_method(self, method):
+        shutil.rmtree(self.tmp_dir)
+
+    def testColumnarRoundTrip(self):
+        result = _build_result()
+        result.save_to_directory(self.dirname)
+        loaded = SimulationResult.load_from_file(self.dirname)
+
+        assert (loaded.t_start, loaded.t_stop) == (0.0, 10.0)
+        assert [tr.name for tr in loaded.traces] == [tr.name for tr in result.traces]
+        for (tr_loaded, tr) in zip(loaded.traces, result.traces):
+            assert type(tr_loaded) == type(tr)
+            assert tr_loaded.comment == tr.comment
+            assert tr_loaded.tags == tr.tags
+            assert tr_loaded.time_pts.dimensionality == tr.time_pts.dimensionality
+            assert tr_loaded.data_pts.dimensionality == tr.data_pts.dimensionality
+            assert np.array_equal(tr_loaded.time_pts.magnitude, tr.time_pts.magnitude)
+            assert np.array_equal(tr_loaded.data_pts.magnitude, tr.data_pts.magnitude)
+
+    def testLazyTracesAreMemoised(self):
+        _build_result().save_to_directory(self.dirname)
+        loaded = SimulationResult.load_from_directory(self.dirname)
+
+        vm = loaded.get_trace('Vm')
+        assert loaded.get_trace('Vm') is vm
+        assert loaded.traces[0] is vm
+        assert loaded.get_trace('I') is loaded.traces[1]
+
+    def testDuplicateNamesRejected(self):
+        try:
+            _build_result(names=('Vm', 'I', 'Vm')).save_to_directory(self.dirname)
+            assert False, 'Duplicate trace names were not rejected'
+        except ValueError:
+            pass
+        assert os.listdir(self.tmp_dir) == []
@@ -0,0 +1,113 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+
+import numpy as np
+import quantities as pq
+from morphforge.traces import TraceFixedDT, TraceVariableDT, TraceExpression
+
+
+def _assert_same_trace(tr, tr_expected):
+    assert type(tr) == type(tr_expected)
+    assert tr.data_unit.dimensionality.simplified == tr_expected.data_unit.dimensionality.simplified
+    assert np.allclose(tr.time_pts.rescale('ms').magnitude, tr_expected.time_pts.rescale('ms').magnitude)
+    assert np.allclose(tr.data_pts.rescale(tr_expected.data_unit).magnitude, tr_expected.data_pts_np)
+
+
+class TestTraceExpression(object):
+
+    def setup_method(self, method):
+        time = np.linspace(0, 10, 101) * pq.ms
+        self.tr_a = TraceFixedDT(time, np.sin(time.magnitude) * pq.mV)
+        self.tr_b = TraceFixedDT(time, np.cos(time.magnitude) * pq.V)
+        self.tr_c = TraceFixedDT(time, (np.sin(time.magnitude) + 2.0) * pq.nA)
+        self.originals = [np.copy(tr.data_pts_np) for tr in (self.tr_a, self.tr_b, self.tr_c)]
+
+    def teardown_method(self, method):
+        # Evaluation must never write into the data of the traces:
+        for (tr, data) in zip((self.tr_a, self.tr_b, self.tr_c), self.originals):
+            assert np.array_equal(tr.data_pts_np, data)
+
+    def testSameTimeAxis(self):
+        (a, b, c) = (self.tr_a, self.tr_b, self.tr_c)
+        _assert_same_trace((a.lazy() + b + a * 2.0).evaluate(), a + b + a * 2.0)
+        _assert_same_trace(((a.lazy() + b) * c).evaluate(), (a + b) * c)
+        _assert_same_trace(((a.lazy() - b) / c - a / c).evaluate(), (a - b) / c - a / c)
+        _assert_same_trace((a.lazy() ** 2 * c).evaluate(), a ** 2 * c)
+
+    def testRepeatedTraces(self):
+        (a, b) = (self.tr_a, self.tr_b)
+        _assert_same_trace((a.lazy() * a + b * a).evaluate(), a * a + b * a)
+        _assert_same_trace(((a.lazy() + a) * (a - a * 3.0)).evaluate(), (a + a) * (a - a * 3.0))
+
+    def testScalarsAndQuantities(self):
+        (a, b) = (self.tr_a, self.tr_b)
+        _assert_same_trace((2.0 * pq.nA * a.lazy()).evaluate(), 2.0 * pq.nA * a)
+        _assert_same_trace((2.0 - a.lazy() / b).evaluate(), 2.0 - a / b)
+        _assert_same_trace((3 * a.lazy() + b).evaluate(), 3.0 * a + b)
+        _assert_same_trace((a.lazy() + 1.0 * pq.V).evaluate(), a + 1.0 * pq.V)
+        _assert_same_trace((a.lazy() / (2.0 * pq.ms)).evaluate(), a / (2.0 * pq.ms))
+        _assert_same_trace(((a.lazy() * 2.0 + b) * (0.5 * pq.nA)).evaluate(), (a * 2.0 + b) * (0.5 * pq.nA))
+
+    def testResampledFixedDT(self):
+        time = np.linspace(2, 12, 41) * pq.ms
+        tr_d = TraceFixedDT(time, np.cos(time.magnitude) * pq.mV)
+        (a, c) = (self.tr_a, self.tr_c)
+        _assert_same_trace((a.lazy() + tr_d).evaluate(), a + tr_d)
+        _assert_same_trace(((a.lazy() + tr_d) * c).evaluate(), (a + tr_d) * c)
+
+    def testResampledVariableDT(self):
+        time = np.array([1.0, 1.5, 4.0, 7.25, 12.0])
+        tr_v = TraceVariableDT(time * pq.ms, time * 2.0 * pq.mV)
+        tr = (self.tr_a.lazy() - tr_v).evaluate(name='Diff', tags=['T'])
+
+        time_axis = np.unique(np.hstack((self.tr_a.time_pts_ms, time)))
+        time_axis = time_axis[(time_axis >= 1.0) & (time_axis <= 10.0)]
+        expected = np.interp(time_axis, self.tr_a.time_pts_ms, self.tr_a.data_pts_np) - \
+                   np.interp(time_axis, time, time * 2.0)
+        assert type(tr) == TraceVariableDT
+        assert (tr.name, tr.tags) == ('Diff', ['T'])
+        assert np.allclose(tr.time_pts_ms, time_axis)
+        assert np.allclose(tr.data_pts.rescale('mV').magnitude, expected)
+
+    def testErrors(self):
+        for expr in [TraceExpression(value=2.0), TraceExpression(value=2.0) + 1.0]:
+            try:
+                expr.evaluate()
+                assert False, 'Expected ValueError'
+            except ValueError:
+                pass
+        try:
+            self.tr_a.lazy() + 'a'
+            assert False, 'Expected ValueError'
+        except ValueError:
+            pass
@@ -0,0 +1,114 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import quantities as pq
+from morphforge.core.mgrs import LocMgr, SettingsMgr
+from morphforge.traces import TraceFixedDT, TraceFixedDTChunked
+
+
+class TestTraceFixedDTChunked(object):
+
+    # Chunks much smaller than the trace, so that every method crosses
+    # several chunk boundaries:
+    chunk_size = 64
+
+    def setup_method(self, method):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.old_get_tmp_path = LocMgr.__dict__['get_tmp_path']
+        self.old_chunk_size = SettingsMgr._trace_chunk_size
+        LocMgr.get_tmp_path = classmethod(lambda cls: self.tmp_dir)
+        SettingsMgr._trace_chunk_size = self.chunk_size
+
+        # (1000 intervals, so Simpson's rule needs no correction at the end):
+        time = np.linspace(0, 100, 1001) * pq.ms
+        data = np.sin(time.magnitude / 3.0) * 20.0 + np.cos(time.magnitude * 2.0) * 5.0 - 60.0
+        self.tr_fixed = TraceFixedDT(time, data * pq.mV)
+        self.tr_chunked = TraceFixedDTChunked.from_trace(self.tr_fixed)
+
+    def teardown_method(self, method):
+        LocMgr.get_tmp_path = self.old_get_tmp_path
+        SettingsMgr._trace_chunk_size = self.old_chunk_size
+        shutil.rmtree(self.tmp_dir)
+
+    def _assert_same_trace(self, tr_chunked, tr_fixed):
+        assert type(tr_chunked) == TraceFixedDTChunked
+        tr = tr_chunked.to_fixed_dt()
+        assert np.allclose(tr.time_pts.rescale('ms').magnitude, tr_fixed.time_pts.rescale('ms').magnitude)
+        assert np.allclose(tr.data_pts.rescale(tr_fixed.data_unit).magnitude, tr_fixed.data_pts_np)
+
+    def testFiltersCarryStateAcrossChunks(self):
+        for (method, kwargs) in [
+                ('filterlowpassrc', {'tau': 2.0 * pq.ms}),
+                ('filterbutterworth', {'filterorder': 4, 'cutoff_frequency': 200.0 * pq.Hz}),
+                ('filterbessel', {'filterorder': 4, 'cutoff_frequency': 200.0 * pq.Hz}),
+                ]:
+            tr_chunked = getattr(self.tr_chunked, method)(**kwargs)
+            tr_fixed = getattr(self.tr_fixed, method)(**kwargs)
+            self._assert_same_trace(tr_chunked, tr_fixed)
+
+    def testFilterFilesAreRemoved(self):
+        tr = self.tr_chunked.filterlowpassrc(tau=2.0 * pq.ms)
+        tr_window = tr.window((10.0 * pq.ms, 20.0 * pq.ms))
+        del tr
+        assert os.listdir(self.tmp_dir) == []
+        # (The data is still mapped, while it is in use):
+        assert np.allclose(tr_window.to_fixed_dt().data_pts_np,
+                           self.tr_fixed.filterlowpassrc(tau=2.0 * pq.ms).window((10.0 * pq.ms, 20.0 * pq.ms)).data_pts_np)
+
+    def testIntegrateAcrossChunks(self):
+        expected = self.tr_fixed.integrate()
+        for chunk_size in (self.chunk_size, self.chunk_size + 1, 3):
+            SettingsMgr._trace_chunk_size = chunk_size
+            result = self.tr_chunked.integrate()
+            assert result.dimensionality == expected.dimensionality
+            assert np.allclose(result.magnitude, expected.magnitude)
+
+    def testFindSpikesAcrossChunkBoundary(self):
+        # Crossings just after, at and just before a chunk boundary:
+        data = np.zeros(1001)
+        for (rise_index, peak_index) in [(self.chunk_size, self.chunk_size + 3),
+                                         (3 * self.chunk_size - 1, 3 * self.chunk_size + 2),
+                                         (5 * self.chunk_size + 1, 5 * self.chunk_size + 4)]:
+            data[rise_index:peak_index] = [10.0, 30.0, 5.0]
+        tr_fixed = TraceFixedDT(self.tr_fixed.time_pts, data * pq.mV)
+        tr_chunked = TraceFixedDTChunked.from_trace(tr_fixed)
+
+        times_fixed = [float(t.rescale('ms')) for t in tr_fixed.find_spikes(threshold=20.0 * pq.mV).times]
+        times_chunked = [float(t.rescale('ms')) for t in tr_chunked.find_spikes(threshold=20.0 * pq.mV).times]
+        assert len(times_fixed) == 3
+        assert np.allclose(times_chunked, times_fixed)
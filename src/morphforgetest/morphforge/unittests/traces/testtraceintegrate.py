@@ -0,0 +1,61 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+
+import numpy as np
+import quantities as pq
+from morphforge.traces import TraceFixedDT
+from morphforge.traces import TracePiecewise
+from morphforge.traces import TracePieceFunctionFlat
+from morphforge.traces import TracePieceFunctionLinear
+
+
+class TestTraceIntegrate(object):
+
+    def testPiecewise(self):
+        tr = TracePiecewise(pieces=[
+                TracePieceFunctionFlat(time_window=(0 * pq.ms, 10 * pq.ms), x=2.0 * pq.mV),
+                TracePieceFunctionLinear(time_window=(10 * pq.ms, 20 * pq.ms), x0=2.0 * pq.mV, x1=6.0 * pq.mV),
+                TracePieceFunctionLinear(time_window=(20 * pq.ms, 30 * pq.ms), x0=6.0 * pq.mV, x1=-2.0 * pq.mV),
+                ])
+        result = tr.integrate()
+        assert np.allclose(float(result.rescale(pq.mV * pq.ms)), 20.0 + 40.0 + 20.0)
+
+    def testPiecewiseMatchesPointBased(self):
+        tr = TracePiecewise(pieces=[
+                TracePieceFunctionLinear(time_window=(0 * pq.ms, 5 * pq.ms), x0=-1.0 * pq.nA, x1=3.0 * pq.nA),
+                TracePieceFunctionFlat(time_window=(5 * pq.ms, 8 * pq.ms), x=3.0 * pq.nA),
+                ])
+        time = np.linspace(0, 8, 801) * pq.ms
+        tr_fixed = TraceFixedDT(time, tr.get_values(time))
+        assert np.allclose(float(tr.integrate().rescale(pq.nA * pq.ms)),
+                           float(tr_fixed.integrate().rescale(pq.nA * pq.ms)), atol=1e-3)
@@ -0,0 +1,110 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+
+import numpy as np
+import quantities as pq
+from morphforge.traces import TraceFixedDT, TraceVariableDT
+from morphforge.traces.methods.MMtrace_conversion import _simplify_indices
+from morphforge.traces.methods.MMtrace_conversion import _simplify_indices_chunked
+from morphforge.simulation.base import SimulationResult
+
+
+def _segment_distance(px, py, ax, ay, bx, by):
+    # The distance from (px,py) to the nearest point of the segment a-b:
+    (seg_x, seg_y) = (bx - ax, by - ay)
+    seg_len_sq = seg_x ** 2 + seg_y ** 2
+    t = 0.0
+    if seg_len_sq > 0.0:
+        t = min(max(((px - ax) * seg_x + (py - ay) * seg_y) / seg_len_sq, 0.0), 1.0)
+    return np.hypot(px - (ax + t * seg_x), py - (ay + t * seg_y))
+
+
+def _reference_simplify(x, y, tolerance, start, stop):
+    # Plain recursive Douglas-Peucker, a point at a time:
+    if stop - start < 2:
+        return [start, stop]
+    dists = [_segment_distance(x[i], y[i], x[start], y[start], x[stop], y[stop]) for i in range(start + 1, stop)]
+    i_max = int(np.argmax(dists))
+    if dists[i_max] <= tolerance:
+        return [start, stop]
+    farthest = start + 1 + i_max
+    return _reference_simplify(x, y, tolerance, start, farthest)[:-1] + _reference_simplify(x, y, tolerance, farthest, stop)
+
+
+class TestTraceSimplify(object):
+
+    def setup_method(self, method):
+        random = np.random.RandomState(0)
+        self.x = np.linspace(0, 50, 501)
+        self.y = np.sin(self.x / 4.0) * 10.0 + random.normal(scale=0.5, size=len(self.x))
+
+    def testMatchesReference(self):
+        for tolerance in (0.1, 0.5, 2.0, 100.0):
+            keep = _simplify_indices(self.x, self.y, tolerance)
+            expected = _reference_simplify(self.x, self.y, tolerance, 0, len(self.x) - 1)
+            assert keep.tolist() == expected
+
+    def testChunkedMatchesReference(self):
+        chunk_size = 64
+        tolerance = 0.5
+        keep = _simplify_indices_chunked(self.x, self.y, tolerance, chunk_size)
+
+        expected = [0]
+        chunk_ends = range(0, len(self.x) - 1, chunk_size - 1) + [len(self.x) - 1]
+        for (start, stop) in zip(chunk_ends[:-1], chunk_ends[1:]):
+            expected.extend(_reference_simplify(self.x, self.y, tolerance, start, stop)[1:])
+        assert keep.tolist() == expected
+        # (The ends of every chunk are kept):
+        assert set(chunk_ends) <= set(keep.tolist())
+
+    def testTraceEpsilonUnits(self):
+        tr = TraceFixedDT(self.x * pq.ms, self.y * pq.mV, name='Vm')
+        expected = _simplify_indices(self.x, self.y, 0.5)
+        for epsilon in (0.5, 0.5 * pq.mV, 0.0005 * pq.V):
+            tr_simple = tr.convert_to_variable(epsilon)
+            assert type(tr_simple) == TraceVariableDT
+            assert tr_simple.name == 'Vm'
+            assert np.allclose(tr_simple.time_pts_np, self.x[expected])
+            assert np.allclose(tr_simple.data_pts.rescale('mV').magnitude, self.y[expected])
+
+    def testSimplifyTraces(self):
+        tr_v = TraceFixedDT(self.x * pq.ms, self.y * pq.mV, name='Vm')
+        tr_i = TraceFixedDT(self.x * pq.ms, self.y * pq.nA, name='I')
+        result = SimulationResult(traces=[tr_v, tr_i], simulation=None)
+        result.set_simulation_time(0.0, 50.0)
+
+        simplified = result.simplify_traces({'Vm': 0.5 * pq.mV}, chunk_size=64)
+        assert (simplified.t_start, simplified.t_stop) == (0.0, 50.0)
+        assert simplified.get_trace('I') is tr_i
+        expected = _simplify_indices_chunked(self.x, self.y, 0.5, 64)
+        assert np.allclose(simplified.get_trace('Vm').time_pts_np, self.x[expected])
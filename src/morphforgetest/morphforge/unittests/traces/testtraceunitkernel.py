@@ -0,0 +1,144 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------
+# Copyright (c) 2012 Michael Hull.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  - Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  - Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+#  OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------
+
+
+
+import operator
+
+import numpy as np
+import quantities as pq
+from morphforge.traces import TraceFixedDT, TraceVariableDT
+from morphforge.traces.operators.trace_unit_kernel import TraceUnitKernel
+
+
+def _assert_same_quantity(values, values_unit, expected):
+    # The kernel result, (magnitudes and a unit), against the same
+    # arithmetic done with quantities:
+    assert pq.Quantity(1.0, values_unit).dimensionality.simplified == expected.dimensionality.simplified
+    result = pq.Quantity(values, values_unit).rescale(expected.units)
+    assert np.allclose(result.magnitude, expected.magnitude)
+
+
+class TestTraceUnitKernel(object):
+
+    def setup_method(self, method):
+        self.time = np.linspace(0, 10, 101) * pq.ms
+        self.tr_v = TraceFixedDT(self.time, np.sin(self.time.magnitude) * pq.mV)
+        self.tr_i = TraceFixedDT(self.time, (np.cos(self.time.magnitude) + 2.0) * pq.nA)
+
+    def testOperateMatchesQuantities(self):
+        lhs = np.array([1.0, -2.0, 3.5]) * pq.mV
+        rhs_values = [np.array([0.5, 0.25, -4.0]) * unt for unt in (pq.mV, pq.V, pq.nA, pq.ms)]
+        for rhs in rhs_values:
+            ops = [operator.__mul__, operator.__div__]
+            if rhs.dimensionality.simplified == lhs.dimensionality.simplified:
+                ops.extend([operator.__add__, operator.__sub__])
+            for op in ops:
+                (values, values_unit) = TraceUnitKernel.operate(op, lhs.magnitude, lhs.units, rhs.magnitude, rhs.units)
+                _assert_same_quantity(values, values_unit, op(lhs, rhs))
+
+    def testAddKeepsLhsUnits(self):
+        (values, values_unit) = TraceUnitKernel.operate(operator.__add__, np.array([1.0]), pq.mV, np.array([1.0]), pq.V)
+        assert values_unit == pq.mV
+        assert np.allclose(values, [1001.0])
+
+    def testUnitResultsAreCached(self):
+        result1 = TraceUnitKernel.get_unit_result(operator.__div__, pq.mV, pq.ms)
+        result2 = TraceUnitKernel.get_unit_result(operator.__div__, pq.mV, pq.ms)
+        assert result1 is result2
+
+    def testPow(self):
+        lhs = np.array([1.0, 2.0, 3.0]) * pq.mV
+        (values, values_unit) = TraceUnitKernel.operate(operator.__pow__, lhs.magnitude, lhs.units, 2.0, pq.dimensionless)
+        _assert_same_quantity(values, values_unit, lhs ** 2)
+
+        try:
+            TraceUnitKernel.operate(operator.__pow__, lhs.magnitude, lhs.units, 2.0, pq.mV)
+            assert False, 'Expected ValueError'
+        except ValueError:
+            pass
+
+    def testFromMagnitudes(self):
+        time = np.linspace(0, 1, 11)
+        data = np.arange(11.0)
+        for trace_type in (TraceFixedDT, TraceVariableDT):
+            tr = trace_type.from_magnitudes(time=time, time_unit=pq.ms, data=data, data_unit=pq.mV, name='T', tags=['A'])
+            tr_ref = trace_type(time * pq.ms, data * pq.mV, name='T', tags=['A'])
+            assert type(tr) == trace_type
+            assert (tr.name, tr.tags) == (tr_ref.name, tr_ref.tags)
+            assert tr.time_unit == tr_ref.time_unit
+            assert tr.data_unit == tr_ref.data_unit
+            assert np.array_equal(tr.time_pts_np, tr_ref.time_pts_np)
+            assert np.array_equal(tr.data_pts_np, tr_ref.data_pts_np)
+            # The arrays are not copied:
+            assert np.may_share_memory(tr.data_pts_np, data)
+
+    def testTraceTraceOperators(self):
+        v = self.tr_v.data_pts
+        i = self.tr_i.data_pts
+        tr_scaled = TraceFixedDT(self.time, self.tr_v.data_pts.rescale(pq.V))
+        for (tr, expected) in [
+                (self.tr_v + self.tr_v, v + v),
+                (self.tr_v - tr_scaled, v - v),
+                (self.tr_v * self.tr_i, v * i),
+                (self.tr_v / self.tr_i, v / i),
+                ]:
+            assert np.array_equal(tr.time_pts_np, self.time.magnitude)
+            _assert_same_quantity(tr.data_pts_np, tr.data_unit, expected)
+
+    def testTraceQuantityOperators(self):
+        v = self.tr_v.data_pts
+        for (tr, expected) in [
+                (self.tr_v + 1.0 * pq.V, v + 1.0 * pq.V),
+                (self.tr_v - 2.0 * pq.mV, v - 2.0 * pq.mV),
+                (self.tr_v * (2.0 * pq.nA), v * (2.0 * pq.nA)),
+                (self.tr_v / (2.0 * pq.ms), v / (2.0 * pq.ms)),
+                (self.tr_v * 3.0, v * 3.0),
+                (3.0 * self.tr_v, v * 3.0),
+                (self.tr_v ** 2, v ** 2),
+                ]:
+            assert type(tr) == TraceFixedDT
+            _assert_same_quantity(tr.data_pts_np, tr.data_unit, expected)
+
+    def testMethods(self):
+        v = self.tr_v.data_pts
+        for (result, expected) in [
+                (self.tr_v.mean(), np.mean(v)),
+                (self.tr_v.stddev(), np.std(v)),
+                (self.tr_v.var(), np.var(v)),
+                (self.tr_v.rms(), np.sqrt(np.mean(v ** 2))),
+                (self.tr_v.ptp(), np.max(v) - np.min(v)),
+                ]:
+            _assert_same_quantity(result.magnitude, result.units, expected)
+
+        gradient = self.tr_v.gradient()
+        expected = np.gradient(v.magnitude) * v.units / self.tr_v.get_dt_new()
+        _assert_same_quantity(gradient.data_pts_np, gradient.data_unit, expected)